@@ -0,0 +1,190 @@
+'''End-to-end benchmarks of the search engines, against the local mock server.
+
+Each benchmark runs in a fresh process, so that the CPU time and the peak RSS
+are those of a single run, and the mock server runs in a process of its own.
+
+    $ python -m benchmarks.bench_engines -e bing,google,all -p 5 --latency 0.05
+'''
+import argparse
+import asyncio
+import json
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from search_engines.engines import search_engines_dict
+from search_engines.engines.metager import Metager
+from search_engines.multiple_search_engines import AsyncAllSearchEngines
+from search_engines.rate_limiter import RateLimiter
+from . import mock_serp
+
+
+ENGINES = dict(search_engines_dict, metager=Metager)
+'''The benchmarked engines; Metager isn't in search_engines_dict.'''
+ALL = 'all'
+'''Runs AsyncAllSearchEngines.'''
+
+COLUMNS = [
+    ('engine', '<12', ''), ('pages', '>6', ''), ('items', '>6', ''), ('pages_per_sec', '>13', '.1f'),
+    ('ttfr_ms', '>9', '.1f'), ('p50_ms', '>8', '.1f'), ('p99_ms', '>8', '.1f'),
+    ('cpu_ms_per_page', '>15', '.2f'), ('peak_rss_mb', '>11', '.1f')
+]
+'''The table columns: name, alignment and width, number format.'''
+
+
+class PageTimer:
+    '''Measures the page latency of an engine: from the first request for a page
+    (including redirects, and the bootstrap requests of the first page) to the end
+    of its parsing. Pages fetched in advance are timed from their own request,
+    by URL, so the pages in flight at once don't share a start time.'''
+    def __init__(self, engine):
+        self.latencies = []
+        self._engine = engine
+        self._starts = {}
+        self._first = None
+        self._page_start = None
+        self._get_page = engine._get_page
+        self._request_page = engine._request_page
+        self._fetch_page = engine._fetch_page
+        self._parse_page = engine._parse_page
+        engine._get_page = self.get_page
+        engine._request_page = self.request_page
+        engine._fetch_page = self.fetch_page
+        engine._parse_page = self.parse_page
+
+    async def get_page(self, page, data=None):
+        if self._first is None:
+            self._first = time.perf_counter()
+        return await self._get_page(page, data)
+
+    async def request_page(self, request):
+        self._starts.setdefault(request['url'], time.perf_counter())
+        return await self._request_page(request)
+
+    async def fetch_page(self, page, pages, request, prefetched):
+        if page in prefetched:
+            request = self._engine._page_request(page)
+        response = await self._fetch_page(page, pages, request, prefetched)
+        start = self._starts.pop(request['url'], None)
+        if page == 1 and self._first is not None:
+            start = self._first if start is None else min(start, self._first)
+        self._page_start = start
+        return response
+
+    async def parse_page(self, html):
+        try:
+            return await self._parse_page(html)
+        finally:
+            if self._page_start is not None:
+                self.latencies.append(time.perf_counter() - self._page_start)
+            self._page_start = None
+
+
+def run_benchmark(name, base_url, query, pages, delay, parser=None):
+    '''Runs a benchmark and returns its measurements. Meant to run in a fresh process.
+
+    :param str name: The engine name, or 'all'
+    :param str base_url: The mock server URL
+    :param str query: The search query
+    :param int pages: The number of pages per engine
+    :param float delay: The seconds between the requests to an engine, 0 for no rate limit
+    :param str parser: optional, the HTML parser backend
+    '''
+    return asyncio.run(_benchmark(name, base_url, query, pages, delay, parser))
+
+
+async def _benchmark(name, base_url, query, pages, delay, parser):
+    if name == ALL:
+        searcher = AsyncAllSearchEngines(proxy=None)
+        engines = searcher._engines
+    else:
+        searcher = ENGINES[name](proxy=None)
+        engines = [searcher]
+    searcher.disable_console()
+
+    limiter = RateLimiter(1.0 / delay, jitter=0) if delay else None
+    timers = []
+    for engine in engines:
+        mock_serp.point_engine(engine, base_url)
+        engine.set_rate_limiter(limiter)
+        if parser:
+            engine.set_parser(parser)
+        timers.append(PageTimer(engine))
+
+    items, first = 0, None
+    cpu, start = time.process_time(), time.perf_counter()
+    async for _ in searcher.search_iter(query, pages):
+        if first is None:
+            first = time.perf_counter() - start
+        items += 1
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    await searcher.close()
+
+    latencies = sorted(t for timer in timers for t in timer.latencies)
+    count = len(latencies) or 1
+    return dict(
+        engine=name,
+        pages=len(latencies),
+        items=items,
+        pages_per_sec=len(latencies) / wall,
+        ttfr_ms=(first or 0) * 1000,
+        p50_ms=_percentile(latencies, 50) * 1000,
+        p99_ms=_percentile(latencies, 99) * 1000,
+        cpu_ms_per_page=cpu / count * 1000,
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    )
+
+
+def _percentile(values, percent):
+    '''Returns the nearest-rank percentile of sorted values.'''
+    if not values:
+        return 0.0
+    rank = max(int(round(percent / 100.0 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def print_table(results):
+    '''Prints the measurements as a table.'''
+    print(' '.join('{:{}}'.format(name, width) for name, width, _ in COLUMNS))
+    for result in results:
+        print(' '.join('{:{}{}}'.format(result[name], width, fmt) for name, width, fmt in COLUMNS))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-e', help='engines, comma separated, or "all" for AsyncAllSearchEngines',
+                    default=','.join(list(ENGINES) + [ALL]))
+    ap.add_argument('-q', help='query', default='benchmark query')
+    ap.add_argument('-p', help='pages per engine', type=int, default=5)
+    ap.add_argument('--delay', help='seconds between the requests to an engine (overrides the rate limits; 0 disables them)', type=float, default=0.0)
+    ap.add_argument('--latency', help='mock server latency, in seconds', type=float, default=0.0)
+    ap.add_argument('--page-size', help='mock page size, in bytes', type=int, default=mock_serp.PAGE_SIZE)
+    ap.add_argument('--parser', help='HTML parser backend: lxml, lexbor, html.parser')
+    ap.add_argument('--json', help='saves the measurements to a JSON file')
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.e.lower().split(',') if n.strip()]
+    for name in names:
+        if name != ALL and name not in ENGINES:
+            ap.error('Unknown engine "{}"'.format(name))
+
+    server, base_url = mock_serp.start_server(max(args.p, 1), args.latency, args.page_size)
+    try:
+        results = []
+        for name in names:
+            with ProcessPoolExecutor(1) as executor:
+                future = executor.submit(run_benchmark, name, base_url, args.q, args.p, args.delay, args.parser)
+                results.append(future.result())
+    finally:
+        server.terminate()
+        server.join()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+'''Import-time benchmarks: the startup cost of the package and the CLI.
+
+Each scenario runs in fresh interpreters; the median and fastest wall times
+are reported, with the number of modules loaded. 'all engines' imports every
+engine module, which is what importing the package used to do.
+
+    $ python -m benchmarks.bench_import -n 20
+'''
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from os import path as os_path
+
+
+ROOT = os_path.dirname(os_path.dirname(os_path.abspath(__file__)))
+
+SCENARIOS = [
+    ('package', 'import search_engines'),
+    ('one engine', 'from search_engines import Bing'),
+    ('all engines', 'import search_engines; list(search_engines.search_engines_dict.values())'),
+    ('multiple engines', 'from search_engines.multiple_search_engines import AsyncMultipleSearchEngines'),
+    ('cli', 'import search_engines_cli'),
+    ('cli -h', '\n'.join([
+        'import contextlib, io, sys, search_engines_cli',
+        "sys.argv = ['search_engines_cli.py', '-h']",
+        'with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()):',
+        '    search_engines_cli.main()'
+    ]))
+]
+'''The scenarios: name and code.'''
+
+COLUMNS = [
+    ('scenario', '<18', ''), ('median_ms', '>10', '.1f'), ('min_ms', '>8', '.1f'), ('modules', '>8', '')
+]
+'''The table columns: name, alignment and width, number format.'''
+
+
+def run_scenario(code, runs):
+    '''Runs code in fresh interpreters and returns its wall times and loaded modules.'''
+    script = code + '\nimport sys; print(len(sys.modules))'
+    times, modules = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', script], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        times.append(time.perf_counter() - start)
+        modules = int(output.split()[-1])
+    return times, modules
+
+
+def baseline(runs):
+    '''Returns the wall times of an empty interpreter.'''
+    return run_scenario('pass', runs)[0]
+
+
+def print_table(results):
+    '''Prints the measurements as a table.'''
+    print(' '.join('{:{}}'.format(name, width) for name, width, _ in COLUMNS))
+    for result in results:
+        print(' '.join('{:{}{}}'.format(result[name], width, fmt) for name, width, fmt in COLUMNS))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='interpreters per scenario', type=int, default=10)
+    ap.add_argument('--json', help='saves the measurements to a JSON file')
+    args = ap.parse_args()
+
+    empty = statistics.median(baseline(args.n))
+    results = []
+    for name, code in SCENARIOS:
+        times, modules = run_scenario(code, args.n)
+        results.append(dict(
+            scenario=name,
+            median_ms=(statistics.median(times) - empty) * 1000,
+            min_ms=(min(times) - empty) * 1000,
+            modules=modules
+        ))
+    print('Times exclude the interpreter startup ({:.1f} ms)'.format(empty * 1000))
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+'''Micro-benchmarks of the results parsing, on saved results pages.
+
+The saved pages in `fixtures` are synthetic: they were captured from the mock
+server (benchmarks.mock_serp), which mimics the markup of each engine. Real
+pages can be captured with `--capture --live`; they change the measurements,
+so the baseline has to be saved again.
+
+Times the parsing stages of every engine in isolation: building the document
+(parse), extracting the items (_filter_results), deduplicating them
+(_collect_results) and finding the next page (_next_page). Reports µs per page,
+the peak memory allocated per page (tracemalloc) and the items extracted, and
+fails if a stage is slower than the stored baseline. The machine speed varies:
+the baseline is the median of several measurements of each stage
+(--retries + 1), and an engine with a slower stage is measured as many times,
+and compared by its median, before the check fails. Some machines run faster
+for a while after being idle: a round of measurements is discarded before
+the baseline is saved.
+
+    $ python -m benchmarks.bench_parsers                   # compares to the baseline
+    $ python -m benchmarks.bench_parsers --save-baseline
+    $ python -m benchmarks.bench_parsers --capture         # saves new pages from the mock server
+    $ python -m benchmarks.bench_parsers --capture --live  # saves new pages from the search engines
+'''
+import argparse
+import asyncio
+import gc
+import gzip
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from os import path as os_path, makedirs
+
+from search_engines.results import SearchResults
+from search_engines.executor import _complete
+from search_engines.parsers import get_parser
+from search_engines import config as cfg
+from .bench_engines import ENGINES
+from . import mock_serp
+
+
+FIXTURES_DIR = os_path.join(os_path.dirname(os_path.abspath(__file__)), 'fixtures')
+'''The saved results pages, one gzip file per engine.'''
+BASELINE_FILE = os_path.join(os_path.dirname(os_path.abspath(__file__)), 'parsers_baseline.json')
+'''The µs per page of each stage, per parser backend and engine.'''
+FIXTURE_QUERY = 'benchmark query'
+'''The query of the saved pages.'''
+
+STAGES = ('parse', 'filter', 'collect', 'next')
+
+## Allowed slowdown of a stage, relative to the baseline
+THRESHOLD = 0.25
+
+## Slowdowns smaller than this (µs) are timer noise and don't fail the check
+NOISE_US = 5.0
+
+## Measurements of an engine with a slower stage before the check fails, besides
+## the first one; the baseline is the median of RETRIES + 1 measurements of each stage
+RETRIES = 5
+
+## Pause between two measurements of an engine (seconds), to let a busy machine settle
+RETRY_PAUSE = 1.0
+
+
+def fixture_file(name, directory=FIXTURES_DIR):
+    '''Returns the saved page of an engine.'''
+    return os_path.join(directory, name + '.gz')
+
+
+def load_fixture(name, directory=FIXTURES_DIR):
+    '''Returns the saved page of an engine, or None.'''
+    path = fixture_file(name, directory)
+    if not os_path.isfile(path):
+        return None
+    with gzip.open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+async def capture(names, base_url=None, directory=FIXTURES_DIR):
+    '''Searches one page with each engine and saves the page.
+
+    :param list names: The engine names
+    :param str base_url: optional, the mock server URL (default: the real search engines)
+    :param str directory: optional, the fixtures directory
+    '''
+    makedirs(directory, exist_ok=True)
+    for name in names:
+        engine = ENGINES[name](proxy=None if base_url else cfg.PROXY)
+        engine.disable_console()
+        if base_url:
+            mock_serp.point_engine(engine, base_url)
+        pages = []
+        parse_page = engine._parse_page
+
+        async def save_page(html, parse_page=parse_page, pages=pages):
+            pages.append(html)
+            return await parse_page(html)
+
+        engine._parse_page = save_page
+        await engine.search(FIXTURE_QUERY, 1)
+        await engine.close()
+        if not pages:
+            print('{}: no page captured'.format(name))
+            continue
+        with gzip.open(fixture_file(name, directory), 'wb') as f:
+            f.write(pages[0].encode('utf-8'))
+        print('{}: {} bytes'.format(name, len(pages[0])))
+
+
+def benchmark(name, html, parser=None, repeat=20):
+    '''Times the parsing stages of an engine on a page.
+
+    :param str name: The engine name
+    :param str html: The page content
+    :param str parser: optional, the HTML parser backend
+    :param int repeat: optional, the timing runs per stage; the fastest run is kept
+    :returns dict The µs of each stage, the allocated KB and the items
+    '''
+    engine = ENGINES[name](proxy=None)
+    engine.disable_console()
+    engine._query = FIXTURE_QUERY
+    if parser:
+        engine.set_parser(parser)
+
+    def parse():
+        return engine._parser.parse(html, engine._REGIONS)
+
+    def collect(items):
+        engine.results = SearchResults()
+        return engine._collect_results(items)
+
+    tracemalloc.start()
+    tags = parse()
+    items = engine._filter_results(tags)
+    collect(items)
+    _complete(engine._next_page(tags))
+    alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = dict(
+        parse=_time(parse, repeat),
+        filter=_time(lambda: engine._filter_results(tags), repeat),
+        collect=_time(lambda: collect(items), repeat),
+        next=_time(lambda: _complete(engine._next_page(tags)), repeat)
+    )
+    result.update(total=sum(result.values()), alloc_kb=alloc / 1024.0, items=len(items))
+    return result
+
+
+def _time(func, repeat):
+    '''Returns the fastest run of a function, in µs. The garbage collector is
+    paused while timing, like timeit does.'''
+    best = None
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if enabled:
+            gc.enable()
+    return best * 1e6
+
+
+def regressions(results, baseline, threshold=THRESHOLD):
+    '''Returns the (engine, stage, µs, baseline µs) of the stages slower than the baseline.'''
+    slower = []
+    for name, result in results.items():
+        for stage in STAGES:
+            base = baseline.get(name, {}).get(stage)
+            if base is None:
+                continue
+            if result[stage] > base * (1 + threshold) and result[stage] - base > NOISE_US:
+                slower.append((name, stage, result[stage], base))
+    return slower
+
+
+def median(measurements):
+    '''Returns the median of each stage of several measurements.'''
+    result = dict(measurements[0])
+    result.update((stage, statistics.median(m[stage] for m in measurements)) for stage in STAGES)
+    result['total'] = sum(result[stage] for stage in STAGES)
+    return result
+
+
+def print_table(results):
+    '''Prints the measurements as a table.'''
+    columns = ('engine',) + STAGES + ('total', 'alloc_kb', 'items')
+    print('{:<12}'.format(columns[0]) + ''.join('{:>10}'.format(c) for c in columns[1:]))
+    for name, result in results.items():
+        print('{:<12}'.format(name) + ''.join(
+            '{:>10.1f}'.format(result[c]) if c != 'items' else '{:>10}'.format(result[c])
+            for c in columns[1:]
+        ))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-e', help='engines, comma separated', default=','.join(ENGINES))
+    ap.add_argument('--parser', help='HTML parser backend: lxml, lexbor, html.parser', default=cfg.PARSER)
+    ap.add_argument('--repeat', help='timing runs per stage', type=int, default=20)
+    ap.add_argument('--threshold', help='allowed slowdown, e.g. 0.25 for 25%%', type=float, default=THRESHOLD)
+    ap.add_argument('--retries', help='measurements of the slower engines', type=int, default=RETRIES)
+    ap.add_argument('--baseline', help='the baseline file', default=BASELINE_FILE)
+    ap.add_argument('--save-baseline', help='saves the measurements as the baseline', action='store_true')
+    ap.add_argument('--capture', help='saves new pages instead of benchmarking', action='store_true')
+    ap.add_argument('--live', help='captures from the search engines, not the mock server', action='store_true')
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.e.lower().split(',') if n.strip()]
+    for name in names:
+        if name not in ENGINES:
+            ap.error('Unknown engine "{}"'.format(name))
+
+    if args.capture:
+        server, base_url = (None, None) if args.live else mock_serp.start_server()
+        try:
+            asyncio.run(capture(names, base_url))
+        finally:
+            if server:
+                server.terminate()
+                server.join()
+        return
+
+    parser = get_parser(args.parser).name
+    pages = {}
+    for name in names:
+        html = load_fixture(name)
+        if html is None:
+            print('{}: no saved page, run with --capture'.format(name))
+            continue
+        pages[name] = html
+    if args.save_baseline:
+        for name, html in pages.items():
+            benchmark(name, html, args.parser, args.repeat)
+    results = {name: benchmark(name, html, args.parser, args.repeat) for name, html in pages.items()}
+
+    baselines = {}
+    if os_path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(parser, {})
+    if args.save_baseline:
+        slower = set(results)
+    else:
+        slower = {name for name, _, _, _ in regressions(results, baseline, args.threshold)}
+    measurements = {name: [results[name]] for name in slower}
+    for _ in range(args.retries if slower else 0):
+        time.sleep(RETRY_PAUSE)
+        for name in slower:
+            measurements[name].append(benchmark(name, pages[name], args.parser, args.repeat))
+    results.update((name, median(measured)) for name, measured in measurements.items())
+    print_table(results)
+
+    if args.save_baseline:
+        baselines[parser] = {
+            name: {stage: round(result[stage], 1) for stage in STAGES}
+            for name, result in results.items()
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print('Baseline saved: ' + args.baseline)
+        return
+
+    slower = regressions(results, baseline, args.threshold)
+    for name, stage, current, base in slower:
+        print('REGRESSION {} {}: {:.1f} µs (baseline {:.1f} µs)'.format(name, stage, current, base))
+    if slower:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
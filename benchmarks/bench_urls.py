@@ -0,0 +1,103 @@
+'''URL helpers benchmark: the per-result cost of parsing the links.
+
+Every results item is checked (is_url), its host is taken (domain) and it's
+grouped by canonical URL (canonical_url). The memoized helpers of
+`search_engines.utils` parse a link once for the three; the reference parses
+it with yarl on every call, as the helpers used to. The links repeat, like
+the links of several engines and pages do.
+
+    $ python -m benchmarks.bench_urls -n 1000000 --unique 50000
+'''
+import argparse
+import json
+import random
+import time
+
+from search_engines import utils
+
+
+COLUMNS = [
+    ('helpers', '<10', ''), ('urls', '>9', ''), ('total_s', '>8', '.2f'),
+    ('ns_per_url', '>11', '.0f'), ('speedup', '>8', '.1f')
+]
+'''The table columns: name, alignment and width, number format.'''
+
+HOSTS = ['www.example.com', 'en.wikipedia.org', 'github.com', 'www.python.org', 'news.ycombinator.com']
+PATHS = ['', '/', '/wiki/Search_engine', '/search/results/', '/a/b/c.html', '/p%C3%A1gina']
+QUERIES = ['', '?q=my+query', '?id=42&utm_source=feed', '?b=2&a=1&gclid=xyz', '?page=3#top']
+
+
+def make_urls(count, unique, seed=0):
+    '''Returns count links, drawn from `unique` distinct links.'''
+    rnd = random.Random(seed)
+    pool = [
+        '{}://{}{}{}'.format(
+            rnd.choice(['http', 'https']), rnd.choice(HOSTS),
+            rnd.choice(PATHS) + ('/{}'.format(i) if i % 3 else ''), rnd.choice(QUERIES)
+        )
+        for i in range(unique)
+    ]
+    return [rnd.choice(pool) for _ in range(count)]
+
+
+def reference(urls):
+    '''The former helpers: yarl parses the link on every call.'''
+    from yarl import URL
+
+    for url in urls:
+        parsed = URL(url)
+        if parsed.scheme and parsed.host:
+            host = URL(url).host.lower().split(':')[0].replace('www.', '')
+            canonical = str(URL(url).with_fragment(None))
+    return host, canonical
+
+
+def memoized(urls):
+    '''The memoized helpers.'''
+    for url in urls:
+        if utils.is_url(url):
+            host = utils.domain(url)
+            canonical = utils.canonical_url(url)
+    return host, canonical
+
+
+def measure(func, urls):
+    '''Returns the wall time of func(urls).'''
+    start = time.perf_counter()
+    func(urls)
+    return time.perf_counter() - start
+
+
+def print_table(results):
+    '''Prints the measurements as a table.'''
+    print(' '.join('{:{}}'.format(name, width) for name, width, _ in COLUMNS))
+    for result in results:
+        print(' '.join('{:{}{}}'.format(result[name], width, fmt) for name, width, fmt in COLUMNS))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='links', type=int, default=1000000)
+    ap.add_argument('--unique', help='distinct links', type=int, default=50000)
+    ap.add_argument('--json', help='saves the measurements to a JSON file')
+    args = ap.parse_args()
+
+    urls = make_urls(args.n, args.unique)
+    utils.parse_url.cache_clear()
+    timings = [('yarl', measure(reference, urls)), ('memoized', measure(memoized, urls))]
+    results = [
+        dict(
+            helpers=name, urls=len(urls), total_s=seconds,
+            ns_per_url=seconds / len(urls) * 1e9, speedup=timings[0][1] / seconds
+        )
+        for name, seconds in timings
+    ]
+    print_table(results)
+    print(utils.parse_url.cache_info())
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+'''A local stand-in for the search engines, serving synthetic results pages.
+
+Every engine is served under its own path prefix (e.g. http://127.0.0.1:8080/bing),
+with the page layout, pagination and request flow of the real site: Google's
+noscript and search form pages, Startpage's POST forms, Qwant's JSON API,
+Metager's iframe redirect, etc. `point_engine()` sends an engine's requests here.
+
+    $ python -m benchmarks.mock_serp --port 8080 --pages 10 --latency 0.05
+'''
+import argparse
+import asyncio
+import json
+import re
+import socket
+import time
+from html import escape
+from urllib.parse import quote
+
+from multiprocessing import Process
+
+from aiohttp import web
+
+
+RESULTS_PER_PAGE = 10
+
+## Default number of results pages per query
+PAGES = 10
+
+## Default size of a results page, in bytes; real pages carry scripts, styles and navigation
+PAGE_SIZE = 150000
+
+
+def point_engine(engine, base_url):
+    '''Sends the requests of an engine to the mock server.
+
+    :param engine: AsyncSearchEngine The engine
+    :param str base_url: The server URL, e.g. 'http://127.0.0.1:8080'
+    '''
+    prefix = '{}/{}'.format(base_url.rstrip('/'), engine.__class__.__name__.lower())
+    engine._base_url = re.sub(r'^https?://[^/]+', prefix, engine._base_url)
+
+
+def create_app(pages=PAGES, latency=0.0, page_size=PAGE_SIZE):
+    '''Returns the mock server application.
+
+    :param int pages: optional, the number of results pages per query
+    :param float latency: optional, seconds to wait before each response
+    :param int page_size: optional, the approximate size of the HTML pages
+    '''
+    app = web.Application(middlewares=[_latency_middleware(latency)])
+    app['pages'] = pages
+    app['padding'] = _padding(page_size)
+    app.router.add_routes([
+        web.get('/google/search', google),
+        web.get('/bing/search', bing),
+        web.get('/yahoo/search', yahoo),
+        web.get('/aol', aol_home),
+        web.get('/aol/aol/search', aol),
+        web.get('/duckduckgo/html/', duckduckgo),
+        web.get('/startpage', startpage_home),
+        web.post('/startpage/sp/search', startpage),
+        web.get('/dogpile/serp', dogpile),
+        web.get('/ask/web', ask),
+        web.get('/mojeek/search', mojeek),
+        web.get('/qwant/v3/search/web', qwant),
+        web.get('/brave/search', brave),
+        web.get('/torch/search', torch),
+        web.get('/metager/meta/meta.ger3', metager_redirect),
+        web.get('/metager/meta/results', metager),
+    ])
+    return app
+
+
+def serve(host='127.0.0.1', port=8080, pages=PAGES, latency=0.0, page_size=PAGE_SIZE):
+    '''Runs the mock server until it's interrupted.'''
+    web.run_app(create_app(pages, latency, page_size), host=host, port=port, print=None)
+
+
+def start_server(pages=PAGES, latency=0.0, page_size=PAGE_SIZE):
+    '''Runs the mock server in a new process, on a free port.
+    Returns the process and the server URL; terminate the process to stop the server.'''
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = Process(target=serve, args=('127.0.0.1', port, pages, latency, page_size), daemon=True)
+    server.start()
+
+    deadline = time.time() + 10
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            break
+        except OSError:
+            if time.time() > deadline:
+                server.terminate()
+                raise RuntimeError('The mock server didn\'t start')
+            time.sleep(0.05)
+    return server, 'http://127.0.0.1:{}'.format(port)
+
+
+def _latency_middleware(latency):
+    '''Returns a middleware that delays every response, to simulate the network.'''
+    @web.middleware
+    async def middleware(request, handler):
+        if latency:
+            await asyncio.sleep(latency)
+        return await handler(request)
+    return middleware
+
+
+def _padding(size):
+    '''Returns the markup that surrounds the results: half scripts, half navigation tags.'''
+    script = ''.join(
+        'var m{0}=function(a,b){{return a.concat(b).slice({0});}};'.format(i)
+        for i in range(size // 2 // 55)
+    )
+    nav = [
+        '<div class="nav-item"><a href="/p/{0}">Link {0}</a><span>Label {0}</span></div>'.format(i)
+        for i in range(size // 2 // 75)
+    ]
+    half = len(nav) // 2
+    return (
+        '<script>{}</script>'.format(script),
+        '<header><nav>{}</nav></header>'.format(''.join(nav[:half])),
+        '<aside>{}</aside>'.format(''.join(nav[half:]))
+    )
+
+
+def _document(request, body, title='Search'):
+    '''Returns an HTML page with the body between the padding markup.'''
+    script, header, aside = request.app['padding']
+    html = (
+        '<!DOCTYPE html><html><head><title>{}</title>{}</head>'
+        '<body>{}<main>{}</main>{}</body></html>'
+    ).format(escape(title), script, header, body, aside)
+    return web.Response(text=html, content_type='text/html')
+
+
+def _results(query, page):
+    '''Returns the (url, title, text) of the results of a page.
+    The URLs are the same for every engine, so that merged results contain duplicates.'''
+    if page < 1:
+        return []
+    first = (page - 1) * RESULTS_PER_PAGE
+    return [
+        (
+            'https://site{}.example.com/{}/'.format(first + i, quote(query)),
+            '{} - result {}'.format(query, first + i),
+            'A description of result {} for {}. '.format(first + i, query) * 3
+        )
+        for i in range(RESULTS_PER_PAGE)
+    ]
+
+
+def _page(request, param, start=1, step=1):
+    '''Returns the page number from a query parameter, and whether a next page exists.'''
+    value = int(request.query.get(param, start))
+    page = (value - start) // step + 1
+    return page, page < request.app['pages']
+
+
+def _query(request, param='q'):
+    '''Returns the search query.'''
+    return request.query.get(param, '')
+
+
+def _origin(request):
+    '''Returns the server URL, for engines that expect absolute links.'''
+    return str(request.url.origin())
+
+
+async def google(request):
+    '''Google: a noscript page, a search form page, then the results pages.'''
+    q = _query(request)
+    if 'gbv' not in request.query:
+        body = '<noscript><a href="q={}&amp;gbv=1&amp;sei=mock">here</a></noscript>'.format(quote(q))
+        return _document(request, body)
+    if 'ie' not in request.query:
+        body = (
+            '<form action="/search"><input name="q" value="{}"><input name="ie" value="UTF-8">'
+            '<input name="gbv" value="1"><input name="btnI" value="1"></form>'
+        ).format(escape(q))
+        return _document(request, body)
+
+    page, has_next = _page(request, 'start', 0, RESULTS_PER_PAGE)
+    items = ''.join(
+        '<div><a href="/url?q={}&amp;sa=U"><h3>{}</h3><span>{}</span></a>'
+        '<div><span>example.com</span><span>1 Jan 2024</span><span>{}</span></div></div>'
+        .format(url, escape(title), url, escape(text))
+        for url, title, text in _results(q, page)
+    )
+    footer = ''
+    if has_next:
+        footer = '<a href="/search?q={}&amp;ie=UTF-8&amp;gbv=1&amp;start={}" aria-label="Next page">Next</a>'.format(
+            quote(q), page * RESULTS_PER_PAGE
+        )
+    return _document(request, '<div id="main">{}</div><footer>{}</footer>'.format(items, footer))
+
+
+async def bing(request):
+    q = _query(request)
+    page, has_next = _page(request, 'first', 1, RESULTS_PER_PAGE)
+    items = ''.join(
+        '<li class="b_algo"><h2><a href="{0}">{1}</a></h2><div class="b_caption">'
+        '<div class="b_attribution"><cite>{0}</cite></div><p>{2}</p></div></li>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    nav = ''
+    if has_next:
+        nav = '<nav role="navigation"><a class="sb_pagN" href="/search?q={}&amp;first={}">Next</a></nav>'.format(
+            quote(q), page * RESULTS_PER_PAGE + 1
+        )
+    return _document(request, '<div id="b_content"><ol id="b_results">{}</ol>{}</div>'.format(items, nav))
+
+
+async def yahoo(request):
+    return _yahoo_page(request, 'p', '/yahoo/search')
+
+
+async def aol_home(request):
+    response = _document(request, '<form action="/aol/search"><input name="q"></form>')
+    response.set_cookie('session', 'mock')
+    return response
+
+
+async def aol(request):
+    return _yahoo_page(request, 'q', '/aol/aol/search')
+
+
+def _yahoo_page(request, param, path):
+    '''Yahoo and Aol: redirect links, absolute next page links.'''
+    q = _query(request, param)
+    page, has_next = _page(request, 'b', 1, RESULTS_PER_PAGE)
+    items = ''.join(
+        '<li><div class="dd algo algo-sr"><div class="compTitle"><h3 class="title">'
+        '<a href="https://r.search.yahoo.com/_ylt=mock/RV=2/RE=1/RO=10/RU={}/RK=2/RS=mock-">'
+        '<span>example.com</span>{}</a></h3></div><div class="compText"><p>{}</p></div></div></li>'
+        .format(quote(url, safe=''), escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    pagination = ''
+    if has_next:
+        pagination = '<a class="next" href="{}{}?{}={}&amp;b={}">Next</a>'.format(
+            _origin(request), path, param, quote(q), page * RESULTS_PER_PAGE + 1
+        )
+    return _document(request, '<div id="web"><ol>{}</ol>{}</div>'.format(items, pagination))
+
+
+async def duckduckgo(request):
+    '''Duckduckgo: the next page is a POST form.'''
+    q = _query(request)
+    items = ''.join(
+        '<div class="result results_links web-result"><div class="links_main result__body">'
+        '<h2 class="result__title"><a class="result__a" href="{0}">{1}</a></h2>'
+        '<a class="result__snippet" href="{0}">{2}</a></div></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, 1)
+    )
+    form = (
+        '<form action="/html/" method="post"><input type="submit" class="btn" value="Next">'
+        '<input type="hidden" name="q" value="{}"><input type="hidden" name="s" value="10"></form>'
+    ).format(escape(q))
+    return _document(request, '<div id="links" class="results">{}{}</div>'.format(items, form))
+
+
+async def startpage_home(request):
+    body = (
+        '<form id="search" action="/sp/search" method="post"><input name="query" value="">'
+        '<input name="cat" value="web"><input name="t" value="device"><input name="sc" value="mock"></form>'
+    )
+    return _document(request, body)
+
+
+async def startpage(request):
+    '''Startpage: the search and the next pages are POST forms.'''
+    data = await request.post()
+    q = data.get('query', '')
+    page = int(data.get('page', 1))
+    items = ''.join(
+        '<div class="w-gl__result"><a class="w-gl__result-title" href="{0}"><h3>{1}</h3></a>'
+        '<a class="w-gl__result-url" href="{0}">{0}</a><p class="w-gl__description">{2}</p></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    form = (
+        '<form class="pagination__form" action="/sp/search" method="post">'
+        '<input type="hidden" name="query" value="{}"><input type="hidden" name="page" value="{}">'
+        '<input type="hidden" name="sc" value="mock"><button type="submit">{}</button></form>'
+    )
+    pagination = ''
+    if page > 1:
+        pagination += form.format(escape(q), page - 1, 'Previous')
+    if page < request.app['pages']:
+        pagination += form.format(escape(q), page + 1, 'Next')
+    return _document(request, '<section class="w-gl">{}</section>{}'.format(items, pagination))
+
+
+async def dogpile(request):
+    q = _query(request)
+    page, has_next = _page(request, 'page')
+    items = ''.join(
+        '<div class="web-bing__result"><a class="web-bing__title" href="{0}">{1}</a>'
+        '<span class="web-bing__url">{0}</span><span class="web-bing__description">{2}</span></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    pagination = ''
+    if has_next:
+        pagination = '<a class="pagination__num pagination__num--next" href="/serp?q={}&amp;page={}">Next</a>'.format(
+            quote(q), page + 1
+        )
+    return _document(request, '<div class="web-bing">{}</div>{}'.format(items, pagination))
+
+
+async def ask(request):
+    q = _query(request)
+    page, has_next = _page(request, 'page')
+    items = ''.join(
+        '<div class="PartialSearchResults-item"><div class="PartialSearchResults-item-title">'
+        '<a class="PartialSearchResults-item-title-link result-link" href="{0}">{1}</a></div>'
+        '<p class="PartialSearchResults-item-url">{0}</p><p class="PartialSearchResults-item-abstract">{2}</p></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    pagination = ''
+    if has_next:
+        pagination = '<ul class="PartialWebPagination"><li class="PartialWebPagination-next"><a href="/web?q={}&amp;page={}">Next</a></li></ul>'.format(
+            quote(q), page + 1
+        )
+    return _document(request, '<div class="PartialSearchResults-body">{}</div>{}'.format(items, pagination))
+
+
+async def mojeek(request):
+    q = _query(request)
+    page, has_next = _page(request, 's', 1, RESULTS_PER_PAGE)
+    items = ''.join(
+        '<li><a class="ob" href="{0}">{1}</a><p class="s">{2}</p></li>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    links = ''.join(
+        '<li><a href="/search?q={}&amp;s={}">{}</a></li>'.format(quote(q), (n - 1) * RESULTS_PER_PAGE + 1, n)
+        for n in range(1, request.app['pages'] + 1)
+    )
+    if has_next:
+        links += '<li><a href="/search?q={}&amp;s={}">Next</a></li>'.format(quote(q), page * RESULTS_PER_PAGE + 1)
+    return _document(request, '<ul class="results-standard">{}</ul><div class="pagination"><ul>{}</ul></div>'.format(items, links))
+
+
+async def qwant(request):
+    '''Qwant: a JSON API, with ads mixed in the results.'''
+    q = _query(request)
+    page, _ = _page(request, 'offset', 0, RESULTS_PER_PAGE)
+    if page > request.app['pages']:
+        return web.json_response({'status': 'error', 'data': {'error_code': 22}})
+    items = [
+        {'url': url, 'title': title, 'desc': text, 'source': 'mock', 'favicon': ''}
+        for url, title, text in _results(q, page)
+    ]
+    ads = [{'url': 'https://ads.example.com/', 'title': 'Ad', 'desc': 'Ad'}]
+    data = {
+        'status': 'success',
+        'data': {'result': {'items': {'mainline': [
+            {'type': 'ads', 'items': ads},
+            {'type': 'web', 'items': items}
+        ]}}}
+    }
+    return web.Response(text=json.dumps(data), content_type='application/json')
+
+
+async def brave(request):
+    q = _query(request)
+    page, has_next = _page(request, 'offset', 0)
+    items = ''.join(
+        '<div class="snippet" data-loc="main"><a class="result-header" href="{}">'
+        '<span class="snippet-title">{}</span></a><div class="snippet-content">'
+        '<p class="snippet-description">{}</p></div></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    if has_next:
+        pagination = '<a class="btn" href="/search?q={}&amp;offset={}">Next</a>'.format(quote(q), page)
+    else:
+        pagination = '<a class="btn disabled" href="#">Next</a>'
+    return _document(request, '<div id="results">{}</div><div id="pagination">{}</div>'.format(items, pagination))
+
+
+async def torch(request):
+    '''Torch: pages past the last one are empty.'''
+    q = _query(request, 'query')
+    page, _ = _page(request, 'page')
+    results = _results(q, page) if page <= request.app['pages'] else []
+    items = ''.join(
+        '<div class="result mb-3"><h5><a href="{}">{}</a></h5><p>{}</p></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in results
+    )
+    return _document(request, items)
+
+
+async def metager_redirect(request):
+    '''Metager: the requested page embeds the results page in an iframe.'''
+    src = '{}/metager/meta/results?{}'.format(_origin(request), request.query_string)
+    return _document(request, '<iframe src="{}"></iframe>'.format(escape(src)))
+
+
+async def metager(request):
+    q = _query(request, 'eingabe')
+    page, has_next = _page(request, 'page')
+    items = ''.join(
+        '<div class="result"><h2 class="result-title"><a href="{0}">{1}</a></h2>'
+        '<a class="result-link" href="{0}">{0}</a><div class="result-description">{2}</div></div>'
+        .format(url, escape(title), escape(text))
+        for url, title, text in _results(q, page)
+    )
+    link = ''
+    if has_next:
+        link = '<div id="next-search-link"><a href="{}/metager/meta/meta.ger3?eingabe={}&amp;page={}">Next</a></div>'.format(
+            _origin(request), quote(q), page + 1
+        )
+    return _document(request, '<div id="results">{}</div>{}'.format(items, link))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8080)
+    ap.add_argument('--pages', type=int, default=PAGES, help='results pages per query')
+    ap.add_argument('--latency', type=float, default=0.0, help='seconds before each response')
+    ap.add_argument('--page-size', type=int, default=PAGE_SIZE, help='approximate HTML page size')
+    args = ap.parse_args()
+    print('Serving on http://{}:{}'.format(args.host, args.port))
+    serve(args.host, args.port, args.pages, args.latency, args.page_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from .engines import *
+from .engines import search_engines_dict
 
 
 __title__ = 'search_engines'
@@ -18,3 +18,12 @@ __all__ = [
     'Qwant',
     'Torch'
 ]
+
+
+def __getattr__(name):
+    '''Imports the engine classes on first use.'''
+    from . import engines
+    try:
+        return getattr(engines, name)
+    except AttributeError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name)) from None
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from . import config as cfg
+
+
+class ResultsCache:
+    '''Caches the search results of each engine, so that repeated queries
+    don't hit the search engines again.
+    Entries are kept in an in-memory LRU tier and, if a path is given,
+    in an SQLite file that persists across runs.'''
+    def __init__(
+        self, path=None, ttl=cfg.CACHE_TTL, engine_ttl=None,
+        max_items=cfg.CACHE_MAX_ITEMS, max_disk_items=cfg.CACHE_MAX_DISK_ITEMS
+    ):
+        '''
+        :param str path: optional, the SQLite file (default: memory only)
+        :param int ttl: optional, seconds before an entry expires
+        :param dict engine_ttl: optional, per engine TTLs, e.g. {'google': 600}
+        :param int max_items: optional, the entries kept in memory
+        :param int max_disk_items: optional, the entries kept in the SQLite file
+        '''
+        self._ttl = ttl
+        self._engine_ttl = {k.lower(): v for k, v in (engine_ttl or {}).items()}
+        self._max_items = max_items
+        self._max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, expires REAL, accessed REAL, data TEXT)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._db.commit()
+        self._stats = dict(
+            memory_hits=0, disk_hits=0, misses=0, expired=0, evictions=0
+        )
+
+    @staticmethod
+    def key(engine, query, pages, options=()):
+        '''Returns the cache key of a search.
+
+        :param str engine: The engine name
+        :param str query: The search query, normalized to lower case and single spaces
+        :param int pages: The number of pages
+        :param tuple options: optional, the filters and flags that affect the results
+        '''
+        query = u' '.join(query.lower().split())
+        return json.dumps([engine.lower(), query, pages, sorted(set(options))])
+
+    def get(self, engine, query, pages, options=()):
+        '''Returns the cached rows of a search, or None.'''
+        key = self.key(engine, query, pages, options)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+                self._stats['expired'] += 1
+                return self._miss()
+
+            if self._db is None:
+                return self._miss()
+            row = self._db.execute(
+                'SELECT expires, data FROM results WHERE key = ?', (key,)
+            ).fetchone()
+            if not row:
+                return self._miss()
+            if row[0] <= now:
+                self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+                self._db.commit()
+                self._stats['expired'] += 1
+                return self._miss()
+            self._db.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+            self._db.commit()
+            rows = json.loads(row[1])
+            self._remember(key, row[0], rows)
+            self._stats['disk_hits'] += 1
+            return rows
+
+    def set(self, engine, query, pages, rows, options=()):
+        '''Caches the rows of a search.
+
+        :param list rows: The (page, item dict) pairs of the results
+        '''
+        key = self.key(engine, query, pages, options)
+        now = time.time()
+        ttl = self._engine_ttl.get(engine.lower(), self._ttl)
+        if ttl <= 0:
+            return
+        expires = now + ttl
+        with self._lock:
+            self._remember(key, expires, rows)
+            if self._db is None:
+                return
+            self._db.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                (key, expires, now, json.dumps(rows))
+            )
+            self._db.execute('DELETE FROM results WHERE expires <= ?', (now,))
+            excess = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self._max_disk_items
+            if excess > 0:
+                self._db.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY accessed LIMIT ?)', (excess,)
+                )
+                self._stats['evictions'] += excess
+            self._db.commit()
+
+    async def get_async(self, engine, query, pages, options=()):
+        '''Same as get(), in an executor if the cache uses an SQLite file.'''
+        if self._db is None:
+            return self.get(engine, query, pages, options)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, engine, query, pages, options)
+
+    async def set_async(self, engine, query, pages, rows, options=()):
+        '''Same as set(), in an executor if the cache uses an SQLite file.'''
+        if self._db is None:
+            return self.set(engine, query, pages, rows, options)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.set, engine, query, pages, rows, options)
+
+    def stats(self):
+        '''Returns the hit, miss and eviction counters and the number of entries.'''
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+            stats['memory_items'] = len(self._memory)
+            if self._db is not None:
+                stats['disk_items'] = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return stats
+
+    def clear(self):
+        '''Removes all the entries.'''
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM results')
+                self._db.commit()
+
+    def close(self):
+        '''Closes the SQLite file.'''
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, key, expires, rows):
+        '''Adds an entry to the memory tier, evicting the least recently used.'''
+        self._memory[key] = (expires, rows)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_items:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _miss(self):
+        '''Counts a miss.'''
+        self._stats['misses'] += 1
+        return None
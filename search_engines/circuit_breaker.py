@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+from os import path as os_path
+
+from . import config as cfg
+
+
+CLOSED = 'closed'
+'''The engine is searched normally.'''
+OPEN = 'open'
+'''The engine is skipped until the cooldown ends.'''
+HALF_OPEN = 'half_open'
+'''The cooldown ended; one probe search decides whether the breaker closes.'''
+
+
+class CircuitBreaker:
+    '''Stops the searches of an engine after a ban or repeated failures.
+    The engine is skipped during a cooldown, then a single probe search is let
+    through: if its first page succeeds the breaker closes, otherwise it opens
+    again with twice the cooldown.'''
+    def __init__(
+        self, failures=cfg.BREAKER_FAILURES, cooldown=cfg.BREAKER_COOLDOWN,
+        max_cooldown=cfg.BREAKER_MAX_COOLDOWN
+    ):
+        '''
+        :param int failures: optional, the consecutive failed requests that open the breaker
+        :param float cooldown: optional, the seconds the engine is skipped after it opens
+        :param float max_cooldown: optional, the longest cooldown after repeated failed probes
+        '''
+        self.max_failures = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_until = 0.0
+        self._probe_started = 0.0
+
+    def allow(self):
+        '''Checks if the engine can be searched. After the cooldown, allows
+        a single probe; another one is allowed if it didn't finish in time.'''
+        now = time.time()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now < self.opened_until:
+                return False
+            self.state = HALF_OPEN
+        elif now - self._probe_started < cfg.TIMEOUT:
+            return False
+        self._probe_started = now
+        return True
+
+    def success(self):
+        '''Closes the breaker after a successful request. Returns True if the state changed.'''
+        if self.state == OPEN:
+            return False
+        changed = self.state != CLOSED or self.failures > 0
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        return changed
+
+    def failure(self, banned=False):
+        '''Counts a failed request, and opens the breaker after a ban, too many
+        failures or a failed probe. Returns True if the state changed.'''
+        self.failures += 1
+        if self.state == OPEN:
+            return False
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        elif not banned and self.failures < self.max_failures:
+            return False
+        self.state = OPEN
+        self.opened_until = time.time() + self.cooldown
+        return True
+
+    def to_dict(self):
+        return dict(
+            state=self.state, failures=self.failures,
+            cooldown=self.cooldown, opened_until=self.opened_until
+        )
+
+    def load(self, data):
+        '''Restores a saved state. A probe that was running is let through again.'''
+        self.state = OPEN if data['state'] == HALF_OPEN else data['state']
+        self.failures = data['failures']
+        self.cooldown = data['cooldown']
+        self.opened_until = data['opened_until']
+
+
+class CircuitBreakers:
+    '''Keeps a circuit breaker per search engine and proxy, shared by all the
+    engine instances. With a file, the breakers' state survives restarts.'''
+    def __init__(
+        self, path=None, failures=cfg.BREAKER_FAILURES, cooldown=cfg.BREAKER_COOLDOWN,
+        max_cooldown=cfg.BREAKER_MAX_COOLDOWN
+    ):
+        '''
+        :param str path: optional, the JSON file of the breakers' state (default: in memory only)
+        :param int failures: optional, the consecutive failed requests that open a breaker
+        :param float cooldown: optional, the seconds an engine is skipped after a breaker opens
+        :param float max_cooldown: optional, the longest cooldown after repeated failed probes
+        '''
+        self._path = path
+        self._settings = (failures, cooldown, max_cooldown)
+        self._breakers = {}
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def breaker(self, engine, proxy=None):
+        '''Returns the breaker of an engine and proxy, creating it if necessary.'''
+        key = (engine.lower(), proxy)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(*self._settings)
+        return self._breakers[key]
+
+    def allow(self, engine, proxy=None):
+        '''Checks if an engine can be searched through a proxy.'''
+        breaker = self.breaker(engine, proxy)
+        state = breaker.state
+        allowed = breaker.allow()
+        if breaker.state != state:
+            self._save()
+        return allowed
+
+    def update(self, engine, proxy, ok, banned=False):
+        '''Records the outcome of a request.
+
+        :param str engine: The engine name
+        :param str proxy: The proxy server
+        :param bool ok: Indicates if the request succeeded
+        :param bool banned: Indicates if the engine refused the request
+        '''
+        breaker = self.breaker(engine, proxy)
+        changed = breaker.success() if ok else breaker.failure(banned)
+        if changed:
+            self._save()
+
+    def _load(self):
+        '''Loads the saved breakers. A missing or corrupt file is ignored.'''
+        try:
+            with open(self._path, encoding='utf-8') as f:
+                rows = json.load(f)
+            for row in rows:
+                self.breaker(row['engine'], row['proxy']).load(row)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _save(self):
+        '''Writes the breakers to the file, atomically.'''
+        if not self._path:
+            return
+        with self._lock:
+            rows = [
+                dict(breaker.to_dict(), engine=engine, proxy=proxy)
+                for (engine, proxy), breaker in self._breakers.items()
+            ]
+            directory = os_path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = '{}.{}.tmp'.format(self._path, os.getpid())
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, indent=1)
+            os.replace(tmp, self._path)
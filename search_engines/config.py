@@ -8,15 +8,99 @@ PYTHON_VERSION = version_info.major
 ## Maximum number or pages to search
 SEARCH_ENGINE_RESULTS_PAGES = 20
 
+## Maximum number of queries searched at once by search_many() 
+BATCH_CONCURRENCY = 10
+
 ## HTTP request timeout 
 TIMEOUT = 10
 
+## Maximum number of simultaneous connections in the shared connection pool
+POOL_LIMIT = 100
+
+## Maximum number of simultaneous connections per host
+POOL_LIMIT_PER_HOST = 8
+
+## Seconds to keep idle connections alive for reuse
+KEEPALIVE_TIMEOUT = 30
+
+## Seconds to cache DNS lookups
+DNS_CACHE_TTL = 300
+
 ## Default User-Agent string 
 USER_AGENT = 'search_engines/0.5 Repo: https://github.com/tasos-py/Search-Engines-Scraper'
 
 ## Fake User-Agent string - Google desn't like the default user-agent
 FAKE_USER_AGENT = 'Mozilla/5.0 (Windows NT 6.1; rv:84.0) Gecko/20100101 Firefox/84.0'
 
+## HTML parser backend: 'lxml', 'lexbor' (selectolax) or 'html.parser'. 
+## Falls back to 'html.parser' if the library isn't installed. 
+PARSER = 'lxml'
+
+## Requests per second to each search engine, through each proxy 
+RATE_LIMIT = 0.5
+
+## Requests that can be sent at once, before the rate limit applies 
+RATE_BURST = 1
+
+## Maximum random delay added to each request, in seconds 
+RATE_JITTER = 1.0
+
+## Lowest rate, after repeated 429/503 responses 
+RATE_LIMIT_MIN = 0.02
+
+## Results pages fetched at once by engines with computable page URLs (Qwant, Torch); 
+## the pages fetched past the last one are discarded: up to SPECULATIVE_PAGES - 1 requests per search. 
+## 1 disables the prefetching 
+SPECULATIVE_PAGES = 3
+
+## Seconds to keep cached search results (0 disables the cache)
+CACHE_TTL = 3600
+
+## Maximum number of searches kept in the in-memory cache
+CACHE_MAX_ITEMS = 256
+
+## Maximum number of searches kept in the cache file
+CACHE_MAX_DISK_ITEMS = 10000
+
+## Hedged requests: the response time percentile after which a duplicate request is sent 
+HEDGE_PERCENTILE = 95
+
+## Hedged requests: the recent response times kept per engine 
+HEDGE_WINDOW = 50
+
+## Hedged requests: the response times needed before duplicates are sent 
+HEDGE_MIN_SAMPLES = 10
+
+## Circuit breaker: consecutive failed requests after which an engine is skipped 
+BREAKER_FAILURES = 3
+
+## Circuit breaker: seconds an engine is skipped after a ban, doubled after each failed probe 
+BREAKER_COOLDOWN = 300
+
+## Circuit breaker: longest cooldown, in seconds 
+BREAKER_MAX_COOLDOWN = 6 * 3600
+
+## Proxy pool: the weight of the latest request in a proxy's health averages 
+PROXY_HEALTH_DECAY = 0.3
+
+## Proxy pool: the assumed latency of untried proxies, in seconds 
+PROXY_DEFAULT_LATENCY = 1.0
+
+## Proxy pool: how much errors and bans raise a proxy's cost 
+PROXY_ERROR_PENALTY = 20.0
+
+## Proxy pool: seconds a proxy is avoided after an engine refused it 
+PROXY_BAN_COOLDOWN = 600
+
+## Rank fusion: the RRF constant k, each engine adds 1 / (k + rank) to a page's score 
+RRF_K = 60
+
+## Rank fusion: the number of pages returned by ranked_results() 
+FUSION_TOP_K = 100
+
+## Number of parsed URLs kept in memory 
+URL_CACHE_SIZE = 65536
+
 ## Proxy server 
 PROXY = None
 
@@ -28,3 +112,11 @@ _base_dir = os_path.abspath(os_path.dirname(os_path.abspath(__file__)))
 ## Path to output files 
 OUTPUT_DIR = os_path.join(_base_dir, 'search_results') + os_path.sep
 
+## Path to the search results cache file 
+CACHE_FILE = os_path.join(_base_dir, 'search_results', 'cache.sqlite')
+
+## Path to the recorded HTTP responses 
+RECORDINGS_DIR = os_path.join(_base_dir, 'search_results', 'recordings')
+
+## Path to the circuit breakers' state 
+BREAKER_FILE = os_path.join(_base_dir, 'search_results', 'circuit_breakers.json')
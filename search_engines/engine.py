@@ -1,10 +1,12 @@
 import asyncio
-from bs4 import BeautifulSoup
-from random import uniform as random_uniform
+import time
 from collections import namedtuple
+from contextlib import nullcontext
 
-from .results import SearchResults
+from .results import SearchResults, SearchResult, SearchHit
 from .http_client import AsyncHttpClient
+from .parsers import get_parser, compile_selectors
+from .rate_limiter import rate_limiter as default_rate_limiter
 from . import utils
 from . import output as out
 from . import config as cfg
@@ -12,13 +14,47 @@ from . import config as cfg
 
 class AsyncSearchEngine:
     '''The base class for all Asynchronous Search Engines.'''
-    def __init__(self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
+    _unpicklable = ('_http_client', '_executor', '_cache', '_rate_limiter', '_hedging', '_breakers', '_proxy_pool', '_metrics', 'results')
+    '''Attributes that aren't copied when the engine is sent to a parser process.'''
+    _settings = (
+        '_base_url', '_parser', '_executor', '_cache', '_rate_limiter', '_rate_limit', '_speculative_pages',
+        '_hedging', '_breakers', '_proxy_pool', '_metrics', '_filters', 
+        'ignore_duplicate_urls', 'ignore_duplicate_domains'
+    )
+    '''Attributes that copy() passes to the new instance.'''
+    _pagination = ()
+    '''Attributes that _next_page() changes (e.g. a page counter); a parser process
+    returns only these to the engine.'''
+    _SELECTORS = {}
+    '''The CSS selectors of the page elements, compiled once per class.'''
+    _REGIONS = None
+    '''The regions of the page that contain the results and the pagination (simple 
+    selectors, e.g. 'div#main'). Only these are parsed; None parses the whole page.'''
+
+    _compiled_selectors = None
+
+    def __init_subclass__(cls, **kwargs):
+        super(AsyncSearchEngine, cls).__init_subclass__(**kwargs)
+        cls._compiled_selectors = None
+
+    def __init__(self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT, pool=None):
         '''
         :param str proxy: optional, a proxy server  
         :param int timeout: optional, the HTTP timeout
+        :param AsyncConnectionPool pool: optional, a connection pool shared with other engines
         '''
-        self._http_client = AsyncHttpClient(timeout, proxy) 
-        self._delay = (1, 4)
+        self._http_client = AsyncHttpClient(timeout, proxy, pool)
+        self._parser = get_parser(cfg.PARSER)
+        self._executor = None
+        self._cache = None
+        self._rate_limit = cfg.RATE_LIMIT
+        self._rate_limiter = default_rate_limiter
+        self._speculative_pages = cfg.SPECULATIVE_PAGES
+        self._hedging = None
+        self._breakers = None
+        self._proxy_pool = None
+        self._search_proxy = None
+        self._metrics = None
         self._query = ''
         self._filters = []
 
@@ -30,16 +66,22 @@ class AsyncSearchEngine:
         '''Collects only unique domains.'''
         self.is_banned = False
         '''Indicates if a ban occurred'''
+        self.pages_searched = 0
+        '''The number of results pages parsed by the last search.'''
 
     def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        raise NotImplementedError()
+        '''Returns the appropriate CSS selector. The selectors are compiled
+        once per class, on first use.'''
+        selectors = self._compiled_selectors
+        if selectors is None:
+            selectors = self.__class__._compiled_selectors = compile_selectors(self._SELECTORS)
+        return selectors[element]
     
-    def _first_page(self):
+    async def _first_page(self):
         '''Returns the initial page URL.'''
         raise NotImplementedError()
     
-    def _next_page(self, tags):
+    async def _next_page(self, tags):
         '''Returns the next page URL and post data.'''
         raise NotImplementedError()
     
@@ -47,7 +89,7 @@ class AsyncSearchEngine:
         '''Returns the URL of search results items.'''
         selector = self._selectors('url')
         url = self._get_tag_item(tag.select_one(selector), item)
-        return utils.unquote_url(url)
+        return utils.normalize_url(url)
     
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
@@ -72,21 +114,26 @@ class AsyncSearchEngine:
         return tag.text if item == 'text' else tag.get(item, u'')
 
     def _item(self, link):
-        '''Returns a dictionary of the link data.'''
-        return {
-            'host': utils.domain(self._get_url(link)), 
-            'link': self._get_url(link), 
-            'title': self._get_title(link).strip(), 
-            'text': self._get_text(link).strip()
-        } 
+        '''Returns a SearchResult with the link data.'''
+        url = self._get_url(link)
+        return SearchResult(
+            host=utils.domain(url), 
+            link=url, 
+            title=self._get_title(link).strip(), 
+            text=self._get_text(link).strip()
+        )
 
     def _query_in(self, item):
         '''Checks if query is contained in the item.'''
         return self._query.lower() in item.lower()
     
+    def _links(self, tags):
+        '''Returns the tags of search results items.'''
+        return tags.select(self._selectors('links'))
+    
     def _filter_results(self, soup):
         '''Processes and filters the search results.''' 
-        tags = soup.select(self._selectors('links'))
+        tags = self._links(soup)
         results = [self._item(l) for l in tags]
 
         if u'url' in self._filters:
@@ -99,18 +146,33 @@ class AsyncSearchEngine:
             results = [l for l in results if self._query_in(utils.domain(l['link']))]
         return results
     
+    async def _parse_page(self, html):
+        '''Parses a page, in the parser executor if one is set.
+        Returns the filtered items and the next page request.'''
+        if self._executor:
+            with self._timer('parse'):
+                return await self._executor.parse(self, html)
+        with self._timer('parse'):
+            tags = self._parser.parse(html, self._REGIONS)
+        with self._timer('filter'):
+            items = self._filter_results(tags)
+        return items, await self._next_page(tags)
+    
     def _collect_results(self, items):
-        '''Collects the search results items.''' 
+        '''Collects the search results items. Returns the items that were added.''' 
+        collected = []
         for item in items:
             if not utils.is_url(item['link']):
                 continue
             if item in self.results:
                 continue
-            if self.ignore_duplicate_urls and item['link'] in self.results.links():
+            if self.ignore_duplicate_urls and self.results.has_link(item['link']):
                 continue
-            if self.ignore_duplicate_domains and item['host'] in self.results.hosts():
+            if self.ignore_duplicate_domains and self.results.has_host(item['host']):
                 continue
             self.results.append(item)
+            collected.append(item)
+        return collected
 
     def _is_ok(self, response):
         '''Checks if the HTTP response is 200 OK.'''
@@ -131,7 +193,81 @@ class AsyncSearchEngine:
         
         :param headers: dict The headers 
         '''
-#        self._http_client.session.headers.update(headers)
+        self._http_client.headers.update(headers)
+    
+    def set_parser(self, parser):
+        '''Sets the HTML parser backend. 
+        Supported backends: 'lxml', 'lexbor', 'html.parser'
+
+        :param parser: str The parser name
+        '''
+        self._parser = get_parser(parser)
+    
+    def set_executor(self, executor):
+        '''Parses the pages in a process pool, off the event loop.
+
+        :param executor: ParseExecutor The executor, or None to parse in the event loop
+        '''
+        self._executor = executor
+    
+    def set_recorder(self, recorder):
+        '''Records the HTTP responses, or replays recorded responses offline.
+
+        :param recorder: ResponseRecorder The recorder, or None to use the network only
+        '''
+        self._http_client.recorder = recorder
+    
+    def set_rate_limiter(self, rate_limiter):
+        '''Paces the requests with a rate limiter. By default, all engines share one.
+
+        :param rate_limiter: RateLimiter The rate limiter, or None to disable pacing
+        '''
+        self._rate_limiter = rate_limiter
+    
+    def set_cache(self, cache):
+        '''Reuses the results of recent searches with the same query, pages and filters.
+
+        :param cache: ResultsCache The cache, or None to always query the engine
+        '''
+        self._cache = cache
+    
+    def set_hedging(self, hedging):
+        '''Sends a duplicate of the page requests that are slower than usual.
+
+        :param hedging: HedgePolicy The policy, or None to send each request once
+        '''
+        self._hedging = hedging
+    
+    def set_circuit_breakers(self, breakers):
+        '''Skips the engine for a while after a ban or repeated failures. 
+        By default, there are no breakers; engines that share breakers share their state.
+
+        :param breakers: CircuitBreakers The breakers, or None to always search the engine
+        '''
+        self._breakers = breakers
+    
+    def set_proxy_pool(self, proxy_pool):
+        '''Spreads the requests over the proxies of a pool, instead of the engine's proxy.
+
+        :param proxy_pool: ProxyPool The proxies, or None to use the engine's proxy
+        '''
+        self._proxy_pool = proxy_pool
+    
+    def set_metrics(self, metrics):
+        '''Collects the timings and counters of the searches: HTTP phases, 
+        pacing, parsing, filtering and collecting, pages, items, statuses and bans.
+
+        :param metrics: Metrics The metrics, or None to skip the measurements
+        '''
+        if metrics is self._metrics:
+            return
+        if self._metrics:
+            self._http_client.untrace(self._metrics.trace_config)
+            self._http_client.trace_request_ctx = None
+        self._metrics = metrics
+        if metrics:
+            self._http_client.trace(metrics.trace_config)
+            self._http_client.trace_request_ctx = {'engine': self.__class__.__name__}
     
     def set_search_operator(self, operator):
         '''Filters search results based on the operator. 
@@ -149,43 +285,253 @@ class AsyncSearchEngine:
             else:
                 self._filters += [operator]
     
-    async def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+    def copy(self):
+        '''Returns a new instance with the same settings and connection pool, 
+        and its own search state, so that several queries can be searched at once.'''
+        engine = self.__class__(self._http_client.proxy, self._http_client.timeout.total)
+        engine._http_client = self._http_client.copy()
+        for name in self._settings:
+            value = getattr(self, name)
+            setattr(engine, name, list(value) if isinstance(value, list) else value)
+        return engine
+    
+    async def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, max_results=None): 
         '''Queries the search engine, goes through the pages and collects the results.
         
         :param query: str The search query  
         :param pages: int Optional, the maximum number of results pages to search  
+        :param max_results: int Optional, stops after the page that brings 
+        the unique links to this number  
         :returns SearchResults object
         '''
+        async for _ in self.search_iter(query, pages, max_results):
+            pass
+        return self.results
+    
+    async def search_iter(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, max_results=None): 
+        '''Queries the search engine and yields the new results of each page 
+        as soon as it's parsed. Closing the generator (`aclose()`) stops the search.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :param max_results: int Optional, stops after the page that brings 
+        the unique links to this number; cached results are returned whole
+        :yields SearchHit (engine, page, item) namedtuples
+        '''
+        hits = await self._cached_hits(query, pages)
+        if hits is not None:
+            for hit in hits:
+                yield hit
+            return
+        async for hit in self._search_pages(query, pages, max_results):
+            yield hit
+    
+    async def _search_pages(self, query, pages, max_results=None):
+        '''Queries the search engine, bypassing the cache lookup. 
+        The results are cached if all the pages were searched without errors, 
+        and the search didn't stop at max_results.'''
         out.console('Searching {}'.format(self.__class__.__name__))
         self._query = utils.decode_bytes(query)
         self.results = SearchResults()
-        request = self._first_page()
+        self.pages_searched = 0
+        engine_name = self.__class__.__name__
+        if self._breakers and not self._breakers.allow(engine_name, self._http_client.proxy):
+            msg = '{} skipped, after a ban or repeated failures'.format(engine_name)
+            out.console(msg, level=out.Level.warning)
+            return
+        self._search_proxy = None
+        with self._http_client.use_proxy(self._proxy()):
+            request = await self._first_page()
+        rows = [] if self._cache else None
+        complete = False
+        prefetched = {}
 
-        for page in range(1, pages + 1):
-            try:
-                response = await self._get_page(request['url'], request['data'])
-                if not self._is_ok(response):
-                    break
-                tags = BeautifulSoup(response.html, "html.parser")
-                items = self._filter_results(tags)
-                self._collect_results(items)
-                
-                msg = 'page: {:<8} links: {}'.format(page, len(self.results))
-                out.console(msg, end='')
-                request = self._next_page(tags)
-
-                if not request['url']:
+        try:
+            for page in range(1, pages + 1):
+                try:
+                    response = await self._fetch_page(page, pages, request, prefetched)
+                    ok = self._is_ok(response)
+                    self._update_breaker(ok)
+                    if self._metrics and self.is_banned:
+                        self._metrics.count(engine_name, 'bans')
+                    if not ok:
+                        break
+                    items, request = await self._parse_page(response.html)
+                    with self._timer('collect'):
+                        items = self._collect_results(items)
+                    self.pages_searched = page
+                    if self._metrics:
+                        self._metrics.count(engine_name, 'pages')
+                        self._metrics.count(engine_name, 'items', len(items))
+
+                    msg = 'page: {:<8} links: {}'.format(page, len(self.results))
+                    out.console(msg, end='')
+                    if rows is not None:
+                        rows.extend((page, dict(item.items())) for item in items)
+                    for item in items:
+                        yield SearchHit(engine_name, page, item)
+
+                    if not request['url'] or page == pages:
+                        complete = True
+                        break
+                    if max_results and self.results.unique_links() >= max_results:
+                        break
+                except asyncio.CancelledError:
                     break
-                if page < pages:
-                    await asyncio.sleep(random_uniform(*self._delay))
-            except asyncio.CancelledError:
-                break
+        finally:
+            for task in prefetched.values():
+                task.cancel()
+            await asyncio.gather(*prefetched.values(), return_exceptions=True)
         out.console('', end='')
-        return self.results
+        if complete and self._cache:
+            await self._cache.set_async(
+                engine_name, self._query, pages, rows, self._cache_options()
+            )
+    
+    def _page_request(self, page):
+        '''Returns the URL and post data of a results page, for engines whose 
+        page URLs can be computed up front. Their pages are fetched in advance, 
+        concurrently. Returns None if the URL depends on the previous page.'''
+        return None
+    
+    async def _fetch_page(self, page, pages, request, prefetched):
+        '''Fetches a results page. If the engine's page URLs are computable, 
+        the next pages are fetched in advance, within the rate limit; 
+        the search cancels them when it reaches the last page.
+
+        :param page: int The page number
+        :param pages: int The number of pages to search
+        :param request: dict The page URL and post data, from the previous page
+        :param prefetched: dict The tasks of the pages fetched in advance
+        '''
+        for number in range(page, min(page + self._speculative_pages, pages + 1)):
+            if number in prefetched:
+                continue
+            speculative_request = self._page_request(number)
+            if not speculative_request:
+                break
+            prefetched[number] = asyncio.ensure_future(self._request_page(speculative_request))
+        
+        if page in prefetched:
+            return await prefetched.pop(page)
+        return await self._request_page(request)
+    
+    async def _request_page(self, request):
+        '''Fetches a page within the rate limit of its proxy. With hedging, 
+        a duplicate request is sent if the page is slower than usual.'''
+        proxy = self._proxy()
+        await self._throttle(proxy)
+        start = time.monotonic()
+        with self._http_client.use_proxy(proxy), self._timer('request'):
+            if self._hedging:
+                response = await self._hedging.request(
+                    self.__class__.__name__,
+                    lambda: self._get_page(request['url'], request['data']),
+                    lambda: self._throttle(proxy)
+                )
+            else:
+                response = await self._get_page(request['url'], request['data'])
+        self._adapt_rate(response, proxy)
+        if self._metrics:
+            self._metrics.status(self.__class__.__name__, response.http)
+        if self._proxy_pool:
+            self._proxy_pool.update(
+                proxy, self.__class__.__name__, time.monotonic() - start, response.http
+            )
+        return response
+    
+    def _proxy(self):
+        '''Returns the proxy of the next request: the engine's proxy, or one of 
+        the proxy pool, picked per request or once per search.'''
+        if not self._proxy_pool:
+            return self._http_client.proxy
+        if self._proxy_pool.per_request or not self._search_proxy:
+            self._search_proxy = self._proxy_pool.choose(self.__class__.__name__)
+        return self._search_proxy
+    
+    async def _throttle(self, proxy=None):
+        '''Waits until the rate limit allows a request to the engine, through the proxy.'''
+        if self._rate_limiter:
+            with self._timer('throttle'):
+                await self._rate_limiter.acquire(
+                    self.__class__.__name__, proxy or self._http_client.proxy, self._rate_limit
+                )
+    
+    def _adapt_rate(self, response, proxy=None):
+        '''Slows down the requests to the engine after a 429 or 503 response.'''
+        if self._rate_limiter:
+            self._rate_limiter.update(
+                self.__class__.__name__, proxy or self._http_client.proxy, response.http
+            )
+    
+    def _update_breaker(self, ok):
+        '''Records the outcome of a page request in the engine's circuit breaker. 
+        With a proxy pool, the pool avoids the banned proxies, and the breaker 
+        opens only after repeated failures.'''
+        if self._breakers:
+            self._breakers.update(
+                self.__class__.__name__, self._http_client.proxy, ok, 
+                self.is_banned and not self._proxy_pool
+            )
+    
+    def _timer(self, phase):
+        '''Times a phase of the search, if metrics are collected.'''
+        if self._metrics:
+            return self._metrics.timer(self.__class__.__name__, phase)
+        return nullcontext()
+    
+    async def _cached_hits(self, query, pages):
+        '''Loads the results of a cached search. 
+        Returns the SearchHit items, or None if the search isn't cached.'''
+        if not self._cache:
+            return None
+        engine_name = self.__class__.__name__
+        query = utils.decode_bytes(query)
+        rows = await self._cache.get_async(
+            engine_name, query, pages, self._cache_options()
+        )
+        if rows is None:
+            return None
+        
+        out.console('Searching {} (cached)'.format(engine_name))
+        self._query = query
+        self.results = SearchResults()
+        self.pages_searched = max([page for page, _ in rows] or [0])
+        hits = []
+        for page, item in rows:
+            item = SearchResult.from_dict(item)
+            self.results.append(item)
+            hits.append(SearchHit(engine_name, page, item))
+        return hits
+    
+    def _cache_options(self):
+        '''Returns the settings that change the results of a search.'''
+        options = list(self._filters)
+        if self.ignore_duplicate_urls:
+            options.append(u'unique_urls')
+        if self.ignore_duplicate_domains:
+            options.append(u'unique_domains')
+        return options
+    
+    async def close(self):
+        '''Closes the HTTP client. A shared connection pool is left open.'''
+        await self._http_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._unpicklable:
+            state.pop(name, None)
+        return state
     
     def output(self, output=out.PRINT, path=None):
         '''Prints search results and/or creates report files.
-        Supported output format: html, csv, json.
+        Supported output format: html, csv, json, ndjson.
         
         :param output: str Optional, the output format  
         :param path: str Optional, the file to save the report  
@@ -197,9 +543,9 @@ class AsyncSearchEngine:
 
         if out.PRINT in output:
             out.print_results([self])
-        if out.HTML in output:
-            out.write_file(out.create_html_data([self]), path + u'.html') 
-        if out.CSV in output:
-            out.write_file(out.create_csv_data([self]), path + u'.csv') 
-        if out.JSON in output:
-            out.write_file(out.create_json_data([self]), path + u'.json')
+        out.export([self], output, path)
+    
+    async def output_async(self, output=out.PRINT, path=None):
+        '''Same as output(), without blocking the event loop.'''
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.output, output, path)
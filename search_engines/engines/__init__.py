@@ -1,28 +1,102 @@
-from .aol import Aol
-from .ask import Ask
-from .bing import Bing
-from .dogpile import Dogpile
-from .duckduckgo import Duckduckgo
-from .google import Google
-from .mojeek import Mojeek
-from .startpage import Startpage
-from .torch import Torch
-from .yahoo import Yahoo
-from .qwant import Qwant
-from .brave import Brave
-
-
-search_engines_dict = { 
-    'google': Google, 
-    'bing': Bing, 
-    'yahoo': Yahoo, 
-    'aol': Aol, 
-    'duckduckgo': Duckduckgo, 
-    'startpage': Startpage, 
-    'dogpile': Dogpile, 
-    'ask': Ask, 
-    'mojeek': Mojeek, 
-    'qwant': Qwant, 
-    'brave': Brave,
-    'torch': Torch 
+'''The search engines. An engine module is imported when its class is first
+looked up, so that a search with one engine doesn't import all of them.'''
+from collections.abc import Mapping
+from importlib import import_module
+
+
+ENTRY_POINT_GROUP = 'search_engines.engines'
+'''The entry point group of third-party engines: `name = package.module:Class`.'''
+
+_BUILTIN_ENGINES = {
+    'google': '.google:Google',
+    'bing': '.bing:Bing',
+    'yahoo': '.yahoo:Yahoo',
+    'aol': '.aol:Aol',
+    'duckduckgo': '.duckduckgo:Duckduckgo',
+    'startpage': '.startpage:Startpage',
+    'dogpile': '.dogpile:Dogpile',
+    'ask': '.ask:Ask',
+    'mojeek': '.mojeek:Mojeek',
+    'qwant': '.qwant:Qwant',
+    'brave': '.brave:Brave',
+    'torch': '.torch:Torch'
 }
+
+
+class EngineRegistry(Mapping):
+    '''Maps the engine names to their classes, importing each engine on first use.
+    Third-party engines are found through entry points, when the names are listed
+    or an unknown name is looked up.'''
+    def __init__(self, engines, group=ENTRY_POINT_GROUP):
+        '''
+        :param dict engines: The engine names and their 'module:Class' paths
+        :param str group: optional, the entry point group of third-party engines, None for none
+        '''
+        self._specs = dict(engines)
+        self._classes = {}
+        self._group = group
+        self._discovered = group is None
+
+    def register(self, name, engine):
+        '''Adds an engine.
+
+        :param str name: The engine name
+        :param engine: The engine class, or its 'module:Class' path
+        '''
+        self._specs[name] = engine
+        self._classes.pop(name, None)
+
+    def names(self, discover=True):
+        '''Returns the engine names. Without `discover`, only the built-in and registered
+        engines, which doesn't search the installed packages for entry points.'''
+        return list(self._discover() if discover else self._specs)
+
+    def __getitem__(self, name):
+        if name not in self._classes:
+            if name not in self._specs:
+                self._discover()
+            self._classes[name] = self._load(self._specs[name])
+        return self._classes[name]
+
+    def __contains__(self, name):
+        return name in self._specs or name in self._discover()
+
+    def __iter__(self):
+        return iter(self._discover())
+
+    def __len__(self):
+        return len(self._discover())
+
+    def _discover(self):
+        '''Adds the engines of the entry points, once. Returns the engine paths.'''
+        if not self._discovered:
+            self._discovered = True
+            from importlib.metadata import entry_points
+            try:
+                found = entry_points(group=self._group)
+            except TypeError:
+                found = entry_points().get(self._group, [])
+            for entry_point in found:
+                self._specs.setdefault(entry_point.name.lower(), entry_point)
+        return self._specs
+
+    def _load(self, spec):
+        '''Imports an engine class.'''
+        if isinstance(spec, str):
+            module, _, name = spec.partition(':')
+            return getattr(import_module(module, __name__), name)
+        if hasattr(spec, 'load'):
+            return spec.load()
+        return spec
+
+
+search_engines_dict = EngineRegistry(_BUILTIN_ENGINES)
+'''The search engines by name; the engine modules are imported on first use.'''
+
+
+def __getattr__(name):
+    '''Imports the engine classes (Google, Bing, ...) on first use.'''
+    key = name.lower()
+    if name[:1].isupper() and key in _BUILTIN_ENGINES:
+        return search_engines_dict[key]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -1,37 +1,29 @@
 from ..engine import AsyncSearchEngine
 from ..config import PROXY, TIMEOUT, FAKE_USER_AGENT
-from ..utils import unquote_url, quote_url
-import aiohttp
+from ..utils import normalize_url, quote_url, decode_param
 
 class Duckduckgo(AsyncSearchEngine):
     '''Searches duckduckgo.com'''
-
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT):
-        super(Duckduckgo, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'a.result__a',
+        'title': 'a.result__a',
+        'text': 'a.result__snippet',
+        'links': 'div#links div.result',
+        'next': 'input[value="next"]'
+    }
+    _REGIONS = ('div#links',)
+    _pagination = ('_current_page',)
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None):
+        super(Duckduckgo, self).__init__(proxy, timeout, pool)
         self._base_url = 'https://html.duckduckgo.com'
         self._current_page = 1
         self.set_headers({'User-Agent': FAKE_USER_AGENT})
-        self._session = aiohttp.ClientSession()
-
-    def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        selectors = {
-            'url': 'a.result__a',
-            'title': 'a.result__a',
-            'text': 'a.result__snippet',
-            'links': 'div#links div.result',
-            'next': 'input[value="next"]'
-        }
-        return selectors[element]
 
     async def _first_page(self):
         '''Returns the initial page and query.'''
         url = f'{self._base_url}/html/?q={quote_url(self._query, "")}'
-        async with self._session.get(url) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            data = await response.text()
-        return {'url': url, 'data': data}
+        return {'url': url, 'data': None}
 
     async def _next_page(self, tags):
         '''Returns the next page URL and post data (if any)'''
@@ -41,11 +33,6 @@ class Duckduckgo(AsyncSearchEngine):
         url = None
         if next_page:
             url = self._base_url + next_page
-            async with self._session.get(url) as response:
-                if response.status != 200:
-                    response.raise_for_status()
-                data = await response.text()
-            return {'url': url, 'data': data}
         return {'url': url, 'data': None}
 
     def _get_url(self, tag, item='href'):
@@ -54,9 +41,5 @@ class Duckduckgo(AsyncSearchEngine):
         url = self._get_tag_item(tag.select_one(selector), item)
 
         if url.startswith('/url?q='):
-            url = url.replace('/url?q=', '').split('&sa=')[0]
-        return unquote_url(url)
-
-    async def close(self):
-        '''Closes the HTTP session.'''
-        await self._session.close()
+            url = decode_param(url.replace('/url?q=', '').split('&sa=')[0])
+        return normalize_url(url)
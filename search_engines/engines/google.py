@@ -1,36 +1,30 @@
 from ..engine import AsyncSearchEngine
 from ..config import PROXY, TIMEOUT, FAKE_USER_AGENT
-from ..utils import unquote_url, quote_url
-from bs4 import BeautifulSoup
+from ..utils import normalize_url, quote_url, decode_param
 from urllib.parse import urlparse, parse_qs
-import aiohttp
 
 class Google(AsyncSearchEngine):
     '''Searches google.com'''
-
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT):
-        super(Google, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'a[href]',
+        'title': 'a h3',
+        'text': 'div',
+        'links': 'div#main > div',
+        'next': 'footer a[href][aria-label="Next page"]'
+    }
+    _REGIONS = ('div#main', 'footer')
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None):
+        super(Google, self).__init__(proxy, timeout, pool)
         self._base_url = 'https://www.google.com'
-        self._delay = (2, 6)
+        self._rate_limit = 0.3
         self.set_headers({'User-Agent': FAKE_USER_AGENT})
-        self._session = aiohttp.ClientSession()
-
-    def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        selectors = {
-            'url': 'a[href]',
-            'title': 'a h3',
-            'text': 'div',
-            'links': 'div#main > div',
-            'next': 'footer a[href][aria-label="Next page"]'
-        }
-        return selectors[element]
 
     async def _first_page(self):
         '''Returns the initial page and query.'''
         url = f'{self._base_url}/search?q={quote_url(self._query, "")}'
         response = await self._get_page(url)
-        bs = BeautifulSoup(response, "html.parser")
+        bs = self._parser.parse(response.html)
 
         noscript_link = bs.select_one('noscript a')
         if noscript_link and 'href' in noscript_link.attrs:
@@ -51,7 +45,7 @@ class Google(AsyncSearchEngine):
                 print("Warning: Could not find expected 'noscript a' element or any 'a' tag with 'data-ved'. Using original URL.")
 
         response = await self._get_page(url)
-        bs = BeautifulSoup(response, "html.parser")
+        bs = self._parser.parse(response.html)
 
         inputs = {i['name']: i.get('value') for i in bs.select('form input[name]') if i['name'] != 'btnI'}
         inputs['q'] = quote_url(self._query, '')
@@ -67,8 +61,6 @@ class Google(AsyncSearchEngine):
         url = None
         if next_page:
             url = self._base_url + next_page
-            response = await self._get_page(url)
-            return {'url': url, 'data': response}
         return {'url': url, 'data': None}
 
     def _get_url(self, tag, item='href'):
@@ -77,8 +69,8 @@ class Google(AsyncSearchEngine):
         url = self._get_tag_item(tag.select_one(selector), item)
 
         if url.startswith('/url?q='):
-            url = url.replace('/url?q=', '').split('&sa=')[0]
-        return unquote_url(url)
+            url = decode_param(url.replace('/url?q=', '').split('&sa=')[0])
+        return normalize_url(url)
 
     def _get_text(self, tag, item='text'):
         '''Returns the text of search results items.'''
@@ -88,20 +80,14 @@ class Google(AsyncSearchEngine):
     async def _check_consent(self, page):
         '''Checks if cookies consent is required'''
         url = 'https://consent.google.com/save'
-        bs = BeautifulSoup(page, "html.parser")
+        bs = self._parser.parse(page.html, ('form',))
         consent_form = bs.select(f'form[action="{url}"] input[name]')
         if consent_form:
             data = {i['name']: i.get('value') for i in consent_form if i['name'] not in ['set_sc', 'set_aps']}
-            page = await self._get_page(url, data)
+            page = await self._http_client.post(url, data)
         return page
 
     async def _get_page(self, page, data=None):
-        '''Gets a page asynchronously using aiohttp.'''
-        async with self._session.get(page, params=data) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
-
-    async def close(self):
-        '''Closes the aiohttp session.'''
-        await self._session.close()
+        '''Gets a page, accepting the cookies consent if required.'''
+        page = await super(Google, self)._get_page(page, data)
+        return await self._check_consent(page)
@@ -1,61 +1,45 @@
-from bs4 import BeautifulSoup
-import aiohttp
-
 from search_engines.engine import AsyncSearchEngine
 from search_engines.config import PROXY, TIMEOUT, FAKE_USER_AGENT
 
 
 class Metager(AsyncSearchEngine):
     '''Searches metager.org'''
-
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT):
-        super(Metager, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'a.result-link',
+        'title': 'h2.result-title a',
+        'text': 'div.result-description',
+        'links': '#results div.result',
+        'next': '#next-search-link a',
+    }
+    _REGIONS = ('#results', '#next-search-link')
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None):
+        super(Metager, self).__init__(proxy, timeout, pool)
         self._base_url = 'https://metager.org'
         self.set_headers({'User-Agent': FAKE_USER_AGENT})
-        self._session = aiohttp.ClientSession()
-
-    def _selectors(self, element):
-        """Returns the appropriate CSS selector."""
-        selectors = {
-            'url': 'a.result-link',
-            'title': 'h2.result-title a',
-            'text': 'div.result-description',
-            'links': '#results div.result',
-            'next': '#next-search-link a',
-        }
-        return selectors[element]
 
     async def redirect(self, query):
         '''Redirects initial request to actual result page.'''
-        response = await self._get_page(query)
-        src_page = BeautifulSoup(response, "html.parser")
+        response = await super(Metager, self)._get_page(query)
+        src_page = self._parser.parse(response.html, ('iframe',))
         iframe = src_page.select_one('iframe')
         url = iframe.get('src') if iframe else None
         return url
 
     async def _first_page(self):
         '''Returns the initial page and query.'''
-        query = f'{self._base_url}/meta/meta.ger3?eingabe={self._query}'
-        url = await self.redirect(query)
-
+        url = f'{self._base_url}/meta/meta.ger3?eingabe={self._query}'
         return {'url': url, 'data': None}
 
     async def _next_page(self, tags):
         '''Returns the next page URL.'''
         next_page = tags.select_one(self._selectors('next'))
-        url = None
-        if next_page:
-            url = await self.redirect(next_page['href'])
-
+        url = next_page['href'] if next_page else None
         return {'url': url, 'data': None}
 
     async def _get_page(self, page, data=None):
-        '''Gets a page asynchronously using aiohttp.'''
-        async with self._session.get(page, params=data) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
-
-    async def close(self):
-        '''Closes the aiohttp session.'''
-        await self._session.close()
+        '''Gets the result page that the requested page embeds in an iframe.'''
+        url = await self.redirect(page)
+        if not url:
+            return self._http_client.response(http=0, html=u'Results page not found')
+        return await super(Metager, self)._get_page(url, data)
@@ -1,29 +1,22 @@
-from bs4 import BeautifulSoup
-import aiohttp
-
 from search_engines.engine import AsyncSearchEngine
 from search_engines.config import PROXY, TIMEOUT, FAKE_USER_AGENT
 
 
 class Mojeek(AsyncSearchEngine):
     '''Searches mojeek.com'''
-
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT):
-        super(Mojeek, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'a.ob[href]',
+        'title': 'a.ob[href]',
+        'text': 'p.s',
+        'links': 'ul.results-standard > li',
+        'next': {'href': 'div.pagination li a[href]', 'text': 'Next'}
+    }
+    _REGIONS = ('ul.results-standard', 'div.pagination')
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None):
+        super(Mojeek, self).__init__(proxy, timeout, pool)
         self._base_url = 'https://www.mojeek.com'
         self.set_headers({'User-Agent': FAKE_USER_AGENT})
-        self._session = aiohttp.ClientSession()
-
-    def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        selectors = {
-            'url': 'a.ob[href]',
-            'title': 'a.ob[href]',
-            'text': 'p.s',
-            'links': 'ul.results-standard > li',
-            'next': {'href': 'div.pagination li a[href]', 'text': 'Next'}
-        }
-        return selectors[element]
 
     async def _first_page(self):
         '''Returns the initial page and query.'''
@@ -39,14 +32,3 @@ class Mojeek(AsyncSearchEngine):
         ]
         url = (self._base_url + next_page[0]) if next_page else None
         return {'url': url, 'data': None}
-
-    async def _get_page(self, page, data=None):
-        '''Gets a page asynchronously using aiohttp.'''
-        async with self._session.get(page, params=data) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
-
-    async def close(self):
-        '''Closes the aiohttp session.'''
-        await self._session.close()
@@ -1,19 +1,19 @@
-import aiohttp
-from json import loads
-
 from ..engine import AsyncSearchEngine
 from ..config import PROXY, TIMEOUT
-from ..utils import unquote_url
+from ..utils import normalize_url
+from ..parsers import get_parser, JSON
 
 
 class Qwant(AsyncSearchEngine):
     '''Searches qwant.com'''
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT):
-        super(Qwant, self).__init__(proxy, timeout)
+    _pagination = ('_offset',)
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None):
+        super(Qwant, self).__init__(proxy, timeout, pool)
         self._base_url = u'https://api.qwant.com/v3/search/web?q={}&count=10&locale=en_US&offset={}&device=desktop&safesearch=1'
         self._offset = 0
         self._max_offset = 50
-        self._session = aiohttp.ClientSession()
+        self._parser = get_parser(JSON)
         
     def _selectors(self, element):
         '''Returns the appropriate CSS selector.'''
@@ -27,6 +27,7 @@ class Qwant(AsyncSearchEngine):
     
     async def _first_page(self):
         '''Returns the initial page and query.'''
+        self._offset = 0
         url = self._base_url.format(self._query, self._offset)
         return {'url': url, 'data': None}
     
@@ -34,14 +35,21 @@ class Qwant(AsyncSearchEngine):
         '''Returns the next page URL and post data (if any)'''
         self._offset += 10
         url = None
-        status = loads(tags.get_text())['status']
+        status = tags.get('status')
         if status == 'success' and self._offset <= self._max_offset:
             url = self._base_url.format(self._query, self._offset)
         return {'url': url, 'data': None}
 
+    def _page_request(self, page):
+        '''Returns the URL of a results page, computed from its offset.'''
+        offset = (page - 1) * 10
+        if offset > self._max_offset:
+            return None
+        return {'url': self._base_url.format(self._query, offset), 'data': None}
+
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results item.'''
-        return unquote_url(tag.get(self._selectors('url'), u''))
+        return normalize_url(tag.get(self._selectors('url'), u''))
     
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
@@ -51,29 +59,12 @@ class Qwant(AsyncSearchEngine):
         '''Returns the text of search results items.'''
         return tag.get(self._selectors('text'), u'')
     
-    def _filter_results(self, soup):
-        '''Processes and filters the search results.''' 
-        tags = loads(soup.get_text())['data']['result']['items']['mainline']
-        tags = [j for i in tags for j in i['items'] if i['type'] != u'ads']
-        results = [self._item(l) for l in tags]
-
-        if u'url' in self._filters:
-            results = [l for l in results if self._query_in(l['link'])]
-        if u'title' in self._filters:
-            results = [l for l in results if self._query_in(l['title'])]
-        if u'text' in self._filters:
-            results = [l for l in results if self._query_in(l['text'])]
-        if u'host' in self._filters:
-            results = [l for l in results if self._query_in(utils.domain(l['link']))]
-        return results
-
-    async def _get_page(self, url, data=None):
-        '''Gets a page asynchronously using aiohttp.'''
-        async with self._session.get(url, params=data) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
+    def _links(self, tags):
+        '''Returns the search results items, skipping ads.'''
+        for key in self._selectors('links'):
+            tags = tags.get(key) or {}
+        return [j for i in tags for j in i.get('items', []) if i.get('type') != u'ads']
 
-    async def close(self):
-        '''Closes the aiohttp session.'''
-        await self._session.close()
+    def set_parser(self, parser):
+        '''Qwant returns JSON, the parser can't be changed.'''
+        pass
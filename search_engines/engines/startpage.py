@@ -1,6 +1,3 @@
-import aiohttp
-from bs4 import BeautifulSoup
-
 from ..engine import AsyncSearchEngine
 from ..config import PROXY, TIMEOUT, FAKE_USER_AGENT
 from .. import output as out
@@ -8,29 +5,26 @@ from .. import output as out
 
 class Startpage(AsyncSearchEngine):
     '''Searches startpage.com'''
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT): 
-        super(Startpage, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'a.w-gl__result-url', 
+        'title': 'a.w-gl__result-title h3', 
+        'text': 'p.w-gl__description', 
+        'links': 'section.w-gl div.w-gl__result', 
+        'next': {'form': 'form.pagination__form', 'text': 'Next'},
+        'search_form': 'form#search input[name]',
+        'blocked_form': 'form#blocked_feedback_form'
+    }
+    _REGIONS = ('section.w-gl', 'form.pagination__form')
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None): 
+        super(Startpage, self).__init__(proxy, timeout, pool)
         self._base_url = 'https://www.startpage.com'
         self.set_headers({'User-Agent': FAKE_USER_AGENT})
-        self._session = aiohttp.ClientSession()  # Initialize aiohttp session
-    
-    def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        selectors = {
-            'url': 'a.w-gl__result-url', 
-            'title': 'a.w-gl__result-title h3', 
-            'text': 'p.w-gl__description', 
-            'links': 'section.w-gl div.w-gl__result', 
-            'next': {'form': 'form.pagination__form', 'text': 'Next'},
-            'search_form': 'form#search input[name]',
-            'blocked_form': 'form#blocked_feedback_form'
-        }
-        return selectors[element]
     
     async def _first_page(self):
         '''Returns the initial page and query.'''
         response = await self._get_page(self._base_url)
-        tags = BeautifulSoup(response, "html.parser")
+        tags = self._parser.parse(response.html)
         selector = self._selectors('search_form')
 
         data = {
@@ -57,17 +51,10 @@ class Startpage(AsyncSearchEngine):
                 for i in forms[0].select('input')
             }
         return {'url': url, 'data': data}
-    
-    async def _get_page(self, url, data=None):
-        '''Gets a page asynchronously using aiohttp.'''
-        async with self._session.post(url, data=data) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
 
     def _is_ok(self, response):
         '''Checks if the HTTP response is 200 OK.'''
-        soup = BeautifulSoup(response, 'html.parser')
+        soup = self._parser.parse(response.html, ('form#blocked_feedback_form',))
         selector = self._selectors('blocked_form')
         is_blocked = soup.select_one(selector)
         
@@ -75,10 +62,6 @@ class Startpage(AsyncSearchEngine):
         
         if response.http == 200 and not is_blocked:
             return True
-        msg = 'Banned' if is_blocked else ('HTTP ' + str(response.http)) if response.http else response
+        msg = 'Banned' if is_blocked else ('HTTP ' + str(response.http)) if response.http else response.html
         out.console(msg, level=out.Level.error)
         return False
-
-    async def close(self):
-        '''Closes the aiohttp session.'''
-        await self._session.close()
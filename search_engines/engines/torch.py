@@ -1,6 +1,3 @@
-import aiohttp
-from bs4 import BeautifulSoup
-
 from ..engine import AsyncSearchEngine
 from ..config import TOR, TIMEOUT
 from .. import output as out
@@ -8,47 +5,50 @@ from .. import output as out
 
 class Torch(AsyncSearchEngine):
     '''Uses torch search engine. Requires TOR proxy.'''
-    def __init__(self, proxy=TOR, timeout=TIMEOUT):
-        super(Torch, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'h5 a[href]', 
+        'title': 'h5 a[href]', 
+        'text': 'p', 
+        'links': 'div.result.mb-3', 
+        'next': 'ul.pagination a.page-link'
+    }
+    _REGIONS = ('div.result',)
+    _pagination = ('_current_page',)
+
+    def __init__(self, proxy=TOR, timeout=TIMEOUT, pool=None):
+        super(Torch, self).__init__(proxy, timeout, pool)
         self._base_url = u'http://torchdeedp3i2jigzjdmfpn5ttjhthh5wbmda2rr3jvqjg5p77c54dqd.onion'
         if not proxy:
             out.console('Torch requires TOR proxy!', level=out.Level.warning)
         self._current_page = 1
-        self._session = aiohttp.ClientSession()  # Initialize aiohttp session with proxy
-
-    def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        selectors = {
-            'url': 'h5 a[href]', 
-            'title': 'h5 a[href]', 
-            'text': 'p', 
-            'links': 'div.result.mb-3', 
-            'next': 'ul.pagination a.page-link'
-        }
-        return selectors[element]
+        self._page_has_links = True
     
     async def _first_page(self):
         '''Returns the initial page and query.'''
-        url_str = u'{}/search?query={}&action=search'
-        url = url_str.format(self._base_url, self._query)
-        response = await self._get_page(url)
-        return {'url': url, 'data': None}
+        self._current_page = 1
+        self._page_has_links = True
+        return self._page_request(1)
     
     async def _next_page(self, tags):
-        '''Returns the next page URL and post data (if any)'''
+        '''Returns the next page URL and post data (if any). 
+        A page without results is the last one.'''
         self._current_page += 1
-        url_str = u'{}/search?query={}&page={}'
-        url = url_str.format(self._base_url, self._query, self._current_page)
-        response = await self._get_page(url)
+        url = None
+        if self._page_has_links:
+            url = self._page_request(self._current_page)['url']
         return {'url': url, 'data': None}
-    
-    async def _get_page(self, url, data=None):
-        '''Gets a page asynchronously using aiohttp with TOR.'''
-        async with self._session.get(url, proxy=self.proxy, timeout=self.timeout) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
 
-    async def close(self):
-        '''Closes the aiohttp session.'''
-        await self._session.close()
+    def _links(self, tags):
+        '''Returns the tags of search results items. Remembers if the page
+        has any, so that _next_page() doesn't search the page again.'''
+        links = super(Torch, self)._links(tags)
+        self._page_has_links = bool(links)
+        return links
+
+    def _page_request(self, page):
+        '''Returns the URL of a results page, computed from its number.'''
+        if page == 1:
+            url_str = u'{}/search?query={}&action=search'
+            return {'url': url_str.format(self._base_url, self._query), 'data': None}
+        url_str = u'{}/search?query={}&page={}'
+        return {'url': url_str.format(self._base_url, self._query, page), 'data': None}
@@ -1,34 +1,27 @@
-import aiohttp
 from ..engine import AsyncSearchEngine
 from ..config import PROXY, TIMEOUT
-from ..utils import unquote_url
-from bs4 import BeautifulSoup
+from ..utils import normalize_url, decode_param
 
 class Yahoo(AsyncSearchEngine):
     '''Searches yahoo.com'''
-    def __init__(self, proxy=PROXY, timeout=TIMEOUT):
-        super(Yahoo, self).__init__(proxy, timeout)
+    _SELECTORS = {
+        'url': 'div.compTitle h3.title a', 
+        'title': 'div.compTitle h3.title', 
+        'text': 'div.compText', 
+        'links': 'div#web li div.dd.algo.algo-sr', 
+        'next': 'a.next'
+    }
+    _REGIONS = ('div#web', 'a.next')
+
+    def __init__(self, proxy=PROXY, timeout=TIMEOUT, pool=None):
+        super(Yahoo, self).__init__(proxy, timeout, pool)
         self._base_url = 'https://search.yahoo.com'
     
-    def _selectors(self, element):
-        '''Returns the appropriate CSS selector.'''
-        selectors = {
-            'url': 'div.compTitle h3.title a', 
-            'title': 'div.compTitle h3.title', 
-            'text': 'div.compText', 
-            'links': 'div#web li div.dd.algo.algo-sr', 
-            'next': 'a.next'
-        }
-        return selectors[element]
-    
     async def _first_page(self):
         '''Returns the initial page and query.'''
         url_str = u'{}/search?p={}&ei=UTF-8&nojs=1'
         url = url_str.format(self._base_url, self._query)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, proxy=self._proxy, timeout=self._timeout) as response:
-                text = await response.text()
-                return {'url': url, 'data': text}
+        return {'url': url, 'data': None}
     
     async def _next_page(self, tags):
         '''Returns the next page URL and post data (if any)'''
@@ -40,8 +33,9 @@ class Yahoo(AsyncSearchEngine):
     def _get_url(self, link, item='href'):
         selector = self._selectors('url')
         url = self._get_tag_item(link.select_one(selector), 'href')
-        url = url.split(u'/RU=')[-1].split(u'/R')[0]
-        return unquote_url(url)
+        if u'/RU=' in url:
+            url = decode_param(url.split(u'/RU=')[-1].split(u'/R')[0])
+        return normalize_url(url)
 
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+
+class ParseExecutor:
+    '''Parses search results pages in a process pool, so that the event loop
+    keeps serving other engines' requests while a page is being parsed.'''
+    def __init__(self, max_workers=None):
+        '''
+        :param int max_workers: optional, the number of processes (default: number of CPUs)
+        '''
+        self._max_workers = max_workers
+        self._executor = None
+
+    @property
+    def executor(self):
+        '''Returns the process pool, starting it if necessary.'''
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self._max_workers)
+        return self._executor
+
+    async def parse(self, engine, html):
+        '''Parses a page in a worker process.
+        The engine is sent as a picklable copy; only its pagination attributes
+        (`_pagination`), that _next_page() changed in the worker, are set back,
+        so the state that changed in the event loop meanwhile is kept.
+
+        :param engine: AsyncSearchEngine The engine that fetched the page
+        :param html: str The page content
+        :returns tuple The filtered items and the next page request
+        '''
+        loop = asyncio.get_running_loop()
+        items, request, pagination = await loop.run_in_executor(
+            self.executor, parse_page, engine, html
+        )
+        for name, value in pagination.items():
+            setattr(engine, name, value)
+        return items, request
+
+    def close(self):
+        '''Shuts down the worker processes.'''
+        if self._executor is not None:
+            self._executor.shutdown()
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_page(engine, html):
+    '''Parses a page and returns the items, the next page request and the
+    pagination attributes of the engine. Runs in a worker process.'''
+    tags = engine._parser.parse(html, engine._REGIONS)
+    items = engine._filter_results(tags)
+    request = _complete(engine._next_page(tags))
+    pagination = {name: getattr(engine, name) for name in engine._pagination}
+    return items, request, pagination
+
+
+def _complete(coro):
+    '''Runs a coroutine that doesn't wait for I/O, without an event loop.'''
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError('_next_page() must not perform I/O when parsing in a worker process')
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from collections import deque
+
+from . import config as cfg
+
+
+class HedgePolicy:
+    '''Sends a duplicate of a slow page request, once it has taken longer than
+    a percentile of the engine's recent response times. The duplicate waits for
+    its own rate limit token. The first response wins, the other request is cancelled.'''
+    def __init__(
+        self, percentile=cfg.HEDGE_PERCENTILE, window=cfg.HEDGE_WINDOW,
+        min_samples=cfg.HEDGE_MIN_SAMPLES
+    ):
+        '''
+        :param float percentile: optional, the response time percentile (0-100) that triggers a duplicate
+        :param int window: optional, the number of recent response times kept per engine
+        :param int min_samples: optional, the response times needed before hedging starts
+        '''
+        self.percentile = percentile
+        self._window = window
+        self._min_samples = min_samples
+        self._latencies = {}
+        self.hedged = 0
+        '''The number of duplicate requests sent.'''
+
+    def delay(self, engine):
+        '''Returns the seconds after which a request to the engine is duplicated, or None.'''
+        latencies = self._latencies.get(engine)
+        if not latencies or len(latencies) < self._min_samples:
+            return None
+        latencies = sorted(latencies)
+        rank = int(round(self.percentile / 100.0 * len(latencies))) - 1
+        return latencies[min(max(rank, 0), len(latencies) - 1)]
+
+    def record(self, engine, seconds):
+        '''Adds a response time of the engine.'''
+        if engine not in self._latencies:
+            self._latencies[engine] = deque(maxlen=self._window)
+        self._latencies[engine].append(seconds)
+
+    async def request(self, engine, fetch, throttle=None):
+        '''Runs a request, and a duplicate of it if it's slow.
+
+        :param str engine: The engine name
+        :param fetch: callable Returns a new request coroutine
+        :param throttle: callable optional, returns a coroutine that waits for
+        the rate limit; awaited before the duplicate is sent
+        :returns The first response
+        '''
+        delay = self.delay(engine)
+        start = time.monotonic()
+        tasks = [asyncio.ensure_future(fetch())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tasks.append(asyncio.ensure_future(self._duplicate(fetch, throttle)))
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            self.record(engine, time.monotonic() - start)
+            return done.pop().result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _duplicate(self, fetch, throttle):
+        '''Sends the duplicate request once the rate limit allows it.'''
+        if throttle:
+            await throttle()
+        self.hedged += 1
+        return await fetch()
@@ -1,11 +1,143 @@
-import aiohttp
+import asyncio
 from collections import namedtuple
-from .config import TIMEOUT, PROXY, USER_AGENT
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .config import (
+    TIMEOUT, PROXY, USER_AGENT,
+    POOL_LIMIT, POOL_LIMIT_PER_HOST, KEEPALIVE_TIMEOUT, DNS_CACHE_TTL
+)
 from . import utils as utl
 
+
+_request_proxy = ContextVar('request_proxy', default=None)
+'''The proxy of the requests of the current task, if it overrides the client's proxy.'''
+
+
+class AsyncConnectionPool:
+    '''A long-lived `aiohttp` session with a pooled connector, shared by HTTP clients.
+    The session is created lazily, on first use, inside the running event loop;
+    aiohttp is imported then too, so that importing the engines stays fast.'''
+    def __init__(
+        self, limit=POOL_LIMIT, limit_per_host=POOL_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT, dns_cache_ttl=DNS_CACHE_TTL
+    ):
+        '''
+        :param int limit: optional, the total number of simultaneous connections
+        :param int limit_per_host: optional, the simultaneous connections per host
+        :param int keepalive_timeout: optional, seconds to keep idle connections open
+        :param int dns_cache_ttl: optional, seconds to cache DNS lookups
+        '''
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._session = None
+        self._socks_sessions = {}
+        self._trace_configs = []
+        self._trace_users = {}
+
+    @property
+    def session(self):
+        '''Returns the shared session, creating it if necessary.'''
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(**self._connector_options())
+            self._session = aiohttp.ClientSession(
+                connector=connector, trace_configs=list(self._trace_configs)
+            )
+        return self._session
+
+    def session_for(self, proxy=None):
+        '''Returns the session of a proxy. HTTP proxies use the shared session; 
+        each SOCKS proxy needs a connector of its own (aiohttp-socks).'''
+        if not is_socks(proxy):
+            return self.session
+        session = self._socks_sessions.get(proxy)
+        if session is None or session.closed:
+            import aiohttp
+            try:
+                from aiohttp_socks import ProxyConnector
+            except ImportError:
+                raise ImportError('SOCKS proxies require aiohttp-socks: pip install aiohttp-socks')
+            connector = ProxyConnector.from_url(proxy, **self._connector_options())
+            session = self._socks_sessions[proxy] = aiohttp.ClientSession(
+                connector=connector, trace_configs=list(self._trace_configs)
+            )
+        return session
+
+    def add_trace_config(self, trace_config):
+        '''Traces the requests of all sessions, open or created later.
+        A trace config added n times is removed after n remove_trace_config() calls.'''
+        self._trace_users[trace_config] = self._trace_users.get(trace_config, 0) + 1
+        if trace_config in self._trace_configs:
+            return
+        trace_config.freeze()
+        self._trace_configs.append(trace_config)
+        for session in self._open_sessions():
+            # the session reads this list for every request
+            if trace_config not in session.trace_configs:
+                session.trace_configs.append(trace_config)
+
+    def remove_trace_config(self, trace_config):
+        '''Stops tracing the requests with a trace config, once no client uses it.'''
+        users = self._trace_users.get(trace_config, 0) - 1
+        if users > 0:
+            self._trace_users[trace_config] = users
+            return
+        self._trace_users.pop(trace_config, None)
+        if trace_config in self._trace_configs:
+            self._trace_configs.remove(trace_config)
+        for session in self._open_sessions():
+            if trace_config in session.trace_configs:
+                session.trace_configs.remove(trace_config)
+
+    def _open_sessions(self):
+        '''Returns the sessions that are open.'''
+        sessions = [self._session] + list(self._socks_sessions.values())
+        return [s for s in sessions if s is not None and not s.closed]
+
+    def _connector_options(self):
+        return dict(
+            limit=self._limit,
+            limit_per_host=self._limit_per_host,
+            keepalive_timeout=self._keepalive_timeout,
+            ttl_dns_cache=self._dns_cache_ttl,
+            use_dns_cache=True
+        )
+
+    @property
+    def closed(self):
+        '''Indicates if the pool has no open session.'''
+        return self._session is None or self._session.closed
+
+    async def close(self):
+        '''Closes the sessions and all pooled connections.'''
+        if not self.closed:
+            await self._session.close()
+        self._session = None
+        for session in self._socks_sessions.values():
+            await session.close()
+        self._socks_sessions = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
 class AsyncHttpClient:
     '''Performs asynchronous HTTP requests. An `aiohttp` wrapper, essentially'''
-    def __init__(self, timeout=TIMEOUT, proxy=PROXY):
+    def __init__(self, timeout=TIMEOUT, proxy=PROXY, pool=None, recorder=None):
+        '''
+        :param int timeout: optional, the HTTP timeout
+        :param str proxy: optional, a proxy server
+        :param AsyncConnectionPool pool: optional, a shared connection pool
+        :param ResponseRecorder recorder: optional, records or replays the responses
+        '''
+        import aiohttp
+
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.proxy = self._set_proxy(proxy)
         self.headers = {
@@ -13,36 +145,88 @@ class AsyncHttpClient:
             'Accept-Language': 'en-GB,en;q=0.5'
         }
         self.response = namedtuple('response', ['http', 'html'])
+        self._owns_pool = pool is None
+        self._pool = pool or AsyncConnectionPool()
+        self.recorder = recorder
+        self.trace_request_ctx = None
+        '''Passed to the trace configs of the connection pool, e.g. the engine name.'''
 
     async def get(self, page):
         '''Submits an asynchronous HTTP GET request.'''
-        page = self._quote(page)
-        try:
-            async with aiohttp.ClientSession(headers=self.headers, timeout=self.timeout) as session:
-                async with session.get(page, proxy=self.proxy) as req:
-                    html = await req.text()
-                    self.headers['Referer'] = page
-                    return self.response(http=req.status, html=html)
-        except aiohttp.ClientError as e:
-            return self.response(http=0, html=str(e))
+        return await self._request('GET', page)
 
     async def post(self, page, data):
         '''Submits an asynchronous HTTP POST request.'''
+        return await self._request('POST', page, data=data)
+
+    @contextmanager
+    def use_proxy(self, proxy):
+        '''Sends the requests of the current task (and the tasks it starts) 
+        through a proxy, instead of the client's proxy.'''
+        token = _request_proxy.set(proxy)
+        try:
+            yield
+        finally:
+            _request_proxy.reset(token)
+
+    def copy(self):
+        '''Returns a client with the same settings, that shares the connection pool.'''
+        client = AsyncHttpClient(self.timeout.total, self.proxy, self._pool, self.recorder)
+        client.headers = {k: v for k, v in self.headers.items() if k != 'Referer'}
+        client._owns_pool = False
+        client.trace_request_ctx = self.trace_request_ctx
+        return client
+
+    def trace(self, trace_config):
+        '''Traces the requests with an aiohttp TraceConfig. 
+        It applies to every client of the connection pool, from the next request.'''
+        self._pool.add_trace_config(trace_config)
+
+    def untrace(self, trace_config):
+        '''Stops tracing the requests with a TraceConfig added by trace().'''
+        self._pool.remove_trace_config(trace_config)
+
+    async def close(self):
+        '''Closes the connection pool, if it isn't shared.'''
+        if self._owns_pool:
+            await self._pool.close()
+
+    async def _request(self, method, page, data=None):
+        '''Submits a request, or replays a recorded response.'''
         page = self._quote(page)
+        recorder = self.recorder
+        if recorder and recorder.replays:
+            saved = await recorder.load_async(method, page, data)
+            if saved:
+                return self.response(http=saved[0], html=saved[1])
+            if not recorder.records:
+                return self.response(http=0, html=u'No recorded response for ' + page)
+        
+        response = await self._fetch(method, page, data)
+        if recorder and recorder.records and response.http:
+            await recorder.save_async(method, page, data, response.http, response.html)
+        return response
+
+    async def _fetch(self, method, page, data=None):
+        '''Submits a request through the connection pool.'''
+        import aiohttp
+
+        proxy = _request_proxy.get() or self.proxy
         try:
-            async with aiohttp.ClientSession(headers=self.headers, timeout=self.timeout) as session:
-                async with session.post(page, data=data, proxy=self.proxy) as req:
-                    html = await req.text()
-                    self.headers['Referer'] = page
-                    return self.response(http=req.status, html=html)
-        except aiohttp.ClientError as e:
-            return self.response(http=0, html=str(e))
+            async with self._pool.session_for(proxy).request(
+                method, page, data=data, headers=self.headers,
+                proxy=None if is_socks(proxy) else proxy, timeout=self.timeout,
+                trace_request_ctx=self.trace_request_ctx
+            ) as req:
+                html = await req.text()
+                self.headers['Referer'] = page
+                return self.response(http=req.status, html=html)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return self.response(http=0, html=str(e) or e.__class__.__name__)
 
     def _quote(self, url):
-        '''URL-encodes URLs.'''
-        if utl.decode_bytes(utl.unquote_url(url)) == utl.decode_bytes(url):
-            url = utl.quote_url(url)
-        return url
+        '''URL-encodes URLs; the escapes they already have are kept.'''
+        return utl.normalize_url(url)
 
     def _set_proxy(self, proxy):
         '''Returns HTTP or SOCKS proxy string.'''
@@ -50,4 +234,9 @@ class AsyncHttpClient:
             if not utl.is_url(proxy):
                 raise ValueError('Invalid proxy format!')
             return proxy
-        return None
\ No newline at end of file
+        return None
+
+
+def is_socks(proxy):
+    '''Checks if a proxy is a SOCKS proxy.'''
+    return bool(proxy) and proxy.lower().startswith('socks')
@@ -0,0 +1,184 @@
+'''Per-engine timings and counters of the searches.
+
+The HTTP phases (connection pool wait, DNS, connect, time to first byte, body
+bytes) are measured with an aiohttp TraceConfig; the engine phases (pacing,
+parsing, filtering, collecting) with timers in AsyncSearchEngine. Engines
+without metrics skip all of it.
+'''
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+PHASES = ('queue', 'dns', 'connect', 'ttfb', 'request', 'throttle', 'parse', 'filter', 'collect')
+'''The timed phases: connection pool wait, DNS lookup, connection (DNS and TLS
+included), time to first byte, whole page request (redirects and bootstrap
+requests included), pacing sleep, parsing, filtering and collecting.'''
+COUNTERS = ('requests', 'errors', 'redirects', 'body_bytes', 'pages', 'items', 'bans')
+
+
+class Timing:
+    '''The count, total and maximum of a phase's durations.'''
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class Metrics:
+    '''Collects the timings and counters of the searches, per engine.'''
+    def __init__(self):
+        self._timings = defaultdict(lambda: defaultdict(Timing))
+        self._counters = defaultdict(lambda: defaultdict(int))
+        self._statuses = defaultdict(lambda: defaultdict(int))
+        self.trace_config = self._trace_config()
+        '''The aiohttp TraceConfig that measures the HTTP phases.'''
+
+    def observe(self, engine, phase, seconds):
+        '''Adds the duration of a phase.'''
+        self._timings[engine][phase].add(seconds)
+
+    def count(self, engine, counter, value=1):
+        '''Increments a counter.'''
+        self._counters[engine][counter] += value
+
+    def status(self, engine, http):
+        '''Counts an HTTP status; 0 stands for failed requests.'''
+        self._statuses[engine][http] += 1
+
+    @contextmanager
+    def timer(self, engine, phase):
+        '''Times the code of a `with` block.'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(engine, phase, time.perf_counter() - start)
+
+    def snapshot(self):
+        '''Returns the metrics of every engine, as a dict.'''
+        engines = set(self._timings) | set(self._counters) | set(self._statuses)
+        snapshot = {}
+        for engine in sorted(engines):
+            counters = {name: self._counters[engine][name] for name in COUNTERS}
+            counters['items_per_page'] = counters['items'] / float(counters['pages'] or 1)
+            timings = {
+                phase: dict(
+                    count=t.count, total_ms=t.total * 1000,
+                    mean_ms=t.total * 1000 / t.count, max_ms=t.max * 1000
+                )
+                for phase, t in self._timings[engine].items() if t.count
+            }
+            if 'parse' in timings:
+                timings['parse']['mean_us'] = timings['parse']['mean_ms'] * 1000
+            snapshot[engine] = dict(
+                timings=timings, counters=counters, http=dict(self._statuses[engine])
+            )
+        return snapshot
+
+    def prometheus(self, prefix='search_engines'):
+        '''Returns the metrics in the Prometheus text exposition format.'''
+        lines = [
+            '# HELP {}_phase_seconds Time spent in each phase of the searches.'.format(prefix),
+            '# TYPE {}_phase_seconds summary'.format(prefix)
+        ]
+        for engine, phases in sorted(self._timings.items()):
+            for phase, t in sorted(phases.items()):
+                labels = _labels(engine=engine, phase=phase)
+                lines.append('{}_phase_seconds_count{} {}'.format(prefix, labels, t.count))
+                lines.append('{}_phase_seconds_sum{} {!r}'.format(prefix, labels, t.total))
+        lines += [
+            '# HELP {}_phase_seconds_max Longest duration of each phase.'.format(prefix),
+            '# TYPE {}_phase_seconds_max gauge'.format(prefix)
+        ]
+        for engine, phases in sorted(self._timings.items()):
+            for phase, t in sorted(phases.items()):
+                labels = _labels(engine=engine, phase=phase)
+                lines.append('{}_phase_seconds_max{} {!r}'.format(prefix, labels, t.max))
+        for counter in COUNTERS:
+            lines += [
+                '# HELP {}_{}_total Number of {}.'.format(prefix, counter, counter.replace('_', ' ')),
+                '# TYPE {}_{}_total counter'.format(prefix, counter)
+            ]
+            for engine, counters in sorted(self._counters.items()):
+                if counter in counters:
+                    lines.append('{}_{}_total{} {}'.format(
+                        prefix, counter, _labels(engine=engine), counters[counter]
+                    ))
+        lines += [
+            '# HELP {}_responses_total Responses by HTTP status (0: failed requests).'.format(prefix),
+            '# TYPE {}_responses_total counter'.format(prefix)
+        ]
+        for engine, statuses in sorted(self._statuses.items()):
+            for http, number in sorted(statuses.items()):
+                labels = _labels(engine=engine, status=http)
+                lines.append('{}_responses_total{} {}'.format(prefix, labels, number))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        '''Resets all the metrics.'''
+        self._timings.clear()
+        self._counters.clear()
+        self._statuses.clear()
+
+    def _trace_config(self):
+        '''Returns a TraceConfig that records the HTTP phases of the requests.
+        The engine name comes from the request's trace_request_ctx.'''
+        import aiohttp
+
+        trace_config = aiohttp.TraceConfig()
+
+        def engine(context):
+            return (context.trace_request_ctx or {}).get('engine', 'unknown')
+
+        def start(name):
+            async def callback(session, context, params):
+                setattr(context, name, time.perf_counter())
+            return callback
+
+        def end(name, phase):
+            async def callback(session, context, params):
+                started = getattr(context, name, None)
+                if started is not None:
+                    self.observe(engine(context), phase, time.perf_counter() - started)
+            return callback
+
+        async def on_request_start(session, context, params):
+            context.request_start = time.perf_counter()
+            self.count(engine(context), 'requests')
+
+        async def on_request_exception(session, context, params):
+            self.count(engine(context), 'errors')
+
+        async def on_request_redirect(session, context, params):
+            self.count(engine(context), 'redirects')
+
+        async def on_response_chunk_received(session, context, params):
+            self.count(engine(context), 'body_bytes', len(params.chunk))
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(end('request_start', 'ttfb'))
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_request_redirect.append(on_request_redirect)
+        trace_config.on_response_chunk_received.append(on_response_chunk_received)
+        trace_config.on_connection_queued_start.append(start('queue_start'))
+        trace_config.on_connection_queued_end.append(end('queue_start', 'queue'))
+        trace_config.on_dns_resolvehost_start.append(start('dns_start'))
+        trace_config.on_dns_resolvehost_end.append(end('dns_start', 'dns'))
+        trace_config.on_connection_create_start.append(start('connect_start'))
+        trace_config.on_connection_create_end.append(end('connect_start', 'connect'))
+        return trace_config
+
+
+def _labels(**labels):
+    '''Returns Prometheus labels, escaped.'''
+    return '{' + ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for k, v in sorted(labels.items())
+    ) + '}'
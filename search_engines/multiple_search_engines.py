@@ -1,22 +1,46 @@
 import asyncio
+from copy import copy
 from .results import SearchResults
-from .engines import async_search_engines_dict
+from .ranking import RankFusion
+from .engines import search_engines_dict
+from .http_client import AsyncConnectionPool
 from . import output as out
 from . import config as cfg
 
 class AsyncMultipleSearchEngines:
     '''Uses multiple search engines asynchronously.'''
-    def __init__(self, engines, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
+    def __init__(
+        self, engines, proxy=cfg.PROXY, timeout=cfg.TIMEOUT, pool=None, executor=None, cache=None
+    ):
+        '''
+        :param list engines: the names of the search engines
+        :param str proxy: optional, a proxy server
+        :param int timeout: optional, the HTTP timeout
+        :param AsyncConnectionPool pool: optional, the connection pool (default: a new pool)
+        :param ParseExecutor executor: optional, parses the pages in a process pool
+        :param ResultsCache cache: optional, reuses the results of recent searches
+        '''
+        self._owns_pool = pool is None
+        self._pool = pool or AsyncConnectionPool()
         self._engines = [
-            se(proxy, timeout) 
-            for se in async_search_engines_dict.values() 
-            if se.__name__.lower() in engines
+            search_engines_dict[name](proxy, timeout, self._pool) 
+            for name in search_engines_dict 
+            if name in engines
         ]
+        for engine in self._engines:
+            engine.set_executor(executor)
+            engine.set_cache(cache)
         self._filter = None
         self.ignore_duplicate_urls = False
         self.ignore_duplicate_domains = False
         self.results = SearchResults()
         self.banned_engines = []
+        self.incomplete_engines = {}
+        '''The engines stopped by the deadline of the last search, and the pages each one parsed.'''
+        self.fusion = RankFusion()
+        '''All the results of the last search, grouped by page and ranked across engines.'''
+        self.error = None
+        '''The exception that stopped the search of a query in search_many(), or None.'''
     
     def disable_console(self):
         '''Disables console output'''
@@ -26,37 +50,217 @@ class AsyncMultipleSearchEngines:
         '''Filters search results based on the operator.'''
         self._filter = operator
     
-    async def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
-        '''Searches multiple engines concurrently and collects the results.'''
+    def set_rate_limiter(self, rate_limiter):
+        '''Paces the requests of all engines with a rate limiter.'''
+        for engine in self._engines:
+            engine.set_rate_limiter(rate_limiter)
+    
+    def set_recorder(self, recorder):
+        '''Records the HTTP responses of all engines, or replays them offline.'''
+        for engine in self._engines:
+            engine.set_recorder(recorder)
+    
+    def set_cache(self, cache):
+        '''Reuses the results of recent searches, per engine.'''
+        for engine in self._engines:
+            engine.set_cache(cache)
+    
+    def set_hedging(self, hedging):
+        '''Sends a duplicate of the slow page requests of all engines.'''
+        for engine in self._engines:
+            engine.set_hedging(hedging)
+    
+    def set_circuit_breakers(self, breakers):
+        '''Skips each engine for a while after a ban or repeated failures.'''
+        for engine in self._engines:
+            engine.set_circuit_breakers(breakers)
+    
+    def set_proxy_pool(self, proxy_pool):
+        '''Spreads the requests of all engines over the proxies of a pool.'''
+        for engine in self._engines:
+            engine.set_proxy_pool(proxy_pool)
+    
+    def set_metrics(self, metrics):
+        '''Collects the timings and counters of all engines.'''
+        for engine in self._engines:
+            engine.set_metrics(metrics)
+    
+    async def search(
+        self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, max_results=None, deadline=None
+    ): 
+        '''Searches multiple engines concurrently and collects the results.
+        Stops all engines as soon as the merged results have max_results unique links, 
+        or when the deadline expires; `incomplete_engines` lists the engines that were stopped.'''
+        async for _ in self.search_iter(query, pages, max_results, deadline):
+            pass
+        return self.results
+
+    async def search_iter(
+        self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, max_results=None, deadline=None
+    ): 
+        '''Searches multiple engines concurrently and yields each new result as soon 
+        as an engine has parsed its page. Closing the generator (`aclose()`) 
+        cancels the searches of all engines. Engines with cached results 
+        aren't queried. When the search ends, the results of each engine are 
+        the items it added to `results`: the duplicates are dropped, like the 
+        items that came after max_results or the deadline.
+
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages per engine  
+        :param max_results: int Optional, cancels the page fetches and waits of all 
+        engines as soon as the merged results have this number of unique links
+        :param deadline: float Optional, the seconds after which the search stops 
+        and keeps the results collected so far; the unfinished engines and 
+        their parsed pages are stored in `incomplete_engines`
+        :yields SearchHit (engine, page, item) namedtuples
+        '''
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline if deadline is not None else None
         self.results = SearchResults()
-        tasks = []
+        self.incomplete_engines = {}
+        self.fusion = RankFusion(self.fusion.k)
+        hits = asyncio.Queue()
+        tasks = {}
+        accepted = {engine.__class__.__name__: [] for engine in self._engines}
         for engine in self._engines:
             engine.ignore_duplicate_urls = self.ignore_duplicate_urls
             engine.ignore_duplicate_domains = self.ignore_duplicate_domains
             if self._filter:
                 engine.set_search_operator(self._filter)
             
-            tasks.append(self._search_engine(engine, query, pages))
+            cached = await engine._cached_hits(query, pages)
+            if cached is not None:
+                for hit in cached:
+                    hits.put_nowait(hit)
+                hits.put_nowait(None)
+                continue
+            task = self._search_engine(engine, query, pages, hits)
+            tasks[asyncio.ensure_future(task)] = engine
         
-        await asyncio.gather(*tasks)
-        return self.results
+        try:
+            running = len(self._engines)
+            while running:
+                try:
+                    timeout = max(expires - loop.time(), 0) if expires is not None else None
+                    hit = await asyncio.wait_for(hits.get(), timeout)
+                except asyncio.TimeoutError:
+                    self._stop_incomplete(tasks)
+                    return
+                if hit is None:
+                    running -= 1
+                    continue
+                self.fusion.add_hit(hit)
+                if self.results.merge(
+                    [hit.item], self.ignore_duplicate_urls, self.ignore_duplicate_domains
+                ):
+                    accepted[hit.engine].append(hit.item)
+                    yield hit
+                    if max_results and self.results.unique_links() >= max_results:
+                        return
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for engine in self._engines:
+                engine.results = SearchResults(accepted[engine.__class__.__name__])
+
+    def ranked_results(self, top=cfg.FUSION_TOP_K):
+        '''Returns the best pages of the last search, ranked with reciprocal rank fusion: 
+        the same page found by several engines (canonical URLs) is merged, and 
+        scores 1 / (k + rank) per engine. Each FusedResult has the item, the score, 
+        the rank of each engine and the engines that found it.
+
+        :param top: int Optional, the number of pages, None for all
+        :returns list of FusedResult
+        '''
+        return self.fusion.top(top)
+
+    async def search_many(
+        self, queries, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, concurrency=cfg.BATCH_CONCURRENCY
+    ):
+        '''Searches many queries, `concurrency` at a time, and yields each query's 
+        searcher as soon as its search is done. Every query gets its own engine 
+        instances; they share the connection pool, which bounds the requests in 
+        flight, and the rate limiter, which interleaves the pages of all queries 
+        to an engine in order of request. Closing the generator cancels the searches. 
+        A query whose search fails is reported and yielded with the results 
+        collected before the error; the error is in the searcher's `error`.
+
+        :param queries: iterable The search queries
+        :param pages: int Optional, the maximum number of results pages per engine  
+        :param concurrency: int Optional, the number of queries searched at once
+        :yields tuple (query, AsyncMultipleSearchEngines) The searcher has the results
+        '''
+        queries = iter(queries)
+        running = {}
+        try:
+            while True:
+                for query in queries:
+                    searcher = self._copy()
+                    task = asyncio.ensure_future(searcher.search(query, pages))
+                    running[task] = (query, searcher)
+                    if len(running) >= concurrency:
+                        break
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    query, searcher = running.pop(task)
+                    searcher.error = task.exception()
+                    if searcher.error:
+                        msg = 'Search of "{}" failed: {!r}'.format(query, searcher.error)
+                        out.console(msg, level=out.Level.error)
+                    yield query, searcher
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def _copy(self):
+        '''Returns a searcher with the same settings and new engine instances.'''
+        searcher = copy(self)
+        searcher._owns_pool = False
+        searcher._engines = [engine.copy() for engine in self._engines]
+        searcher.results = SearchResults()
+        searcher.banned_engines = []
+        searcher.incomplete_engines = {}
+        searcher.fusion = RankFusion(self.fusion.k)
+        searcher.error = None
+        return searcher
 
-    async def _search_engine(self, engine, query, pages):
-        '''Searches a single engine and processes its results.'''
-        engine_results = await engine.search(query, pages)
-        if engine.ignore_duplicate_urls:
-            engine_results._results = [
-                item for item in engine_results._results 
-                if item['link'] not in self.results.links()
-            ]
-        if self.ignore_duplicate_domains:
-            engine_results._results = [
-                item for item in engine_results._results 
-                if item['host'] not in self.results.hosts()
-            ]
-        self.results._results += engine_results._results
-        if engine.is_banned:
-            self.banned_engines.append(engine.__class__.__name__)
+    def _stop_incomplete(self, tasks):
+        '''Records the engines that are still searching when the deadline expires.'''
+        self.incomplete_engines = {
+            engine.__class__.__name__: engine.pages_searched 
+            for task, engine in tasks.items() if not task.done()
+        }
+        msg = ', '.join(
+            '{} ({} pages)'.format(name, pages) for name, pages in self.incomplete_engines.items()
+        )
+        out.console('Deadline expired, incomplete: ' + msg, level=out.Level.warning)
+
+    async def _search_engine(self, engine, query, pages, hits):
+        '''Searches a single engine and queues its results. 
+        Queues None when the engine is done.'''
+        try:
+            async for hit in engine._search_pages(query, pages):
+                hits.put_nowait(hit)
+            if engine.is_banned:
+                self.banned_engines.append(engine.__class__.__name__)
+        finally:
+            hits.put_nowait(None)
+    
+    async def close(self):
+        '''Closes the connection pool shared by the engines, if it was created here.'''
+        if self._owns_pool:
+            await self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
     
     def output(self, output=out.PRINT, path=None):
         '''Prints search results and/or creates report files.'''
@@ -67,16 +271,40 @@ class AsyncMultipleSearchEngines:
         out.console('')
         if out.PRINT in output:
             out.print_results(self._engines)
-        if out.HTML in output:
-            out.write_file(out.create_html_data(self._engines), path + u'.html') 
-        if out.CSV in output:
-            out.write_file(out.create_csv_data(self._engines), path + u'.csv') 
-        if out.JSON in output:
-            out.write_file(out.create_json_data(self._engines), path + u'.json')
+        out.export(self._engines, output, path)
+    
+    async def output_async(self, output=out.PRINT, path=None):
+        '''Same as output(), without blocking the event loop.'''
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.output, output, path)
+
+    def write_results(self, writer):
+        '''Queues the results of every engine, with their query, to a ResultsWriter.'''
+        out.write_results(writer, self._engines)
 
 class AsyncAllSearchEngines(AsyncMultipleSearchEngines):
     '''Uses all search engines asynchronously.'''
-    def __init__(self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
+    def __init__(
+        self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT, pool=None, executor=None, cache=None
+    ):
         super(AsyncAllSearchEngines, self).__init__(
-            list(async_search_engines_dict), proxy, timeout
-        )
\ No newline at end of file
+            list(search_engines_dict), proxy, timeout, pool, executor, cache
+        )
+
+async def search_many(
+    queries, engines, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, concurrency=cfg.BATCH_CONCURRENCY, 
+    max_requests=cfg.POOL_LIMIT, proxy=cfg.PROXY, timeout=cfg.TIMEOUT
+):
+    '''Searches many queries with many engines. 
+    Yields (query, AsyncMultipleSearchEngines) tuples as soon as each query is done.
+
+    :param queries: iterable The search queries
+    :param engines: list The names of the search engines
+    :param pages: int Optional, the maximum number of results pages per engine
+    :param concurrency: int Optional, the number of queries searched at once
+    :param max_requests: int Optional, the number of requests in flight
+    '''
+    async with AsyncConnectionPool(limit=max_requests) as pool:
+        searcher = AsyncMultipleSearchEngines(engines, proxy, timeout, pool)
+        async for result in searcher.search_many(queries, pages, concurrency):
+            yield result
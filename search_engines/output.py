@@ -1,9 +1,15 @@
 from __future__ import print_function
 
+import asyncio
 import csv
 import json
 import io
+import os
 import re
+import queue
+import shutil
+import tempfile
+import threading
 from collections import namedtuple
 
 try:
@@ -11,96 +17,303 @@ try:
 except ImportError:
     from .libs.get_terminal_size import get_terminal_size
     
-from .utils import encode_str, decode_bytes
 from .libs import windows_cmd_encoding
-from .config import PYTHON_VERSION
 
-async def print_results(search_engines):
+def print_results(search_engines):
     '''Prints the search results.'''
     for engine in search_engines:
-        await console(engine.__class__.__name__ + u' results') 
+        console(engine.__class__.__name__ + u' results') 
 
         for i, v in enumerate(engine.results, 1):
-            await console(u'{:<4}{}'.format(i, v['link'])) 
-        await console(u'')
+            console(u'{:<4}{}'.format(i, v['link'])) 
+        console(u'')
 
-async def create_csv_data(search_engines):
-    '''CSV formats the search results.'''
-    encoder = decode_bytes if PYTHON_VERSION == 3 else encode_str
-    data = [['query', 'engine', 'domain', 'URL', 'title', 'text']]
+def export(search_engines, output, path):
+    '''Writes the search results to report files, all formats in a single pass.
 
-    for engine in search_engines:
-        for i in engine.results:
-            row = [
-                engine._query, engine.__class__.__name__, 
-                i['host'], i['link'], i['title'], i['text']
-            ]
-            row = [encoder(i) for i in row]
-            data.append(row)
-    return data
-
-async def create_json_data(search_engines):
-    '''JSON formats the search results.'''
-    jobj = {
-        u'query': search_engines[0]._query, 
-        u'results': {
-            se.__class__.__name__: [i for i in se.results] 
-            for se in search_engines
-        }
-    }
-    return json.dumps(jobj)
-
-async def create_html_data(search_engines):
-    '''HTML formats the search results.'''
-    query = decode_bytes(search_engines[0]._query) if search_engines else u''
-    tables = u''
+    :param search_engines: list The engines that hold the results
+    :param output: str The output formats, comma separated (html, csv, json, ndjson)
+    :param path: str The report files path, without extension
+    '''
+    query = search_engines[0]._query if search_engines else u''
+    filters = search_engines[0]._filters if search_engines else []
+    engines = [engine.__class__.__name__ for engine in search_engines]
+    with ResultsWriter(path, output, query, filters, engines=engines) as writer:
+        write_results(writer, search_engines)
 
+def write_results(writer, search_engines):
+    '''Queues the results of the engines, with their query, to a ResultsWriter.'''
     for engine in search_engines:
-        rows = u''
-        for i, v in enumerate(engine.results, 1):
-            data = u''
-            if u'title' in engine._filters:
-                data += HtmlTemplate.data.format(await _replace_with_bold(query, v['title']))
-            if u'text' in engine._filters:
-                data += HtmlTemplate.data.format(await _replace_with_bold(query, v['text']))
-            link = await _replace_with_bold(query, v['link']) if u'url' in engine._filters else v['link']
-            rows += HtmlTemplate.row.format(number=i, href=v['link'], link=link, data=data)
-        
-        engine_name = engine.__class__.__name__
-        tables += HtmlTemplate.table.format(engine=engine_name, rows=rows)
-    return HtmlTemplate.html.format(query=query, table=tables)
-
-async def _replace_with_bold(query, data):
+        name = engine.__class__.__name__
+        for item in engine.results:
+            writer.write(name, item, engine._query)
+
+def _replace_with_bold(query, data):
     '''Places the query in <b> tags.'''
     for match in re.findall(query, data, re.I):
         data = data.replace(match, u'<b>{}</b>'.format(match))
     return data
 
-async def write_file(data, path, encoding='utf-8'):
-    '''Writes search results data to file.'''
-    try:
-        if PYTHON_VERSION == 2 and type(data) in (list, str):
-            f = io.open(path, 'wb') 
-        else: 
-            f = io.open(path, 'w', encoding=encoding, newline='')
-        
-        if type(data) is list:
-            writer = csv.writer(f)
-            writer.writerows(data)
-        else:
-            f.write(data)
-        f.close()
-        await console(u'Output file: ' + path)
-    except IOError as e:
-        await console(str(e), level=Level.error)
-
-async def console(msg, end='\n', level=None):
+def console(msg, end='\n', level=None):
     '''Prints data on the console.'''
     console_len = get_terminal_size().columns
     clear_line = u'\r{}\r'.format(u' ' * (console_len - 1))
     msg = clear_line + (level or u'') + msg
     print(msg, end=end)
 
+class ResultsWriter:
+    '''Streams search results to report files as they arrive. 
+    Every item is written to all the requested formats in a single pass, 
+    by a background thread, so `write()` doesn't block the event loop.
+
+    Usage:
+        with ResultsWriter(path, 'csv,ndjson', query) as writer:
+            async for hit in engine.search_iter(query):
+                writer.write(hit.engine, hit.item)
+    '''
+    def __init__(
+        self, path, output, query=u'', filters=(), encoding='utf-8', engines=(), append=False
+    ):
+        '''
+        :param str path: the report files path, without extension
+        :param str output: the output formats, comma separated (html, csv, json, ndjson)
+        :param str query: optional, the search query
+        :param list filters: optional, the search operators (highlighted in html)
+        :param str encoding: optional, the files encoding
+        :param list engines: optional, the engine names; listed in the report (in this order)
+        even if they return no results
+        :param bool append: optional, appends to existing files instead of replacing them;
+        only for the formats that support it (csv, ndjson)
+        '''
+        formats = [f.strip() for f in (output or u'').lower().split(u',')]
+        self._exporters = [
+            exporter(path + u'.' + fmt, query, filters, encoding, append) 
+            for fmt, exporter in EXPORTERS.items() if fmt in formats
+        ]
+        if append and not all(e.appendable for e in self._exporters):
+            raise ValueError(u'Only csv and ndjson files can be appended to')
+        self._engines = list(engines)
+        self._queue = queue.Queue()
+        self._thread = None
+        if self._exporters:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    @property
+    def paths(self):
+        '''Returns the paths of the report files.'''
+        return [e.path for e in self._exporters]
+
+    def write(self, engine, item, query=None):
+        '''Queues a search results item for writing.
+
+        :param engine: str The engine name
+        :param item: SearchResult The item
+        :param query: str Optional, the item's query, if not the writer's query (csv, ndjson)
+        '''
+        if self._thread is not None:
+            self._queue.put((engine, item, query))
+
+    def sync(self, callback):
+        '''Queues a sync point: once the items queued before it are written,
+        the files are flushed to disk and `callback` is called, in the writer
+        thread, with the size of each file ({path: bytes}).
+        '''
+        if self._thread is not None:
+            self._queue.put((_SYNC, callback, None))
+        else:
+            callback({})
+
+    def close(self):
+        '''Waits for the queued items to be written and closes the files.'''
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    async def aclose(self):
+        '''Closes the files without blocking the event loop.'''
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
+
+    def _run(self):
+        '''Writes the queued items until close() is called.'''
+        exporters = []
+        for exporter in self._exporters:
+            try:
+                exporter.open()
+                exporters.append(exporter)
+            except IOError as e:
+                console(str(e), level=Level.error)
+                continue
+            for engine in self._engines:
+                exporter.add_engine(engine)
+
+        while True:
+            row = self._queue.get()
+            if row is None:
+                break
+            if row[0] is _SYNC:
+                row[1]({exporter.path: exporter.flush() for exporter in exporters})
+                continue
+            for exporter in exporters:
+                exporter.write(*row)
+
+        for exporter in exporters:
+            try:
+                exporter.close()
+                console(u'Output file: ' + exporter.path)
+            except IOError as e:
+                console(str(e), level=Level.error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+_SYNC = object()
+'''The queue marker of ResultsWriter.sync().'''
+
+class Exporter:
+    '''The base class of the report file formats.'''
+    appendable = True
+    '''The format can be appended to an existing file.'''
+
+    def __init__(self, path, query=u'', filters=(), encoding='utf-8', append=False):
+        self.path = path
+        self.query = query
+        self.filters = filters
+        self.encoding = encoding
+        self.append = append
+        self._file = None
+
+    def open(self):
+        '''Opens the file and writes the header.'''
+        mode = 'a' if self.append else 'w'
+        self._file = io.open(self.path, mode, encoding=self.encoding, newline='')
+
+    def add_engine(self, engine):
+        '''Adds an engine to the report, before its items (if any) are written.'''
+        pass
+
+    def write(self, engine, item, query=None):
+        '''Writes a search results item.'''
+        raise NotImplementedError()
+
+    def flush(self):
+        '''Flushes the file to disk and returns its size.'''
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        '''Writes the footer and closes the file.'''
+        self._file.close()
+
+class CsvExporter(Exporter):
+    '''Writes CSV rows.'''
+    header = ['query', 'engine', 'domain', 'URL', 'title', 'text']
+
+    def open(self):
+        super(CsvExporter, self).open()
+        self._writer = csv.writer(self._file)
+        if not self._file.tell():
+            self._writer.writerow(self.header)
+
+    def write(self, engine, item, query=None):
+        self._writer.writerow([
+            self.query if query is None else query,
+            engine, item['host'], item['link'], item['title'], item['text']
+        ])
+
+class NdjsonExporter(Exporter):
+    '''Writes one JSON object per line.'''
+    def write(self, engine, item, query=None):
+        row = {u'query': self.query if query is None else query, u'engine': engine}
+        row.update(dict(item))
+        self._file.write(json.dumps(row) + u'\n')
+
+class _GroupedExporter(Exporter):
+    '''Writes the items of each engine to a temporary file, 
+    and joins the groups in the report file when closed.'''
+    appendable = False
+
+    def open(self):
+        super(_GroupedExporter, self).open()
+        self._groups = {}
+
+    def add_engine(self, engine):
+        '''Creates the group of an engine, so that it's in the report without results.'''
+        self._group(engine)
+
+    def _group(self, engine):
+        '''Returns the temporary file of an engine.'''
+        if engine not in self._groups:
+            self._groups[engine] = tempfile.TemporaryFile(
+                'w+', encoding=self.encoding, newline=''
+            )
+        return self._groups[engine]
+
+    def _copy_group(self, engine):
+        '''Copies the temporary file of an engine to the report file.'''
+        group = self._groups[engine]
+        group.seek(0)
+        shutil.copyfileobj(group, self._file)
+        group.close()
+
+class JsonExporter(_GroupedExporter):
+    '''Writes a JSON object with the query and the results of each engine.'''
+    def write(self, engine, item, query=None):
+        group = self._group(engine)
+        if group.tell():
+            group.write(u', ')
+        json.dump(dict(item), group)
+
+    def close(self):
+        self._file.write(u'{{"query": {}, "results": {{'.format(json.dumps(self.query)))
+        for i, engine in enumerate(list(self._groups)):
+            if i:
+                self._file.write(u', ')
+            self._file.write(u'{}: ['.format(json.dumps(engine)))
+            self._copy_group(engine)
+            self._file.write(u']')
+        self._file.write(u'}}')
+        super(JsonExporter, self).close()
+
+class HtmlExporter(_GroupedExporter):
+    '''Writes an HTML table for each engine.'''
+    def open(self):
+        super(HtmlExporter, self).open()
+        self._count = {}
+
+    def write(self, engine, item, query=None):
+        number = self._count[engine] = self._count.get(engine, 0) + 1
+        data = u''
+        if u'title' in self.filters:
+            data += HtmlTemplate.data.format(_replace_with_bold(self.query, item['title']))
+        if u'text' in self.filters:
+            data += HtmlTemplate.data.format(_replace_with_bold(self.query, item['text']))
+        link = _replace_with_bold(self.query, item['link']) if u'url' in self.filters else item['link']
+        row = HtmlTemplate.row.format(number=number, href=item['link'], link=link, data=data)
+        self._group(engine).write(row)
+
+    def close(self):
+        html_head, html_tail = HtmlTemplate.html.split(u'{table}')
+        table_head, table_tail = HtmlTemplate.table.split(u'{rows}')
+        self._file.write(html_head.format(query=self.query))
+        for engine in list(self._groups):
+            self._file.write(table_head.format(engine=engine))
+            self._copy_group(engine)
+            self._file.write(table_tail)
+        self._file.write(html_tail)
+        super(HtmlExporter, self).close()
+
 Level = namedtuple('Level', ['info', 'warning', 'error'])(
     info = u'INFO ',
     warning = u'WARNING ',
@@ -111,6 +324,7 @@ PRINT = 'print'
 HTML = 'html'
 JSON = 'json'
 CSV = 'csv'
+NDJSON = 'ndjson'
 
 class HtmlTemplate:
     '''HTML template.'''
@@ -149,4 +363,11 @@ class HtmlTemplate:
     {data}
     </tr>
     '''
-    data = u'''<tr><td></td><td>{}</td></tr>'''
\ No newline at end of file
+    data = u'''<tr><td></td><td>{}</td></tr>'''
+
+EXPORTERS = {
+    HTML: HtmlExporter, 
+    CSV: CsvExporter, 
+    JSON: JsonExporter, 
+    NDJSON: NdjsonExporter
+}
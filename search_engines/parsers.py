@@ -0,0 +1,230 @@
+'''HTML parser backends used to extract the search results.
+
+Every backend returns a document that supports the subset of the BeautifulSoup
+Tag API used by the engines (`select`, `select_one`, `get`, `text`, ...),
+so the CSS selectors returned by `_selectors()` work unchanged on all of them.
+The parsing libraries (bs4, lxml, selectolax) are imported on first use.
+'''
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from json import loads
+
+from . import config as cfg
+
+
+HTML_PARSER = 'html.parser'
+LXML = 'lxml'
+LEXBOR = 'lexbor'
+JSON = 'json'
+
+
+class SoupParser:
+    '''Parses HTML with BeautifulSoup, using the html.parser or lxml tree builder.'''
+    def __init__(self, features=HTML_PARSER):
+        self.name = features
+
+    def parse(self, html, regions=None):
+        '''Returns the parsed document.
+
+        :param str html: The page content
+        :param tuple regions: optional, builds only the tags that match these regions
+        '''
+        from bs4 import BeautifulSoup
+
+        strainer = _region_strainer(regions) if regions else None
+        return BeautifulSoup(html, self.name, parse_only=strainer)
+
+
+class LexborParser:
+    '''Parses HTML with the lexbor engine of selectolax.'''
+    name = LEXBOR
+
+    def parse(self, html, regions=None):
+        '''Returns the parsed document. Lexbor always builds the whole document.'''
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html)
+        return LexborNode(tree.root, tree, document=True)
+
+
+class JsonParser:
+    '''Decodes JSON API responses, for engines that don't return HTML.'''
+    name = JSON
+
+    def parse(self, text, regions=None):
+        '''Returns the decoded object, or an empty dict if `text` isn't JSON.'''
+        try:
+            return loads(text)
+        except ValueError:
+            return {}
+
+
+class LexborNode:
+    '''Wraps a selectolax node with the BeautifulSoup Tag methods used by the engines.'''
+    __slots__ = ('_node', '_tree', '_id')
+
+    def __init__(self, node, tree, document=False):
+        '''
+        :param node: The selectolax node
+        :param tree: The selectolax parser, kept alive while its nodes are used
+        :param bool document: optional, the node is the document root, which can match selectors
+        '''
+        self._node = node
+        self._tree = tree
+        self._id = None if document else node.mem_id
+
+    def select(self, selector):
+        '''Returns all the descendants that match the CSS selector.'''
+        selector = getattr(selector, 'pattern', selector)
+        return [
+            LexborNode(node, self._tree) for node in self._node.css(selector)
+            if node.mem_id != self._id
+        ]
+
+    def select_one(self, selector):
+        '''Returns the first descendant that matches the CSS selector, or None.
+        Lexbor matches the node itself, BeautifulSoup only its descendants;
+        the node comes first in document order, so the next match is used.'''
+        selector = getattr(selector, 'pattern', selector)
+        node = self._node.css_first(selector)
+        if node is not None and node.mem_id == self._id:
+            nodes = self._node.css(selector)
+            node = nodes[1] if len(nodes) > 1 else None
+        return LexborNode(node, self._tree) if node is not None else None
+
+    @property
+    def attrs(self):
+        '''Returns the tag attributes; `class` is a list, as in BeautifulSoup.'''
+        attrs = {k: (v or u'') for k, v in self._node.attributes.items()}
+        if 'class' in attrs:
+            attrs['class'] = attrs['class'].split()
+        return attrs
+
+    def get(self, name, default=None):
+        '''Returns an attribute value.'''
+        return self.attrs.get(name, default)
+
+    def __getitem__(self, name):
+        return self.attrs[name]
+
+    @property
+    def text(self):
+        '''Returns the text of the tag and its descendants.'''
+        return self._node.text(deep=True)
+
+    def get_text(self, separator=u'', strip=False):
+        '''Returns the text of the tag and its descendants.'''
+        return self._node.text(deep=True, separator=separator, strip=strip)
+
+    @property
+    def stripped_strings(self):
+        '''Yields the non-empty text nodes, stripped of whitespace.'''
+        for node in self._node.traverse(include_text=True):
+            if node.tag == '-text':
+                text = node.text(deep=False).strip()
+                if text:
+                    yield text
+
+    def decompose(self):
+        '''Removes the tag from the document.'''
+        self._node.decompose()
+
+
+class _RegionMatcher:
+    '''Lets BeautifulSoup build only the tags that match the page regions, 
+    and their descendants; the rest of the document is skipped.
+    A region is a simple selector: a tag name, an #id and .classes, e.g. 'div#main', 'ol.results'.
+    Mixed into a SoupStrainer by `region_strainer_class()`, when bs4 is first used.
+    '''
+    def __init__(self, regions):
+        super(_RegionMatcher, self).__init__()
+        self.regions = [_parse_region(region) for region in regions]
+
+    def matches_region(self, name, attrs):
+        '''Checks if a tag matches any of the regions.'''
+        attrs = attrs or {}
+        classes = set((attrs.get('class') or u'').split())
+        for tag, id_, class_ in self.regions:
+            if tag and tag != name:
+                continue
+            if id_ and id_ != attrs.get('id'):
+                continue
+            if class_ <= classes:
+                return True
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        '''Checks if a tag should be built (BeautifulSoup < 4.13).'''
+        return markup_name if self.matches_region(markup_name, markup_attrs) else None
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        '''Checks if a tag should be built (BeautifulSoup >= 4.13).'''
+        return self.matches_region(name, attrs)
+
+    def allow_string_creation(self, string):
+        '''Skips the strings outside of the regions.'''
+        return False
+
+
+def compile_selectors(selectors):
+    '''Compiles the CSS selectors of a selectors dict. 
+    Values that aren't strings (e.g. dicts with text to match) are left as they are.'''
+    import soupsieve
+
+    return {
+        k: soupsieve.compile(v) if isinstance(v, str) else v 
+        for k, v in selectors.items()
+    }
+
+
+def _parse_region(region):
+    '''Returns the tag name, id and classes of a region selector.'''
+    match = re.match(r'^([\w-]*)(?:#([\w-]+))?((?:\.[\w-]+)*)$', region)
+    if not match:
+        raise ValueError(u'Invalid region "{}"'.format(region))
+    tag, id_, classes = match.groups()
+    return tag or None, id_, set(c for c in classes.split('.') if c)
+
+
+@lru_cache(maxsize=None)
+def region_strainer_class():
+    '''Returns the RegionStrainer class: a bs4 SoupStrainer that matches the page regions.'''
+    from bs4 import SoupStrainer
+
+    class RegionStrainer(_RegionMatcher, SoupStrainer):
+        __doc__ = _RegionMatcher.__doc__
+
+    return RegionStrainer
+
+
+@lru_cache(maxsize=None)
+def _region_strainer(regions):
+    '''Returns a strainer for the regions, created once per regions tuple.'''
+    return region_strainer_class()(regions)
+
+
+@lru_cache(maxsize=None)
+def _installed(module):
+    '''Checks if a library can be imported, without importing it.'''
+    return find_spec(module) is not None
+
+
+def get_parser(name=None):
+    '''Returns a parser backend by name.
+    Supported backends: 'html.parser', 'lxml', 'lexbor', 'json'.
+    Falls back to html.parser if the lxml or selectolax library isn't installed.
+
+    :param str name: optional, the backend name (default: config.PARSER)
+    '''
+    name = (name or cfg.PARSER).lower()
+    if name not in (HTML_PARSER, LXML, LEXBOR, JSON):
+        raise ValueError(u'Unsupported parser "{}"'.format(name))
+
+    if name == JSON:
+        return JsonParser()
+    if name == LEXBOR and _installed('selectolax'):
+        return LexborParser()
+    if name == LXML and _installed('lxml'):
+        return SoupParser(LXML)
+    return SoupParser(HTML_PARSER)
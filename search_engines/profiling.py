@@ -0,0 +1,160 @@
+'''CPU and memory profiling of searches.
+
+    with SearchProfiler('report.txt', searcher=engine):
+        await engine.search('query', 3)
+
+The code of the `with` block runs under cProfile, or pyinstrument (a sampling
+profiler) if it's installed and `sampling` is set, and tracemalloc. The report
+lists the top functions and allocation sites overall, then per engine: the
+engine's phase timings and the functions and allocations of its module.
+'''
+import cProfile
+import io
+import inspect
+import os
+import pstats
+import re
+import time
+import tracemalloc
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+from .metrics import Metrics
+
+
+class SearchProfiler:
+    '''Profiles the code of a `with` block, and writes a report.'''
+    def __init__(self, path=None, searcher=None, top=20, sampling=False, frames=10):
+        '''
+        :param str path: optional, the report file (default: no file, see `report`)
+        :param searcher: optional, the engine or group of engines whose phases are timed
+        :param int top: optional, the functions and allocation sites listed per section
+        :param bool sampling: optional, uses pyinstrument instead of cProfile, if it's installed
+        :param int frames: optional, the stack frames stored per allocation
+        '''
+        self.path = path
+        self.top = top
+        self.report = u''
+        '''The text report, once the block is done.'''
+        self._searcher = searcher
+        self._sampling = sampling and SamplingProfiler is not None
+        self._frames = frames
+        self._profiler = None
+        self._metrics = None
+        self._previous_metrics = []
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self._searcher is not None:
+            self._metrics = Metrics()
+            for engine in self._engines():
+                self._previous_metrics.append((engine, engine._metrics))
+                engine.set_metrics(self._metrics)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+            self._started_tracing = True
+        self._cpu, self._wall = time.process_time(), time.perf_counter()
+        if self._sampling:
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._sampling:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        cpu, wall = time.process_time() - self._cpu, time.perf_counter() - self._wall
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+        for engine, metrics in self._previous_metrics:
+            engine.set_metrics(metrics)
+
+        self.report = self._report(snapshot, cpu, wall, peak)
+        if self.path:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(self.report)
+            if not self._sampling:
+                self._profiler.dump_stats(os.path.splitext(self.path)[0] + '.pstats')
+
+    def _engines(self):
+        '''Returns the profiled engines.'''
+        if self._searcher is None:
+            return []
+        return list(getattr(self._searcher, '_engines', [self._searcher]))
+
+    def _report(self, snapshot, cpu, wall, peak):
+        '''Returns the text report.'''
+        name = 'pyinstrument' if self._sampling else 'cProfile'
+        lines = [
+            u'Search profile ({}): {:.3f} s wall, {:.3f} s CPU, {:.1f} MB peak traced memory'.format(
+                name, wall, cpu, peak / 1048576.0
+            ),
+            u''
+        ]
+        if self._sampling:
+            lines += [u'== Call tree ==', self._profiler.output_text(unicode=True), u'']
+        else:
+            lines += [u'== Top functions (cumulative time) ==', self._functions('cumulative'), u'']
+            lines += [u'== Top functions (own time) ==', self._functions('tottime'), u'']
+        lines += [u'== Top allocation sites ==', self._allocations(snapshot), u'']
+
+        for engine in self._engines():
+            engine_name = engine.__class__.__name__
+            filename = inspect.getfile(engine.__class__)
+            lines.append(u'== {} ({}) =='.format(engine_name, os.path.basename(filename)))
+            lines.append(self._timings(engine_name))
+            if not self._sampling:
+                lines.append(self._functions('tottime', filename))
+            lines.append(self._allocations(snapshot, filename))
+            lines.append(u'')
+        return u'\n'.join(lines)
+
+    def _functions(self, sort, filename=None):
+        '''Returns the top functions, optionally of a module only.'''
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.sort_stats(sort)
+        if not filename:
+            stats.print_stats(self.top)
+            return stream.getvalue().strip('\n')
+        stats.print_stats(re.escape(filename), self.top)
+        text = stream.getvalue()
+        return text[text.find('   ncalls'):].strip('\n') if 'ncalls' in text else u'no calls'
+
+    def _allocations(self, snapshot, filename=None):
+        '''Returns the top allocation sites; for a module, the allocations made
+        by its code, or by the code that it calls.'''
+        if filename:
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(True, filename, all_frames=True)])
+        rows = [u'{:>10} {:>8}  {}'.format('size KB', 'count', 'line')]
+        for stat in snapshot.statistics('lineno')[:self.top]:
+            frame = stat.traceback[0]
+            rows.append(u'{:>10.1f} {:>8}  {}:{}'.format(
+                stat.size / 1024.0, stat.count, frame.filename, frame.lineno
+            ))
+        return u'\n'.join(rows)
+
+    def _timings(self, engine_name):
+        '''Returns the phase timings of an engine.'''
+        if not self._metrics:
+            return u''
+        engine = self._metrics.snapshot().get(engine_name)
+        if not engine:
+            return u'no requests'
+        counters = engine['counters']
+        rows = [u'pages: {pages}  items: {items}  bans: {bans}  body bytes: {body_bytes}'.format(**counters)]
+        rows.append(u'{:<10} {:>6} {:>10} {:>10}'.format('phase', 'count', 'total ms', 'mean ms'))
+        for phase, timing in engine['timings'].items():
+            rows.append(u'{:<10} {:>6} {:>10.1f} {:>10.2f}'.format(
+                phase, timing['count'], timing['total_ms'], timing['mean_ms']
+            ))
+        return u'\n'.join(rows)
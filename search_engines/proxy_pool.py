@@ -0,0 +1,117 @@
+import random
+import time
+from urllib.parse import urlparse
+
+from . import config as cfg
+
+
+PROXY_SCHEMES = ('http', 'https', 'socks4', 'socks5', 'socks5h')
+'''The supported proxy types. SOCKS proxies require aiohttp-socks.'''
+
+
+class ProxyHealth:
+    '''The recent latency, error rate and ban rate of a proxy with a search engine.'''
+    def __init__(self):
+        self.latency = None
+        '''The average response time, in seconds.'''
+        self.errors = 0.0
+        '''The share of recent requests that failed.'''
+        self.bans = 0.0
+        '''The share of recent requests that the engine refused.'''
+        self.requests = 0
+        self.banned_until = 0.0
+
+    def update(self, latency, http, decay=cfg.PROXY_HEALTH_DECAY):
+        '''Adds the outcome of a request to the moving averages.
+
+        :param float latency: The response time, in seconds
+        :param int http: The HTTP status, 0 if the request failed
+        :param float decay: optional, the weight of the new request
+        '''
+        banned = http in (403, 429, 503)
+        failed = http != 200
+        self.requests += 1
+        if http:
+            self.latency = latency if self.latency is None else (
+                self.latency + decay * (latency - self.latency)
+            )
+        self.errors += decay * (failed - self.errors)
+        self.bans += decay * (banned - self.bans)
+        if banned:
+            self.banned_until = time.time() + cfg.PROXY_BAN_COOLDOWN
+
+    @property
+    def is_banned(self):
+        '''Indicates if the engine refused this proxy recently.'''
+        return time.time() < self.banned_until
+
+    def cost(self, default_latency=cfg.PROXY_DEFAULT_LATENCY):
+        '''Returns the expected cost of a request: the latency,
+        inflated by the error and ban rates.
+
+        :param float default_latency: optional, the latency of an untried proxy
+        '''
+        latency = default_latency if self.latency is None else self.latency
+        return latency * (1 + cfg.PROXY_ERROR_PENALTY * (self.errors + self.bans))
+
+
+class ProxyPool:
+    '''Spreads the requests over several HTTP or SOCKS proxies (e.g. config.TOR).
+    Tracks the health of each proxy with each engine, and favours the fast and
+    reliable ones; proxies banned by an engine are avoided during a cooldown.
+    The rate limits apply per proxy, so the throughput grows with the proxies.'''
+    def __init__(self, proxies, per_request=True):
+        '''
+        :param list proxies: The proxy servers (protocol://ip:port)
+        :param bool per_request: optional, picks a proxy for every request;
+        if False, for every search, so that an engine's session cookies stay on one proxy
+        '''
+        proxies = list(dict.fromkeys(p.strip() for p in proxies if p and p.strip()))
+        if not proxies:
+            raise ValueError('The proxy pool is empty!')
+        for proxy in proxies:
+            url = urlparse(proxy)
+            if url.scheme.lower() not in PROXY_SCHEMES or not url.hostname:
+                raise ValueError('Invalid proxy format: ' + proxy)
+        self.proxies = proxies
+        self.per_request = per_request
+        self._health = {}
+
+    @classmethod
+    def from_file(cls, path, per_request=True):
+        '''Returns a pool with the proxies of a file, one per line.'''
+        with open(path, encoding='utf-8') as f:
+            return cls(f.read().split(), per_request)
+
+    def health(self, proxy, engine):
+        '''Returns the health of a proxy with an engine, creating it if necessary.'''
+        key = (proxy, engine.lower())
+        if key not in self._health:
+            self._health[key] = ProxyHealth()
+        return self._health[key]
+
+    def choose(self, engine):
+        '''Picks a proxy for an engine, at random, weighted by the inverse of
+        its cost. Untried proxies are assumed as fast as the fastest one, so that
+        they get tried. Banned proxies are picked only if all are banned.'''
+        health = [(proxy, self.health(proxy, engine)) for proxy in self.proxies]
+        candidates = [(p, h) for p, h in health if not h.is_banned] or health
+        latencies = [h.latency for _, h in health if h.latency is not None]
+        default_latency = min(latencies) if latencies else cfg.PROXY_DEFAULT_LATENCY
+        weights = [1.0 / max(h.cost(default_latency), 1e-3) for _, h in candidates]
+        return random.choices([p for p, _ in candidates], weights)[0]
+
+    def update(self, proxy, engine, latency, http):
+        '''Records the outcome of a request through a proxy.'''
+        if proxy in self.proxies:
+            self.health(proxy, engine).update(latency, http)
+
+    def stats(self):
+        '''Returns the health of every proxy and engine that was used.'''
+        return {
+            '{} {}'.format(engine, proxy): dict(
+                requests=h.requests, latency=h.latency, errors=round(h.errors, 3),
+                bans=round(h.bans, 3), banned=h.is_banned
+            )
+            for (proxy, engine), h in self._health.items() if h.requests
+        }
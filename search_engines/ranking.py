@@ -0,0 +1,115 @@
+'''Merges the results of several engines into one ranking.
+
+The links are canonicalized (scheme, `www.`, default ports, trailing slashes,
+tracking parameters and fragments don't matter), so that the same page found
+by several engines is grouped, and the groups are scored with reciprocal rank
+fusion. The ranking doesn't depend on the order in which the engines finish.
+'''
+import heapq
+
+from .results import SearchResults
+from .utils import canonical_url
+from . import config as cfg
+
+
+class FusedResult:
+    '''A page found by one or more engines, with its rank in each of them.'''
+    __slots__ = ('url', 'item', 'ranks', '_score', '_k')
+
+    def __init__(self, url, item, k=cfg.RRF_K):
+        self.url = url
+        '''The canonical URL.'''
+        self.item = item
+        '''The SearchResult of the engine that ranked the page highest.'''
+        self.ranks = {}
+        '''The rank of the page in each engine's results.'''
+        self._score = None
+        self._k = k
+
+    def add(self, engine, rank, item):
+        '''Adds the rank of the page in an engine's results.
+        An engine that found the page twice keeps its best rank.'''
+        if rank >= self.ranks.get(engine, rank + 1):
+            return
+        self.ranks[engine] = rank
+        self._score = None
+        if (rank, engine) <= min((r, e) for e, r in self.ranks.items()):
+            self.item = item
+
+    @property
+    def score(self):
+        '''The reciprocal rank fusion score: the sum of 1 / (k + rank).'''
+        if self._score is None:
+            self._score = sum(1.0 / (self._k + rank) for rank in sorted(self.ranks.values()))
+        return self._score
+
+    @property
+    def sources(self):
+        '''The engines that found the page, best rank first.'''
+        return [e for e, _ in sorted(self.ranks.items(), key=lambda er: (er[1], er[0]))]
+
+    def sort_key(self):
+        '''Orders by score, then best rank, then URL, so that ties are deterministic.'''
+        return (-self.score, min(self.ranks.values()), self.url)
+
+    def to_dict(self):
+        return dict(
+            url=self.url, score=self.score, ranks=dict(sorted(self.ranks.items())),
+            sources=self.sources, **dict(self.item.items())
+        )
+
+    def __repr__(self):
+        return '<FusedResult {} score={:.5f} ranks={}>'.format(self.url, self.score, self.ranks)
+
+
+class RankFusion:
+    '''Groups the results of several engines by canonical URL, and ranks the
+    groups with reciprocal rank fusion.'''
+    def __init__(self, k=cfg.RRF_K):
+        '''
+        :param int k: optional, the RRF constant; higher values flatten the rank differences
+        '''
+        self.k = k
+        self._groups = {}
+        self._ranks = {}
+
+    def add(self, engine, item, rank=None):
+        '''Adds an item of an engine's results.
+
+        :param str engine: The engine name
+        :param item: SearchResult The item
+        :param int rank: optional, the item's rank (default: after the engine's previous item)
+        '''
+        if rank is None:
+            rank = self._ranks.get(engine, 0) + 1
+        self._ranks[engine] = max(rank, self._ranks.get(engine, 0))
+        url = canonical_url(item['link'])
+        group = self._groups.get(url)
+        if group is None:
+            group = self._groups[url] = FusedResult(url, item, self.k)
+        group.add(engine, rank, item)
+
+    def add_hit(self, hit):
+        '''Adds a SearchHit, ranked after the engine's previous hit.'''
+        self.add(hit.engine, hit.item)
+
+    def top(self, n=cfg.FUSION_TOP_K):
+        '''Returns the n best ranked pages, as FusedResult objects.
+        The groups are selected when this is called, with a heap of n items
+        (heapq.nsmallest), so large result sets aren't fully sorted; no heap
+        is maintained while the results are added, as scores change with every hit.'''
+        if n is None:
+            return sorted(self._groups.values(), key=FusedResult.sort_key)
+        return heapq.nsmallest(n, self._groups.values(), key=FusedResult.sort_key)
+
+    def results(self, n=cfg.FUSION_TOP_K):
+        '''Returns the n best ranked pages, as SearchResults.'''
+        return SearchResults(fused.item for fused in self.top(n))
+
+    def __len__(self):
+        return len(self._groups)
+
+    def clear(self):
+        '''Removes all the results.'''
+        self._groups.clear()
+        self._ranks.clear()
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from random import uniform as random_uniform
+
+from . import config as cfg
+
+
+class TokenBucket:
+    '''Paces the requests to a search engine: allows `burst` requests at once,
+    then `rate` requests per second. The rate is halved when the engine
+    answers 429 or 503, and recovers gradually on successful responses.'''
+    def __init__(
+        self, rate=cfg.RATE_LIMIT, burst=cfg.RATE_BURST,
+        jitter=cfg.RATE_JITTER, min_rate=cfg.RATE_LIMIT_MIN
+    ):
+        '''
+        :param float rate: optional, the requests per second
+        :param int burst: optional, the requests that can be sent at once
+        :param float jitter: optional, the maximum random delay added to each request
+        :param float min_rate: optional, the lowest rate after repeated slowdowns
+        '''
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.min_rate = min(min_rate, rate)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        '''Waits for a token. Concurrent callers are served in order.
+        A caller that is cancelled while waiting gives its token back.'''
+        delay = self._reserve()
+        if self.jitter:
+            delay += random_uniform(0, self.jitter)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._release()
+                raise
+
+    def slow_down(self):
+        '''Halves the rate, after the engine refused a request.'''
+        self.rate = max(self.rate / 2.0, self.min_rate)
+
+    def speed_up(self):
+        '''Raises the rate back towards its initial value, after a successful request.'''
+        self.rate = min(self.rate + self.max_rate / 10.0, self.max_rate)
+
+    def _reserve(self):
+        '''Takes a token and returns the seconds until it's available.
+        Tokens can be taken in advance; the bucket then owes them to later callers.'''
+        self._refill()
+        self._tokens -= 1
+        return max(-self._tokens / self.rate, 0.0)
+
+    def _refill(self):
+        '''Adds the tokens earned since the last update.'''
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _release(self):
+        '''Gives back a token that was taken but not used.'''
+        self._refill()
+        self._tokens = min(self.burst, self._tokens + 1)
+
+
+class RateLimiter:
+    '''Shares a token bucket per search engine and proxy, between all the engine instances.'''
+    def __init__(self, rate=None, burst=cfg.RATE_BURST, jitter=cfg.RATE_JITTER):
+        '''
+        :param float rate: optional, the requests per second (default: each engine's rate)
+        :param int burst: optional, the requests that can be sent at once
+        :param float jitter: optional, the maximum random delay added to each request
+        '''
+        self._rate = rate
+        self._burst = burst
+        self._jitter = jitter
+        self._buckets = {}
+
+    def bucket(self, engine, proxy=None, rate=cfg.RATE_LIMIT):
+        '''Returns the bucket of an engine and proxy, creating it if necessary.
+
+        :param str engine: The engine name
+        :param str proxy: optional, the proxy server
+        :param float rate: optional, the engine's rate, unless the limiter has its own
+        '''
+        key = (engine.lower(), proxy)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self._rate or rate, self._burst, self._jitter)
+        return self._buckets[key]
+
+    async def acquire(self, engine, proxy=None, rate=cfg.RATE_LIMIT):
+        '''Waits until a request can be sent to an engine.'''
+        await self.bucket(engine, proxy, rate).acquire()
+
+    def update(self, engine, proxy, http):
+        '''Adapts the rate of an engine and proxy to the HTTP status of a response.'''
+        bucket = self._buckets.get((engine.lower(), proxy))
+        if bucket is None:
+            return
+        if http in (429, 503):
+            bucket.slow_down()
+        elif http == 200:
+            bucket.speed_up()
+
+
+rate_limiter = RateLimiter()
+'''The rate limiter shared by all engines by default.'''
@@ -0,0 +1,100 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+from os import path as os_path
+
+from . import config as cfg
+
+
+RECORD = 'record'
+'''Fetches every page and saves the response.'''
+REPLAY = 'replay'
+'''Returns the saved responses only; never uses the network.'''
+REPLAY_OR_RECORD = 'replay_or_record'
+'''Returns the saved response if there is one, otherwise fetches and saves it.'''
+
+
+class ResponseRecorder:
+    '''Records the raw HTTP responses of the search engines and replays them offline.
+    Page bodies are gzip-compressed and stored once per content hash (objects/),
+    and each request is mapped to its status and body hash (requests/).'''
+    def __init__(self, path=cfg.RECORDINGS_DIR, mode=RECORD):
+        '''
+        :param str path: optional, the store directory
+        :param str mode: optional, 'record', 'replay' or 'replay_or_record'
+        '''
+        if mode not in (RECORD, REPLAY, REPLAY_OR_RECORD):
+            raise ValueError(u'Unsupported recorder mode "{}"'.format(mode))
+        self.path = path
+        self.mode = mode
+
+    @property
+    def replays(self):
+        '''Indicates if saved responses are returned.'''
+        return self.mode in (REPLAY, REPLAY_OR_RECORD)
+
+    @property
+    def records(self):
+        '''Indicates if fetched responses are saved.'''
+        return self.mode in (RECORD, REPLAY_OR_RECORD)
+
+    @staticmethod
+    def key(method, url, data=None):
+        '''Returns the hash that identifies a request.'''
+        if isinstance(data, dict):
+            data = sorted(data.items())
+        request = json.dumps([method.upper(), url, data])
+        return hashlib.sha1(request.encode('utf-8')).hexdigest()
+
+    def load(self, method, url, data=None):
+        '''Returns the (status, html) of a saved response, or None.'''
+        request_file = self._request_file(self.key(method, url, data))
+        if not os_path.isfile(request_file):
+            return None
+        with open(request_file, encoding='utf-8') as f:
+            request = json.load(f)
+        with gzip.open(self._object_file(request['digest']), 'rb') as f:
+            html = f.read().decode('utf-8')
+        return request['status'], html
+
+    def save(self, method, url, data, status, html):
+        '''Saves a response. The body is written only if its content isn't stored yet.'''
+        body = html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        object_file = self._object_file(digest)
+        if not os_path.isfile(object_file):
+            self._write(object_file, gzip.compress(body))
+
+        request = dict(method=method.upper(), url=url, data=data, status=status, digest=digest)
+        request_file = self._request_file(self.key(method, url, data))
+        self._write(request_file, json.dumps(request, indent=1).encode('utf-8'))
+
+    async def load_async(self, method, url, data=None):
+        '''Same as load(), without blocking the event loop.'''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.load, method, url, data)
+
+    async def save_async(self, method, url, data, status, html):
+        '''Same as save(), without blocking the event loop.'''
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.save, method, url, data, status, html)
+
+    def _object_file(self, digest):
+        '''Returns the path of a page body.'''
+        return os_path.join(self.path, 'objects', digest[:2], digest[2:] + '.gz')
+
+    def _request_file(self, key):
+        '''Returns the path of a request record.'''
+        return os_path.join(self.path, 'requests', key + '.json')
+
+    @staticmethod
+    def _write(file, content):
+        '''Writes a file atomically, so that a crash doesn't leave partial records.'''
+        os.makedirs(os_path.dirname(file), exist_ok=True)
+        temp_file = '{}.{}-{}.tmp'.format(file, os.getpid(), threading.get_ident())
+        with open(temp_file, 'wb') as f:
+            f.write(content)
+        os.replace(temp_file, file)
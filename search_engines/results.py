@@ -1,49 +1,219 @@
+from sys import intern
+from collections import namedtuple
+from collections.abc import Sequence
+
+
+class SearchResult:
+    '''A search results item. Uses slots instead of a dict to save memory,
+    and supports dict access (`item['link']`, `item.get('link')`, `dict(item)`).'''
+    __slots__ = ('host', 'link', 'title', 'text')
+    _fields = __slots__
+
+    def __init__(self, host=u'', link=u'', title=u'', text=u''):
+        self.host = host
+        self.link = link
+        self.title = title
+        self.text = text
+
+    @classmethod
+    def from_dict(cls, item):
+        '''Creates an item from a dict with the same keys.'''
+        return cls(*[item.get(k, u'') for k in cls._fields])
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        '''Returns the value of a field, or default if the key isn't a field.'''
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self):
+        '''Returns the field names.'''
+        return self._fields
+
+    def values(self):
+        '''Returns the field values.'''
+        return tuple(getattr(self, k) for k in self._fields)
+
+    def items(self):
+        '''Returns the (name, value) pairs of the fields.'''
+        return tuple((k, getattr(self, k)) for k in self._fields)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __eq__(self, other):
+        if isinstance(other, (SearchResult, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class ColumnView(Sequence):
+    '''A read-only view of one field of the search results. 
+    Reflects later changes to the results, without copying them to a list.'''
+    __slots__ = ('_results', '_field', '_index')
+
+    def __init__(self, results, field, index=None):
+        self._results = results
+        self._field = field
+        self._index = index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [item[self._field] for item in self._results[index]]
+        return self._results[index][self._field]
+
+    def __len__(self):
+        return len(self._results)
+
+    def __iter__(self):
+        field = self._field
+        return (item[field] for item in self._results)
+
+    def __contains__(self, value):
+        if self._index is not None:
+            return value in self._index
+        return any(value == v for v in self)
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+SearchHit = namedtuple('SearchHit', ['engine', 'page', 'item'])
+'''A streamed search results item, tagged with the engine name and the page number.'''
+
+
 class SearchResults:
     '''Stores the search results'''
-    def __init__(self, items=None):
-        self._results = items or []
-    
+    def __init__(self, items=None, intern_hosts=True):
+        '''
+        :param list items: optional, the initial items
+        :param bool intern_hosts: optional, stores one copy of each repeated domain
+        '''
+        self._intern_hosts = intern_hosts
+        self._results = []
+        self._links = set()
+        self._hosts = set()
+        self._fingerprints = set()
+        self.extend(items or [])
+
     def links(self):
         '''Returns the links found in search results'''
-        return [row.get('link') for row in self._results]
-    
+        return ColumnView(self._results, 'link', self._links)
+
     def titles(self):
         '''Returns the titles found in search results'''
-        return [row.get('title') for row in self._results]
-    
+        return ColumnView(self._results, 'title')
+
     def text(self):
         '''Returns the text found in search results'''
-        return [row.get('text') for row in self._results]
-    
+        return ColumnView(self._results, 'text')
+
     def hosts(self):
         '''Returns the domains found in search results'''
-        return [row.get('host') for row in self._results]
-    
+        return ColumnView(self._results, 'host', self._hosts)
+
     def results(self):
         '''Returns all data found in search results'''
         return self._results
-    
+
+    def unique_links(self):
+        '''Returns the number of distinct links in the search results'''
+        return len(self._links)
+
+    def has_link(self, link):
+        '''Checks if a link is in the search results'''
+        return link in self._links
+
+    def has_host(self, host):
+        '''Checks if a domain is in the search results'''
+        return host in self._hosts
+
     def __getitem__(self, index):
         return self._results[index]
-    
+
     def __len__(self):
         return len(self._results)
 
+    def __contains__(self, item):
+        return self._fingerprint(item) in self._fingerprints
+
     def __str__(self):
         return '<SearchResults ({} items)>'.format(len(self._results))
-    
+
     def append(self, item):
         '''appends an item to the results list.'''
+        if not isinstance(item, SearchResult):
+            item = SearchResult.from_dict(item)
+        if self._intern_hosts and isinstance(item.host, str):
+            item.host = intern(item.host)
         self._results.append(item)
-    
+        self._index(item)
+
     def extend(self, items):
         '''appends items to the results list.'''
-        self._results.extend(items)
+        for item in items:
+            self.append(item)
+
+    def merge(self, other, ignore_duplicate_urls=False, ignore_duplicate_domains=False):
+        '''Appends the items of another results list, optionally skipping
+        the links or domains that are already in the results.
+
+        :param other: SearchResults or list The items to append
+        :param ignore_duplicate_urls: bool Optional, skips known links
+        :param ignore_duplicate_domains: bool Optional, skips known domains
+        :returns int The number of appended items
+        '''
+        appended = 0
+        for item in other:
+            if ignore_duplicate_urls and self.has_link(item.get('link')):
+                continue
+            if ignore_duplicate_domains and self.has_host(item.get('host')):
+                continue
+            self.append(item)
+            appended += 1
+        return appended
 
     async def append_async(self, item):
         '''Asynchronously appends an item to the results list.'''
-        self._results.append(item)
+        self.append(item)
 
     async def extend_async(self, items):
         '''Asynchronously appends items to the results list.'''
-        self._results.extend(items)
\ No newline at end of file
+        self.extend(items)
+
+    def _index(self, item):
+        '''Adds an item to the link, domain and item hash indexes.'''
+        self._links.add(item.link)
+        self._hosts.add(item.host)
+        self._fingerprints.add(self._fingerprint(item))
+
+    @staticmethod
+    def _fingerprint(item):
+        '''Returns a hashable key of the item data.'''
+        if isinstance(item, SearchResult):
+            return (item.host, item.link, item.title, item.text)
+        return tuple(map(item.get, SearchResult._fields))
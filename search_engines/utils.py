@@ -1,38 +1,163 @@
-import aiohttp
-from yarl import URL
-from .config import PYTHON_VERSION
+'''URL and string helpers, used for every search results item.
 
-async def quote_url(url, safe=';/?:@&=+$,#'):
+The helpers are synchronous: none of them does I/O. URLs are parsed once
+(`parse_url`, memoized) into their scheme, host, domain and canonical form,
+and normalized once (`normalize_url`, memoized).
+The `*_async` shims keep the former coroutine interface.
+'''
+import re
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+from .config import URL_CACHE_SIZE
+
+
+ParsedUrl = namedtuple('ParsedUrl', ['scheme', 'host', 'domain', 'canonical'])
+'''The parts of a URL: lowercase scheme and host (without port), domain
+(host without `www.`) and canonical form. Empty strings if the URL is invalid.'''
+
+TRACKING_PARAMS = frozenset([
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'ref_url', 'spm', 'srsltid', 'si'
+])
+'''Query parameters that track the visitor and don't change the page.'''
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+'''Prefixes of tracking query parameters.'''
+
+_SLASHES = re.compile(r'/{2,}')
+_STRAY_PERCENT = re.compile(r'%(?![0-9A-Fa-f]{2})')
+_PATH_SAFE = "/:@!$&'()*+,;=~%"
+_QUERY_SAFE = _PATH_SAFE + '?'
+_INVALID = ParsedUrl(u'', u'', u'', u'')
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def parse_url(url):
+    '''Parses a URL once; the result is memoized.
+
+    :param str url: The URL
+    :returns ParsedUrl (scheme, host, domain, canonical)
+    '''
+    try:
+        parts = urlsplit(decode_bytes(url).strip())
+        port = parts.port
+    except (ValueError, AttributeError):
+        return _INVALID
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or u'')
+    if not scheme or not host:
+        return _INVALID
+    domain = host[4:] if host.startswith('www.') else host
+    return ParsedUrl(scheme, host, domain, _canonical(parts, scheme, domain, port))
+
+
+def quote_url(url, safe=';/?:@&=+$,#'):
     '''Encodes URLs.'''
-    if PYTHON_VERSION == 2:
-        url = await encode_str(url)
-    return URL(url).update_query({}).human_repr()
+    return quote(decode_bytes(url), safe=safe)
 
-async def unquote_url(url):
-    '''Decodes URLs.'''
-    if PYTHON_VERSION == 2:
-        url = await encode_str(url)
-    return await decode_bytes(str(URL(url)))
 
-async def is_url(link):
-    '''Checks if link is URL'''
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def normalize_url(url):
+    '''Normalizes URLs: encodes the characters URLs can't contain (spaces,
+    non-ASCII) and keeps the escapes, so `%26` or `%20` stay encoded.
+    The result is memoized.'''
+    url = decode_bytes(url).strip()
     try:
-        result = URL(link)
-        return bool(result.scheme and result.host)
+        parts = urlsplit(url)
     except ValueError:
-        return False
+        return url
+    return urlunsplit((
+        parts.scheme, parts.netloc, _requote(parts.path, _PATH_SAFE),
+        _requote(parts.query, _QUERY_SAFE), _requote(parts.fragment, _QUERY_SAFE)
+    ))
+
+
+def unquote_url(url):
+    '''The former name of normalize_url(), kept for compatibility.
+    Despite the name, the URL stays encoded.'''
+    return normalize_url(url)
+
+
+def decode_param(value):
+    '''Decodes a query parameter value, e.g. the target URL of a redirect link.'''
+    return unquote(decode_bytes(value))
+
+
+def is_url(link):
+    '''Checks if link is URL'''
+    return bool(parse_url(link).host)
+
 
-async def domain(url):
+def domain(url):
     '''Returns domain from URL'''
-    host = URL(url).host
-    if host:
-        return host.lower().split(':')[0].replace('www.', '')
-    return ''
+    return parse_url(url).domain
 
-async def encode_str(s, encoding='utf-8', errors='replace'):
+
+def canonical_url(url):
+    '''Returns the canonical form of a URL, used to group the same page:
+    https, lowercase host without `www.` and default port, no trailing slash
+    or fragment, tracking parameters removed and the others sorted.
+    Invalid URLs are returned unchanged.'''
+    return parse_url(url).canonical or url
+
+
+def encode_str(s, encoding='utf-8', errors='replace'):
     '''Encodes unicode to str, str to bytes.'''
     return s if isinstance(s, bytes) else s.encode(encoding, errors=errors)
 
-async def decode_bytes(s, encoding='utf-8', errors='replace'):
+
+def decode_bytes(s, encoding='utf-8', errors='replace'):
     '''Decodes bytes to str, str to unicode.'''
-    return s.decode(encoding, errors=errors) if isinstance(s, bytes) else s
\ No newline at end of file
+    return s.decode(encoding, errors=errors) if isinstance(s, bytes) else s
+
+
+async def quote_url_async(url, safe=';/?:@&=+$,#'):
+    '''Same as quote_url(), as a coroutine.'''
+    return quote_url(url, safe)
+
+
+async def unquote_url_async(url):
+    '''Same as normalize_url(), as a coroutine; kept for compatibility.'''
+    return normalize_url(url)
+
+
+async def is_url_async(link):
+    '''Same as is_url(), as a coroutine.'''
+    return is_url(link)
+
+
+async def domain_async(url):
+    '''Same as domain(), as a coroutine.'''
+    return domain(url)
+
+
+async def encode_str_async(s, encoding='utf-8', errors='replace'):
+    '''Same as encode_str(), as a coroutine.'''
+    return encode_str(s, encoding, errors)
+
+
+async def decode_bytes_async(s, encoding='utf-8', errors='replace'):
+    '''Same as decode_bytes(), as a coroutine.'''
+    return decode_bytes(s, encoding, errors)
+
+
+def _requote(part, safe):
+    '''Percent-encodes the unsafe characters of a URL part, keeping its escapes.'''
+    return quote(_STRAY_PERCENT.sub('%25', part), safe=safe)
+
+
+def _canonical(parts, scheme, domain, port):
+    '''Returns the canonical form of a split URL.'''
+    if scheme == 'http':
+        scheme = 'https'
+    if port and port not in (80, 443):
+        domain += ':{}'.format(port)
+    path = quote(unquote(_SLASHES.sub('/', parts.path)), safe=_PATH_SAFE)
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, domain, path or '/', urlencode(query), ''))
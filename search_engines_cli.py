@@ -1,9 +1,15 @@
 # -*- encoding: utf-8 -*-
 import argparse
+import json
+import os
+import sys
+from contextlib import nullcontext
+from functools import partial
 
+# The engines, the HTTP client and the profiler are imported once the arguments are parsed,
+# so that `-h` and argument errors don't wait for them.
 try:
     from search_engines.engines import search_engines_dict
-    from search_engines.multiple_search_engines import MultipleSearchEngines, AllSearchEngines
     from search_engines import config
 except ImportError as e:
     msg = '"{}"\nPlease install `search_engines` to resolve this error.'
@@ -19,55 +25,211 @@ def main():
     - Sets up proxy and timeout settings.
     - Validates and processes the specified search engines.
     - Configures the search engine(s) based on the provided arguments.
-    - Executes the search with the provided query and number of pages.
+    - Executes the search with the provided query, or the queries of a file, and number of pages.
     - Outputs the search results in the specified format.
     
     Usage:
-    -q : Specifies the search query (required).
+    -q : Specifies the search query (required, unless --queries-file is used).
     -e : Specifies the search engine(s) to use. Can be a comma-separated list or "all". Default is "google".
-    -o : Specifies the output file format ("html", "csv", "json") or "print" (default).
+    -o : Specifies the output file format ("html", "csv", "json", "ndjson") or "print" (default).
     -n : Specifies the filename for the output file. Default is config.OUTPUT_DIR + "output".
     -p : Specifies the number of pages of search results to retrieve. Default is config.SEARCH_ENGINE_RESULTS_PAGES.
     -f : Specifies how to filter search results ("url", "title", "text", "host").
     -i : Flag to ignore duplicate URLs in the search results when using multiple search engines.
     -proxy : Specifies a proxy server to use for the search requests (format: protocol://ip:port). Default is config.PROXY.
+        Several comma-separated proxies form a pool: each request goes through the healthiest ones.
+    --queries-file : Batch mode, searches the queries of a file (one per line), or stdin if "-".
+        Each query's results are appended as soon as it's done to "<filename>.csv" / ".ndjson".
+    --concurrency : Specifies the number of queries searched at once in batch mode. Default is config.BATCH_CONCURRENCY.
+    --checkpoint : Specifies the batch mode progress file. An interrupted run resumes from it. 
+        Default is "<filename>.checkpoint".
+    --profile : Profiles the search (cProfile and tracemalloc) and writes a report of the top functions 
+        and allocation sites, overall and per engine. Default report is "<filename>.profile.txt".
     """
     
     ap = argparse.ArgumentParser()
-    ap.add_argument('-q', help='query (required)', required=True)
-    ap.add_argument('-e', help='search engine(s) - ' + ', '.join(search_engines_dict) + ' (default: "google")', default='google')
-    ap.add_argument('-o', help='output file [html, csv, json] (default: print)', default='print')
+    queries = ap.add_mutually_exclusive_group(required=True)
+    queries.add_argument('-q', help='query')
+    queries.add_argument('--queries-file', help='file with one query per line, or "-" for stdin (batch mode)')
+    engine_names = ', '.join(search_engines_dict.names(discover=False))
+    ap.add_argument('-e', help='search engine(s) - ' + engine_names + ', or installed third-party engines (default: "google")', default='google')
+    ap.add_argument('-o', help='output file [html, csv, json, ndjson] (default: print)', default='print')
     ap.add_argument('-n', help='filename for output file', default=config.OUTPUT_DIR+'output')
     ap.add_argument('-p', help='number of pages', default=config.SEARCH_ENGINE_RESULTS_PAGES, type=int)
     ap.add_argument('-f', help='filter results [url, title, text, host]')
     ap.add_argument('-i', help='ignore duplicates, useful when multiple search engines are used', action='store_true')
-    ap.add_argument('-proxy', help='use proxy (protocol://ip:port)', default=config.PROXY)
+    ap.add_argument('-proxy', help='use proxy (protocol://ip:port), or proxies, comma separated', default=config.PROXY)
+    ap.add_argument('--concurrency', help='queries searched at once in batch mode', default=config.BATCH_CONCURRENCY, type=int)
+    ap.add_argument('--checkpoint', help='batch mode progress file (default: <filename>.checkpoint)')
+    ap.add_argument('--profile', help='profiles the search and writes a report (default: <filename>.profile.txt)', nargs='?', const='')
     
     args = ap.parse_args()
 
-    proxy = args.proxy
-    timeout = config.TIMEOUT + (10 * bool(proxy))
+    proxies = read_proxies(args.proxy)
+    proxy = proxies[0] if len(proxies) == 1 else None
+    timeout = config.TIMEOUT + (10 * bool(proxies))
     engines = [
         e.strip() for e in args.e.lower().split(',') 
         if e.strip() in search_engines_dict or e.strip() == 'all'
     ]
 
+    import asyncio
+
     if not engines:
         print('Please choose a search engine: ' + ', '.join(search_engines_dict))
+    elif args.queries_file:
+        asyncio.run(search_batch(args, engines, proxy, timeout))
+    else:
+        asyncio.run(search(args, engines, proxy, timeout))
+
+async def search(args, engines, proxy, timeout):
+    """
+    Searches a single query and outputs the results.
+    """
+    from search_engines.multiple_search_engines import AsyncMultipleSearchEngines, AsyncAllSearchEngines
+
+    if 'all' in engines:
+        engine = AsyncAllSearchEngines(proxy, timeout)
+    elif len(engines) > 1:
+        engine = AsyncMultipleSearchEngines(engines, proxy, timeout)
+    else:
+        engine = search_engines_dict[engines[0]](proxy, timeout)
+
+    async with engine:
+        configure(engine, args)
+        with profiler(args, engine):
+            await engine.search(args.q, args.p)
+        await engine.output_async(args.o, args.n)
+
+async def search_batch(args, engines, proxy, timeout):
+    """
+    Searches the queries of a file concurrently, and appends each query's results to the
+    output files (csv, ndjson) as soon as it's done.
+    Once a query's rows are on disk, the query and the files' sizes are appended to the checkpoint
+    file. A restarted run truncates the files to the last checkpoint, so that they don't get
+    the rows of an unfinished query twice, and skips the finished queries.
+    The checkpoint is removed when all the queries are done.
+    """
+    from search_engines.multiple_search_engines import AsyncMultipleSearchEngines, AsyncAllSearchEngines
+    from search_engines.output import ResultsWriter, PRINT
+
+    queries = read_queries(args.queries_file)
+    checkpoint = args.checkpoint or args.n + '.checkpoint'
+    finished, sizes = read_checkpoint(checkpoint)
+    pending = [q for q in queries if q not in finished]
+    if finished:
+        print('Resuming: {} of {} queries are done'.format(len(queries) - len(pending), len(queries)))
+        truncate_files(sizes)
+    formats = batch_formats(args.o)
+
+    if 'all' in engines:
+        searcher = AsyncAllSearchEngines(proxy, timeout)
+    else:
+        searcher = AsyncMultipleSearchEngines(engines, proxy, timeout)
+
+    async with searcher:
+        configure(searcher, args)
+        with open(checkpoint, 'a', encoding='utf-8') as progress, profiler(args, searcher):
+            async with ResultsWriter(args.n, ','.join(formats), append=bool(finished)) as writer:
+                async for query, result in searcher.search_many(pending, args.p, args.concurrency):
+                    if PRINT in args.o.lower():
+                        await result.output_async(PRINT)
+                    result.write_results(writer)
+                    writer.sync(partial(save_checkpoint, progress, query))
+    os.remove(checkpoint)
+
+def configure(engine, args):
+    """
+    Applies the duplicates and filter options to an engine or a group of engines.
+    Banned engines are skipped until their cooldown ends, across runs (config.BREAKER_FILE).
+    """
+    from search_engines.circuit_breaker import CircuitBreakers
+    from search_engines.proxy_pool import ProxyPool
+
+    engine.ignore_duplicate_urls = args.i
+    engine.set_circuit_breakers(CircuitBreakers(config.BREAKER_FILE))
+    proxies = read_proxies(args.proxy)
+    if len(proxies) > 1:
+        engine.set_proxy_pool(ProxyPool(proxies))
+    if args.f:
+        engine.set_search_operator(args.f)
+
+def profiler(args, engine):
+    """
+    Returns the profiler of the --profile option, or a context that does nothing.
+    """
+    if args.profile is None:
+        return nullcontext()
+    from search_engines.profiling import SearchProfiler
+
+    path = args.profile or args.n + '.profile.txt'
+    print('Profiling, report: ' + path)
+    return SearchProfiler(path, engine)
+
+def read_proxies(proxy):
+    """
+    Returns the comma-separated proxies of the -proxy option.
+    """
+    return [p.strip() for p in (proxy or '').split(',') if p.strip()]
+
+def read_queries(path):
+    """
+    Returns the unique, non-empty lines of a file, or stdin if path is "-".
+    """
+    if path == '-':
+        lines = sys.stdin.readlines()
     else:
-        if 'all' in engines:
-            engine = AllSearchEngines(proxy, timeout)
-        elif len(engines) > 1:
-            engine = MultipleSearchEngines(engines, proxy, timeout)
-        else:
-            engine = search_engines_dict[engines[0]](proxy, timeout)
-
-        engine.ignore_duplicate_urls = args.i
-        if args.f:
-            engine.set_search_operator(args.f)
-        
-        engine.search(args.q, args.p)
-        engine.output(args.o, args.n)
+        with open(path, encoding='utf-8') as f:
+            lines = f.readlines()
+    return list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+
+def batch_formats(output):
+    """
+    Returns the output formats of the -o option that batch mode can append to (csv, ndjson).
+    """
+    from search_engines.output import EXPORTERS
+
+    formats = [f.strip() for f in output.lower().split(',') if f.strip() in EXPORTERS]
+    skipped = [f for f in formats if not EXPORTERS[f].appendable]
+    if skipped:
+        print('Batch mode writes csv and ndjson files only, skipping: ' + ', '.join(skipped))
+    return [f for f in formats if f not in skipped]
+
+def read_checkpoint(path):
+    """
+    Returns the queries that an interrupted run finished, and the sizes of the output files
+    after the last of them.
+    """
+    finished, sizes = set(), {}
+    if not os.path.isfile(path):
+        return finished, sizes
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            finished.add(entry['query'])
+            sizes = entry['files']
+    return finished, sizes
+
+def save_checkpoint(progress, query, sizes):
+    """
+    Appends a finished query and the sizes of the output files to the checkpoint file.
+    Called by the ResultsWriter once the query's rows are on disk.
+    """
+    progress.write(json.dumps({'query': query, 'files': sizes}) + '\n')
+    progress.flush()
+    os.fsync(progress.fileno())
+
+def truncate_files(sizes):
+    """
+    Removes the rows written after the last checkpoint from the output files.
+    """
+    for path, size in sizes.items():
+        if os.path.isfile(path) and os.path.getsize(path) > size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
 
 if __name__ == '__main__':
     """
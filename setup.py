@@ -10,6 +10,11 @@ setup(
     description='Search Engines Scraper',
     author='Tasos M. Adamopoulos',
     license='MIT',
-    packages=find_packages(),
-    install_requires=requirements
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*', 'tests', 'tests.*']),
+    install_requires=requirements,
+    extras_require={
+        'lxml': ['lxml'],
+        'lexbor': ['selectolax'],
+        'socks': ['aiohttp-socks']
+    }
 )
@@ -0,0 +1,13 @@
+'''Fixtures shared by the tests.'''
+import pytest
+
+from benchmarks import mock_serp
+
+
+@pytest.fixture(scope='session')
+def mock_server():
+    '''Runs the mock search engines server for the test session; returns its URL.'''
+    server, base_url = mock_serp.start_server(pages=3, page_size=2000)
+    yield base_url
+    server.terminate()
+    server.join()
@@ -0,0 +1,93 @@
+'''The results cache.'''
+import asyncio
+
+from search_engines.cache import ResultsCache
+from search_engines.results import SearchResult
+from search_engines.engines import search_engines_dict
+from benchmarks import mock_serp
+
+
+ROWS = [[1, {'host': 'a.com', 'link': 'https://a.com', 'title': 't', 'text': 'x'}]]
+
+
+def test_key_normalizes_the_query_and_options():
+    key = ResultsCache.key('Bing', '  My   Query ', 2, ['b', 'a', 'a'])
+    assert key == ResultsCache.key('bing', 'my query', 2, ['a', 'b'])
+    assert key != ResultsCache.key('bing', 'my query', 3, ['a', 'b'])
+    assert key != ResultsCache.key('bing', 'my query', 2)
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = ResultsCache(max_items=2)
+    cache.set('bing', 'a', 1, ROWS)
+    cache.set('bing', 'b', 1, ROWS)
+    assert cache.get('bing', 'a', 1) == ROWS
+    cache.set('bing', 'c', 1, ROWS)
+
+    assert cache.get('bing', 'b', 1) is None
+    assert cache.get('bing', 'a', 1) == ROWS
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['memory_items'] == 2
+    assert (stats['memory_hits'], stats['misses']) == (2, 1)
+
+
+def test_ttl_and_engine_ttl():
+    cache = ResultsCache(ttl=-1, engine_ttl={'Google': 60})
+    cache.set('bing', 'q', 1, ROWS)
+    cache.set('google', 'q', 1, ROWS)
+    assert cache.get('bing', 'q', 1) is None
+    assert cache.get('google', 'q', 1) == ROWS
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResultsCache(path)
+    cache.set('bing', 'q', 1, ROWS, ['unique_urls'])
+    cache.close()
+
+    cache = ResultsCache(path, max_items=1)
+    assert cache.get('bing', 'q', 1) is None
+    assert cache.get('bing', 'q', 1, ['unique_urls']) == ROWS
+    assert cache.get('bing', 'q', 1, ['unique_urls']) == ROWS
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['disk_items']) == (1, 1, 1)
+    cache.close()
+
+
+def test_cache_hit_skips_the_network(mock_server):
+    async def main():
+        engine = search_engines_dict['bing'](proxy=None)
+        mock_serp.point_engine(engine, mock_server)
+        engine.set_rate_limiter(None)
+        engine.set_cache(ResultsCache())
+        first = list(await engine.search('test query', 2))
+
+        async def offline(*args, **kwargs):
+            raise AssertionError('The cached search sent a request')
+
+        engine._get_page = offline
+        second = list(await engine.search('Test  Query', 2))
+        await engine.close()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert len(first) == 20
+    assert second == first
+
+
+def test_no_rows_are_copied_without_a_cache(mock_server, monkeypatch):
+    def items(self):
+        raise AssertionError('The item was copied for the cache')
+
+    monkeypatch.setattr(SearchResult, 'items', items)
+
+    async def main():
+        engine = search_engines_dict['bing'](proxy=None)
+        mock_serp.point_engine(engine, mock_server)
+        engine.set_rate_limiter(None)
+        results = await engine.search('test query', 1)
+        await engine.close()
+        return results
+
+    assert len(asyncio.run(main())) == 10
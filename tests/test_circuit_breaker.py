@@ -0,0 +1,62 @@
+'''The circuit breakers.'''
+import json
+
+from search_engines import circuit_breaker
+from search_engines.circuit_breaker import CircuitBreaker, CircuitBreakers, CLOSED, OPEN, HALF_OPEN
+from search_engines.engines import search_engines_dict
+
+
+def test_closed_open_half_open_closed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'time', lambda: now[0])
+    breaker = CircuitBreaker(failures=2, cooldown=10, max_cooldown=100)
+
+    assert breaker.allow()
+    assert not breaker.failure()
+    assert breaker.failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    assert breaker.failure()
+    assert (breaker.state, breaker.cooldown) == (OPEN, 20)
+
+    now[0] += 20
+    assert breaker.allow()
+    assert breaker.success()
+    assert (breaker.state, breaker.failures, breaker.cooldown) == (CLOSED, 0, 10)
+
+
+def test_ban_opens_the_breaker_at_once():
+    breaker = CircuitBreaker(failures=3)
+    assert breaker.failure(banned=True)
+    assert breaker.state == OPEN
+
+
+def test_state_is_saved_and_loaded(tmp_path):
+    path = str(tmp_path / 'breakers.json')
+    breakers = CircuitBreakers(path, failures=1, cooldown=60)
+    breakers.update('Bing', 'http://proxy:8080', ok=False)
+
+    with open(path) as f:
+        rows = json.load(f)
+    assert [(row['engine'], row['proxy'], row['state']) for row in rows] == [
+        ('bing', 'http://proxy:8080', OPEN)
+    ]
+    loaded = CircuitBreakers(path)
+    assert not loaded.allow('bing', 'http://proxy:8080')
+    assert loaded.allow('bing')
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / 'breakers.json'
+    path.write_text('{not json')
+    assert CircuitBreakers(str(path)).allow('bing')
+
+
+def test_engines_have_no_breakers_by_default():
+    first, second = search_engines_dict['bing'](proxy=None), search_engines_dict['bing'](proxy=None)
+    assert first._breakers is None and second._breakers is None
@@ -0,0 +1,67 @@
+'''The engine registry.'''
+import subprocess
+import sys
+from os import path as os_path
+
+import pytest
+
+from search_engines.engines import EngineRegistry, search_engines_dict
+from search_engines.engines.bing import Bing
+
+
+class EntryPoint:
+    name = 'Fake'
+
+    def load(self):
+        return Bing
+
+
+def test_engine_modules_are_imported_on_first_use():
+    code = (
+        'import sys\n'
+        'from search_engines.engines import search_engines_dict\n'
+        'assert "search_engines.engines.bing" not in sys.modules\n'
+        'assert "bing" in search_engines_dict.names(discover=False)\n'
+        'search_engines_dict["bing"]\n'
+        'assert "search_engines.engines.bing" in sys.modules\n'
+        'assert "search_engines.engines.google" not in sys.modules\n'
+    )
+    root = os_path.dirname(os_path.dirname(os_path.abspath(__file__)))
+    subprocess.check_call([sys.executable, '-c', code], cwd=root)
+
+
+def test_builtin_engines():
+    assert search_engines_dict['bing'] is Bing
+    assert 'torch' in search_engines_dict
+
+
+def test_entry_points_are_discovered(monkeypatch):
+    import importlib.metadata
+    groups = []
+
+    def entry_points(group=None):
+        groups.append(group)
+        return [EntryPoint()]
+
+    monkeypatch.setattr(importlib.metadata, 'entry_points', entry_points)
+    registry = EngineRegistry({'bing': 'search_engines.engines.bing:Bing'}, group='test.engines')
+    assert registry.names(discover=False) == ['bing']
+    assert groups == []
+    assert registry['fake'] is Bing
+    assert sorted(registry) == ['bing', 'fake']
+    assert groups == ['test.engines']
+
+
+def test_registered_engines():
+    registry = EngineRegistry({}, group=None)
+    registry.register('mine', Bing)
+    registry.register('path', 'search_engines.engines.bing:Bing')
+    assert registry['mine'] is Bing
+    assert registry['path'] is Bing
+
+
+def test_unknown_engine_is_a_key_error():
+    registry = EngineRegistry({}, group=None)
+    with pytest.raises(KeyError):
+        registry['nope']
+    assert 'nope' not in registry
@@ -0,0 +1,48 @@
+'''Duplicating slow page requests.'''
+import asyncio
+
+from search_engines.hedging import HedgePolicy
+
+
+def test_slow_request_is_duplicated_and_the_first_response_wins():
+    policy = HedgePolicy(percentile=50, min_samples=1)
+    policy.record('Bing', 0.01)
+    requests = []
+    tokens = []
+
+    async def fetch():
+        number = len(requests)
+        requests.append(asyncio.current_task())
+        await asyncio.sleep(5 if number == 0 else 0.01)
+        return number
+
+    async def throttle():
+        tokens.append(True)
+
+    async def main():
+        response = await policy.request('Bing', fetch, throttle)
+        return response, requests[0]
+
+    response, slow = asyncio.run(main())
+    assert response == 1
+    assert policy.hedged == 1
+    assert tokens == [True]
+    assert slow.cancelled()
+
+
+def test_no_duplicate_while_waiting_for_the_rate_limit():
+    policy = HedgePolicy(percentile=50, min_samples=1)
+    policy.record('Bing', 0.01)
+    requests = []
+
+    async def fetch():
+        requests.append(None)
+        await asyncio.sleep(0.1)
+        return len(requests)
+
+    async def throttle():
+        await asyncio.sleep(1)
+
+    assert asyncio.run(policy.request('Bing', fetch, throttle)) == 1
+    assert policy.hedged == 0
+    assert len(requests) == 1
@@ -0,0 +1,68 @@
+'''The per-engine metrics.'''
+import asyncio
+import re
+
+from search_engines.metrics import Metrics
+from search_engines.multiple_search_engines import AsyncMultipleSearchEngines
+from benchmarks import mock_serp
+
+
+def test_phases_counters_and_detaching(mock_server):
+    metrics = Metrics()
+
+    async def main():
+        async with AsyncMultipleSearchEngines(['bing', 'mojeek']) as searcher:
+            searcher.set_rate_limiter(None)
+            for engine in searcher._engines:
+                mock_serp.point_engine(engine, mock_server)
+            searcher.set_metrics(metrics)
+            await searcher.search('test query', 2)
+            sessions = searcher._pool._open_sessions()
+            traced = [metrics.trace_config in s.trace_configs for s in sessions]
+
+            bing, mojeek = searcher._engines
+            bing.set_metrics(None)
+            still_traced = [metrics.trace_config in s.trace_configs for s in sessions]
+            mojeek.set_metrics(None)
+            detached = [metrics.trace_config in s.trace_configs for s in sessions]
+
+            before = metrics.snapshot()
+            await searcher.search('other query', 1)
+            return traced, still_traced, detached, before
+
+    traced, still_traced, detached, before = asyncio.run(main())
+    assert traced == still_traced == [True]
+    assert detached == [False]
+    assert metrics.snapshot() == before
+
+    bing = before['Bing']
+    assert bing['counters']['requests'] == 2
+    assert bing['counters']['pages'] == 2
+    assert bing['counters']['items'] == 20
+    assert bing['counters']['body_bytes'] > 0
+    assert bing['http'] == {200: 2}
+    # no DNS lookup for an IP address, no wait for a connection below the pool limit
+    for phase in ('ttfb', 'request', 'parse', 'filter', 'collect'):
+        assert bing['timings'][phase]['count'] >= 1, phase
+    # the engines share the pool: either may open the connection the other reuses
+    assert 'connect' in bing['timings'] or 'connect' in before['Mojeek']['timings']
+
+
+def test_prometheus_format():
+    metrics = Metrics()
+    metrics.observe('Bing', 'parse', 0.25)
+    metrics.observe('Bing', 'parse', 0.75)
+    metrics.count('Bing', 'pages', 2)
+    metrics.status('Bing', 200)
+    metrics.status('Say "hi"', 0)
+    text = metrics.prometheus()
+
+    assert 'search_engines_phase_seconds_count{engine="Bing",phase="parse"} 2\n' in text
+    assert 'search_engines_phase_seconds_sum{engine="Bing",phase="parse"} 1.0\n' in text
+    assert 'search_engines_phase_seconds_max{engine="Bing",phase="parse"} 0.75\n' in text
+    assert 'search_engines_pages_total{engine="Bing"} 2\n' in text
+    assert 'search_engines_responses_total{engine="Bing",status="200"} 1\n' in text
+    assert 'search_engines_responses_total{engine="Say \\"hi\\"",status="0"} 1\n' in text
+    sample = re.compile(r'^[a-z_]+\{([a-z]+="([^"\\]|\\.)*",?)+\} [0-9.e-]+$')
+    for line in text.splitlines():
+        assert line.startswith('# ') or sample.match(line), line
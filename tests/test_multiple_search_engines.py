@@ -0,0 +1,98 @@
+'''Searching several engines at once.'''
+import asyncio
+import csv
+
+import pytest
+
+from search_engines.multiple_search_engines import AsyncMultipleSearchEngines
+from search_engines.engines.bing import Bing
+from benchmarks import mock_serp
+
+
+def searcher_for(names, base_url):
+    '''Returns a searcher whose engines query the mock server, without pacing.'''
+    searcher = AsyncMultipleSearchEngines(names)
+    searcher.set_rate_limiter(None)
+    for engine in searcher._engines:
+        mock_serp.point_engine(engine, base_url)
+    return searcher
+
+
+def test_duplicate_links_are_exported_once(mock_server, tmp_path):
+    path = str(tmp_path / 'report')
+
+    async def main():
+        async with searcher_for(['bing', 'mojeek'], mock_server) as searcher:
+            searcher.ignore_duplicate_urls = True
+            await searcher.search('test query', 2)
+            searcher.output('csv', path)
+            return searcher
+
+    searcher = asyncio.run(main())
+    with open(path + '.csv', newline='', encoding='utf-8') as f:
+        links = [row['URL'] for row in csv.DictReader(f)]
+    assert len(links) == len(searcher.results) > 0
+    assert len(set(links)) == len(links)
+    assert sum(len(engine.results) for engine in searcher._engines) == len(links)
+
+
+def test_failed_query_doesnt_stop_the_batch(mock_server, monkeypatch):
+    first_page = Bing._first_page
+
+    async def failing_first_page(engine):
+        if engine._query == 'bad query':
+            raise ValueError('bad page')
+        return await first_page(engine)
+
+    monkeypatch.setattr(Bing, '_first_page', failing_first_page)
+
+    async def main():
+        async with searcher_for(['bing', 'mojeek'], mock_server) as searcher:
+            return {
+                query: (len(result.results), result.error)
+                async for query, result in searcher.search_many(['one', 'bad query', 'two'], 1)
+            }
+
+    results = asyncio.run(main())
+    assert sorted(results) == ['bad query', 'one', 'two']
+    assert results['one'] == (20, None)
+    assert results['two'] == (20, None)
+    assert isinstance(results['bad query'][1], ValueError)
+
+
+@pytest.fixture(scope='module')
+def slow_server():
+    '''A mock server whose responses take 50 ms, so that searches can be stopped midway.'''
+    server, base_url = mock_serp.start_server(pages=5, latency=0.05, page_size=2000)
+    yield base_url
+    server.terminate()
+    server.join()
+
+
+def test_search_stops_at_max_results(slow_server):
+    async def main():
+        async with searcher_for(['bing', 'mojeek'], slow_server) as searcher:
+            await searcher.search('test query', 5, max_results=15)
+            tasks = asyncio.all_tasks() - {asyncio.current_task()}
+            return searcher, tasks
+
+    searcher, tasks = asyncio.run(main())
+    assert searcher.results.unique_links() == 15
+    assert not tasks
+    assert all(engine.pages_searched < 5 for engine in searcher._engines)
+
+
+def test_closing_search_iter_cancels_the_engines(slow_server):
+    async def main():
+        async with searcher_for(['bing', 'mojeek'], slow_server) as searcher:
+            hits = searcher.search_iter('test query', 5)
+            hit = await hits.__anext__()
+            await hits.aclose()
+            tasks = asyncio.all_tasks() - {asyncio.current_task()}
+            return searcher, hit, tasks
+
+    searcher, hit, tasks = asyncio.run(main())
+    assert hit.page == 1
+    assert not tasks
+    assert searcher.results.unique_links() == 1
+    assert sum(len(engine.results) for engine in searcher._engines) == 1
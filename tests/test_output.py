@@ -0,0 +1,28 @@
+'''The report files written by ResultsWriter.'''
+import json
+import threading
+
+from search_engines.output import ResultsWriter
+from search_engines.results import SearchResult
+
+
+def test_engines_without_results_are_in_the_report(tmp_path):
+    path = str(tmp_path / 'report')
+    with ResultsWriter(path, 'json,html', 'q', engines=['Bing', 'Mojeek']) as writer:
+        writer.write('Bing', SearchResult(host='a.com', link='https://a.com', title='t', text='x'))
+
+    with open(path + '.json') as f:
+        results = json.load(f)['results']
+    assert list(results) == ['Bing', 'Mojeek']
+    assert results['Mojeek'] == []
+    with open(path + '.html') as f:
+        assert 'Mojeek search results' in f.read()
+
+
+def test_no_thread_without_report_files(tmp_path):
+    threads = threading.active_count()
+    writer = ResultsWriter(str(tmp_path / 'report'), 'print')
+    assert threading.active_count() == threads
+    writer.write('Bing', SearchResult(host='a.com', link='https://a.com', title='t', text='x'))
+    writer.close()
+    assert writer.paths == []
@@ -0,0 +1,47 @@
+'''The parser backends must extract the same items from the same page.'''
+import pytest
+
+from search_engines.executor import _complete
+from search_engines.parsers import get_parser, HTML_PARSER, LXML, LEXBOR
+from benchmarks.bench_engines import ENGINES
+from benchmarks.bench_parsers import load_fixture, FIXTURE_QUERY
+
+
+BACKENDS = (HTML_PARSER, LXML, LEXBOR)
+
+
+def extract(name, html, parser):
+    '''Returns the items and the next page of an engine's page, parsed with a backend.'''
+    engine = ENGINES[name](proxy=None)
+    engine.disable_console()
+    engine._query = FIXTURE_QUERY
+    engine.set_parser(parser)
+    tags = engine._parser.parse(html, engine._REGIONS)
+    items = [dict(item.items()) for item in engine._filter_results(tags)]
+    return items, _complete(engine._next_page(tags))
+
+
+@pytest.mark.parametrize('name', sorted(ENGINES))
+def test_backends_extract_the_same_items(name):
+    html = load_fixture(name)
+    if html is None:
+        pytest.skip('no saved page')
+    missing = [p for p in BACKENDS if get_parser(p).name != p]
+    if missing:
+        pytest.skip('parser not installed: ' + ', '.join(missing))
+
+    expected = extract(name, html, HTML_PARSER)
+    assert expected[0]
+    for parser in (LXML, LEXBOR):
+        assert extract(name, html, parser) == expected, parser
+
+
+def test_lexbor_select_skips_the_node_itself():
+    if get_parser(LEXBOR).name != LEXBOR:
+        pytest.skip('selectolax not installed')
+    html = u'<div class="a"><div class="b">x</div><p>y</p></div>'
+    for parser in BACKENDS:
+        outer = get_parser(parser).parse(html).select_one('div.a')
+        assert [d.get('class') for d in outer.select('div')] == [['b']]
+        assert outer.select_one('div').get('class') == ['b']
+        assert outer.select_one('div.a') is None
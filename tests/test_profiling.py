@@ -0,0 +1,59 @@
+'''Profiling searches.'''
+import asyncio
+import subprocess
+import sys
+from os import path as os_path
+
+from search_engines import profiling
+from search_engines.engines.bing import Bing
+from benchmarks import mock_serp
+
+
+def profile_search(base_url, path, **kwargs):
+    async def main():
+        engine = Bing(proxy=None)
+        engine.set_rate_limiter(None)
+        mock_serp.point_engine(engine, base_url)
+        with profiling.SearchProfiler(str(path), searcher=engine, **kwargs) as profiler:
+            await engine.search('test query', 2)
+        await engine.close()
+        return engine, profiler
+
+    return asyncio.run(main())
+
+
+def test_cprofile_report_is_written(mock_server, tmp_path):
+    path = tmp_path / 'report.txt'
+    engine, profiler = profile_search(mock_server, path, top=5)
+    report = path.read_text(encoding='utf-8')
+    assert report == profiler.report
+    assert report.startswith('Search profile (cProfile): ')
+    for section in ('== Top functions (cumulative time) ==', '== Top allocation sites ==',
+                    '== Bing (bing.py) =='):
+        assert section in report
+    assert 'pages: 2' in report
+    assert (tmp_path / 'report.pstats').exists()
+    # the engine's own metrics are restored
+    assert engine._metrics is None
+
+
+def test_sampling_falls_back_to_cprofile(mock_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'SamplingProfiler', None)
+    path = tmp_path / 'report.txt'
+    profile_search(mock_server, path, sampling=True)
+    assert path.read_text(encoding='utf-8').startswith('Search profile (cProfile): ')
+    assert (tmp_path / 'report.pstats').exists()
+
+
+def test_module_imports_without_pyinstrument():
+    code = (
+        'import sys\n'
+        'sys.modules["pyinstrument"] = None\n'
+        'from search_engines import profiling\n'
+        'assert profiling.SamplingProfiler is None\n'
+        'with profiling.SearchProfiler(sampling=True) as profiler:\n'
+        '    sum(range(1000))\n'
+        'assert profiler.report.startswith("Search profile (cProfile): ")\n'
+    )
+    root = os_path.dirname(os_path.dirname(os_path.abspath(__file__)))
+    subprocess.check_call([sys.executable, '-c', code], cwd=root)
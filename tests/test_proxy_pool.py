@@ -0,0 +1,68 @@
+'''The proxy pool.'''
+import random
+from collections import Counter
+
+import pytest
+
+from search_engines import proxy_pool
+from search_engines.proxy_pool import ProxyPool
+from search_engines.engines.bing import Bing
+from search_engines import config as cfg
+
+FAST, SLOW = 'http://10.0.0.1:8080', 'socks5://10.0.0.2:9050'
+
+
+def test_choice_is_weighted_by_cost(monkeypatch):
+    monkeypatch.setattr(random, 'choices', random.Random(0).choices)
+    pool = ProxyPool([FAST, SLOW])
+    pool.update(FAST, 'Bing', 0.1, 200)
+    pool.update(SLOW, 'Bing', 1.0, 200)
+
+    picks = Counter(pool.choose('Bing') for _ in range(2000))
+    assert 8 < picks[FAST] / picks[SLOW] < 12
+
+
+def test_untried_proxies_get_tried():
+    pool = ProxyPool([FAST, SLOW])
+    pool.update(FAST, 'Bing', 0.1, 200)
+    assert SLOW in {pool.choose('Bing') for _ in range(200)}
+
+
+def test_banned_proxy_is_avoided_until_the_cooldown_ends(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(proxy_pool.time, 'time', lambda: now[0])
+    pool = ProxyPool([FAST, SLOW])
+    pool.update(FAST, 'Bing', 0.1, 429)
+
+    assert {pool.choose('Bing') for _ in range(100)} == {SLOW}
+    assert FAST in {pool.choose('Google') for _ in range(100)}
+    now[0] += cfg.PROXY_BAN_COOLDOWN
+    assert FAST in {pool.choose('Bing') for _ in range(100)}
+
+
+def test_all_banned_still_picks_one():
+    pool = ProxyPool([FAST, SLOW])
+    pool.update(FAST, 'Bing', 0.1, 403)
+    pool.update(SLOW, 'Bing', 0.1, 503)
+    assert pool.choose('Bing') in (FAST, SLOW)
+    assert pool.stats()['bing ' + FAST]['banned']
+
+
+def test_proxy_per_request_or_per_search():
+    proxies = ['http://10.0.0.{}:8080'.format(i) for i in range(1, 9)]
+    engine = Bing(proxy=None)
+
+    engine.set_proxy_pool(ProxyPool(proxies, per_request=True))
+    engine._search_proxy = None
+    assert len({engine._proxy() for _ in range(50)}) > 1
+
+    engine.set_proxy_pool(ProxyPool(proxies, per_request=False))
+    engine._search_proxy = None
+    assert len({engine._proxy() for _ in range(50)}) == 1
+
+
+def test_invalid_proxies():
+    with pytest.raises(ValueError):
+        ProxyPool([])
+    with pytest.raises(ValueError):
+        ProxyPool(['ftp://10.0.0.1:21'])
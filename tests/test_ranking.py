@@ -0,0 +1,78 @@
+'''Reciprocal rank fusion of the results of several engines.'''
+import pytest
+
+from search_engines.ranking import RankFusion
+from search_engines.results import SearchResult
+
+
+def item(link, title=u''):
+    return SearchResult(link=link, title=title)
+
+
+BING = ['https://a.com/', 'https://b.com/', 'https://c.com/']
+MOJEEK = ['https://b.com/', 'https://d.com/', 'https://a.com/']
+
+
+def fuse(order):
+    fusion = RankFusion(k=60)
+    for engine in order:
+        for link in {'Bing': BING, 'Mojeek': MOJEEK}[engine]:
+            fusion.add(engine, item(link))
+    return fusion
+
+
+def test_rrf_scores_and_fused_order():
+    fusion = fuse(['Bing', 'Mojeek'])
+    top = fusion.top(None)
+    # b: 1/61 + 1/62, a: 1/61 + 1/63, d: 1/62, c: 1/63
+    assert [fused.url for fused in top] == [
+        'https://b.com/', 'https://a.com/', 'https://d.com/', 'https://c.com/'
+    ]
+    assert [fused.score for fused in top] == pytest.approx([
+        1 / 61.0 + 1 / 62.0, 1 / 61.0 + 1 / 63.0, 1 / 62.0, 1 / 63.0
+    ])
+    assert top[1].ranks == {'Bing': 1, 'Mojeek': 3}
+    assert top[1].sources == ['Bing', 'Mojeek']
+    assert top[0].sources == ['Mojeek', 'Bing']
+    assert len(fusion) == 4
+
+
+def test_order_does_not_depend_on_the_engine_order():
+    forward = [fused.url for fused in fuse(['Bing', 'Mojeek']).top(None)]
+    backward = [fused.url for fused in fuse(['Mojeek', 'Bing']).top(None)]
+    assert forward == backward
+
+
+def test_ties_are_ordered_by_best_rank_then_url():
+    fusion = RankFusion(k=60)
+    fusion.add('Mojeek', item('https://z.com/'), rank=1)
+    fusion.add('Bing', item('https://y.com/'), rank=1)
+    fusion.add('Bing', item('https://x.com/'), rank=2)
+    fusion.add('Mojeek', item('https://w.com/'), rank=2)
+    assert [fused.url for fused in fusion.top(None)] == [
+        'https://y.com/', 'https://z.com/', 'https://w.com/', 'https://x.com/'
+    ]
+
+
+def test_top_returns_the_n_best():
+    fusion = fuse(['Bing', 'Mojeek'])
+    assert [fused.url for fused in fusion.top(2)] == ['https://b.com/', 'https://a.com/']
+    assert [result['link'] for result in fusion.results(2)] == ['https://b.com/', 'https://a.com/']
+    assert len(fusion.top(10)) == 4
+    fusion.clear()
+    assert fusion.top() == []
+
+
+def test_same_page_is_grouped_and_keeps_the_best_rank():
+    fusion = RankFusion(k=60)
+    fusion.add('Bing', item('https://a.com/x', 'Bing 3'), rank=3)
+    fusion.add('Mojeek', item('http://www.a.com/x/?utm_source=z', 'Mojeek 2'), rank=2)
+    fusion.add('Bing', item('https://a.com/x#top', 'Bing 1'), rank=1)
+    fusion.add('Bing', item('https://a.com/x', 'Bing 5'), rank=5)
+    fused, = fusion.top()
+    assert fused.ranks == {'Bing': 1, 'Mojeek': 2}
+    assert fused.item['title'] == 'Bing 1'
+    assert fused.score == pytest.approx(1 / 61.0 + 1 / 62.0)
+    # ranks continue after the engine's highest rank
+    fusion.add('Bing', item('https://b.com/'))
+    assert fusion.top(None)[1].ranks == {'Bing': 6}
@@ -0,0 +1,32 @@
+'''The token bucket pacing.'''
+import asyncio
+import time
+
+from search_engines.rate_limiter import TokenBucket
+
+
+def test_cancelled_waiter_gives_its_token_back():
+    async def main():
+        bucket = TokenBucket(rate=4, burst=1, jitter=0)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    # the next token is due 0.25 s after the first; without the refund, 0.5 s
+    assert asyncio.run(main()) < 0.35
+
+
+def test_waiters_are_paced():
+    async def main():
+        bucket = TokenBucket(rate=20, burst=1, jitter=0)
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(5)])
+        return time.monotonic() - start
+
+    assert 0.18 < asyncio.run(main()) < 0.4
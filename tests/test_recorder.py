@@ -0,0 +1,52 @@
+'''Recording and replaying the HTTP responses.'''
+import asyncio
+import os
+
+import pytest
+
+from search_engines.recorder import ResponseRecorder, RECORD, REPLAY
+from search_engines.engines.bing import Bing
+from search_engines.http_client import AsyncHttpClient
+from benchmarks import mock_serp
+
+
+async def search(recorder, base_url, query):
+    engine = Bing(proxy=None)
+    engine.set_rate_limiter(None)
+    engine.set_recorder(recorder)
+    mock_serp.point_engine(engine, base_url)
+    results = await engine.search(query, 2)
+    await engine.close()
+    return [item['link'] for item in results]
+
+
+def test_replays_the_recorded_pages_offline(tmp_path):
+    path = str(tmp_path / 'recordings')
+    server, base_url = mock_serp.start_server(pages=3, page_size=2000)
+    try:
+        recorded = asyncio.run(search(ResponseRecorder(path, RECORD), base_url, 'test query'))
+    finally:
+        server.terminate()
+        server.join()
+
+    replayed = asyncio.run(search(ResponseRecorder(path, REPLAY), base_url, 'test query'))
+    assert len(recorded) == 20
+    assert replayed == recorded
+    assert len(os.listdir(os.path.join(path, 'requests'))) == 2
+
+
+def test_missing_recording_isnt_fetched(tmp_path):
+    async def main():
+        client = AsyncHttpClient(proxy=None, recorder=ResponseRecorder(str(tmp_path), REPLAY))
+        response = await client.get('http://127.0.0.1:9/search?q=unknown')
+        await client.close()
+        return response
+
+    response = asyncio.run(main())
+    assert response.http == 0
+    assert response.html.startswith('No recorded response for ')
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ResponseRecorder(mode='rewind')
@@ -0,0 +1,55 @@
+'''Fetching the pages of computable page URLs in advance.'''
+import asyncio
+from urllib.parse import urlsplit, parse_qs
+
+from search_engines.engines.torch import Torch
+from search_engines import config as cfg
+from benchmarks import mock_serp
+
+
+def page_number(url):
+    return int(parse_qs(urlsplit(url).query).get('page', ['1'])[0])
+
+
+def test_pages_past_the_last_one_are_discarded(mock_server):
+    async def main():
+        engine = Torch(proxy=None)
+        engine.set_rate_limiter(None)
+        mock_serp.point_engine(engine, mock_server)
+        requested = []
+        get_page = engine._get_page
+
+        async def recording_get_page(url, data=None):
+            requested.append(page_number(url))
+            return await get_page(url, data)
+
+        engine._get_page = recording_get_page
+        first = list(await engine.search('test query', 10))
+        first_pages, first_requested = engine.pages_searched, sorted(requested)
+        requested[:] = []
+        second = list(await engine.search('other query', 2))
+        await engine.close()
+        return first, first_pages, first_requested, second, sorted(requested)
+
+    first, first_pages, first_requested, second, second_requested = asyncio.run(main())
+    # the mock server has 3 pages; the 4th is empty and ends the search
+    assert first_pages == 4
+    assert len(first) == 30
+    assert len({item['link'] for item in first}) == 30
+    # pages 5 and 6 may have been prefetched, their results are discarded
+    assert first_requested[:4] == [1, 2, 3, 4]
+    assert max(first_requested) < 4 + cfg.SPECULATIVE_PAGES
+    # the search that ended on an empty page doesn't stop the next one
+    assert len(second) == 20
+    assert second_requested == [1, 2]
+
+
+def test_torch_first_page_resets_the_last_page():
+    async def main():
+        engine = Torch(proxy=None)
+        engine._query = 'test query'
+        engine._page_has_links = False
+        await engine._first_page()
+        return await engine._next_page(None)
+
+    assert page_number(asyncio.run(main())['url']) == 2
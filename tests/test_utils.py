@@ -0,0 +1,25 @@
+'''The URL helpers.'''
+from search_engines import utils
+from search_engines.engines import search_engines_dict
+from search_engines.parsers import get_parser
+
+
+def test_normalize_url_keeps_the_escapes():
+    url = 'https://a.com/a%20b?x=1%262&y=2'
+    assert utils.normalize_url(url) == url
+    assert utils.unquote_url(url) == url
+
+
+def test_normalize_url_encodes_unsafe_characters():
+    assert utils.normalize_url('https://a.com/a b?q=é') == 'https://a.com/a%20b?q=%C3%A9'
+    assert utils.normalize_url('https://a.com/50%') == 'https://a.com/50%25'
+
+
+def test_redirect_links_are_decoded_once():
+    target = 'https://a.com/a%20b?x=1%262'
+    html = '<div><a href="/url?q={}&amp;sa=U"><h3>Title</h3></a></div>'.format(
+        utils.quote_url(target, safe=':/')
+    )
+    engine = search_engines_dict['google'](proxy=None)
+    tag = get_parser('html.parser').parse(html, None).select_one('div')
+    assert engine._get_url(tag) == target